@@ -0,0 +1,92 @@
+import logging
+from django.conf import settings
+from app_meeting_server.utils import wx_apis
+from app_meeting_server.utils.common import decrypt_openid
+from app_meeting_server.utils.job_queue import register, JobProgress
+from mindspore.models import Meeting, Collect, User
+from mindspore.utils import drivers, send_email, send_cancel_email
+
+logger = logging.getLogger('log')
+
+SEND_MEETING_EMAIL = 'send_meeting_email'
+CANCEL_MEETING = 'cancel_meeting'
+CANCEL_MEETING_STAGES = ('email', 'subscription', 'collect_delete')
+FETCH_PARTICIPANTS = 'fetch_participants'
+
+
+@register(SEND_MEETING_EMAIL)
+def send_meeting_email(payload):
+    """发送会议创建邮件"""
+    send_email.sendmail(payload['mid'], payload.get('record'))
+
+
+def send_cancel_notice(meeting, time, nickname, encrypt_openid):
+    """发送一个收藏者的会议取消通知, 失败时返回False"""
+    try:
+        openid = decrypt_openid(encrypt_openid)
+        content = wx_apis.get_remove_template(openid, meeting.topic, time, meeting.mid)
+        r = wx_apis.send_subscription(content)
+        if r.status_code != 200:
+            logger.error('status code: {}'.format(r.status_code))
+            logger.error('content: {}'.format(r.json()))
+            return False
+        if r.json()['errcode'] != 0:
+            logger.warning('Error Code: {}'.format(r.json()['errcode']))
+            logger.warning('Error Msg: {}'.format(r.json()['errmsg']))
+            logger.warning('receiver: {}'.format(nickname))
+            return False
+    except Exception as e:
+        logger.error('fail to send meeting {} cancel message to {}, e:{}'.format(meeting.mid, nickname, e))
+        return False
+    logger.info('meeting {} cancel message sent to {}.'.format(meeting.mid, nickname))
+    return True
+
+
+def send_cancel_subscription(meeting, progress=None, stage='subscription'):
+    """分批加载收藏者并发送会议取消通知, 每个收藏者发送后记录进度, 重试时从进度之后的收藏者继续"""
+    time = meeting.date + ' ' + meeting.start
+    user_ids = Collect.objects.filter(meeting_id=meeting.id).values_list('user_id', flat=True)
+    users = User.objects.filter(id__in=user_ids, openid__isnull=False).order_by('id')
+    ret = progress.get_checkpoint(stage) if progress is not None else None
+    ret = ret or {'last_user_id': 0, 'sent': 0, 'failed': 0}
+    while True:
+        batch = list(users.filter(id__gt=ret['last_user_id']).values_list('id', 'nickname', 'openid')[
+                     :settings.SUBSCRIPTION_BATCH_SIZE])
+        if not batch:
+            break
+        for user_id, nickname, encrypt_openid in batch:
+            if send_cancel_notice(meeting, time, nickname, encrypt_openid):
+                ret['sent'] += 1
+            else:
+                ret['failed'] += 1
+            ret['last_user_id'] = user_id
+            if progress is not None:
+                progress.checkpoint(stage, ret)
+    return ret
+
+
+def delete_collections(meeting):
+    """删除会议的全部收藏"""
+    count, _ = Collect.objects.filter(meeting_id=meeting.id).delete()
+    return {'deleted': count}
+
+
+@register(CANCEL_MEETING, bind=True)
+def cancel_meeting(payload, job):
+    """取消会议的后续流程: 发送取消邮件, 发送订阅消息, 删除收藏, 平台的会议已在请求中取消"""
+    progress = JobProgress(job)
+    meeting = Meeting.objects.get(id=payload['meeting_id'])
+    progress.run('email', send_cancel_email.sendmail, meeting.mid)
+    progress.run('subscription', send_cancel_subscription, meeting, progress)
+    progress.run('collect_delete', delete_collections, meeting)
+    logger.info('{} has canceled the meeting which mid was {}'.format(payload.get('user_id'), meeting.mid))
+
+
+@register(FETCH_PARTICIPANTS)
+def fetch_participants(payload):
+    """会议结束后预取参会者"""
+    meeting = Meeting.objects.filter(mid=payload['mid'], is_delete=0).values('date', 'end').first()
+    if meeting is None:
+        logger.info('meeting {} has been canceled, skip fetching participants'.format(payload['mid']))
+        return
+    drivers.participants_store.fill(payload['mid'], meeting['date'], meeting['end'])
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/22 17:05
+# @Author  : Tom_zc
+# @FileName: bench_email_template.py
+# @Software: PyCharm
+import logging
+import os
+
+from django.core.management.base import BaseCommand
+
+from app_meeting_server.utils.bench.email_template import benchmark
+
+logger = logging.getLogger('log')
+
+
+class Command(BaseCommand):
+    def handle(self, *args, **options):
+        logger.info("start to bench_email_template")
+        times = int(os.getenv('BENCH_EMAIL_TIMES', 10000))
+        ret = benchmark(times)
+        for name in ('legacy', 'compiled'):
+            self.stdout.write('{:<10}{:>10.2f} us/invitation'.format(name, ret[name]))
+        self.stdout.write('same      {}'.format(ret['same']))
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/24 14:10
+# @Author  : Tom_zc
+# @FileName: bench_host_reservation.py
+# @Software: PyCharm
+import logging
+import os
+
+from django.core.management.base import BaseCommand
+
+from app_meeting_server.utils.bench.host_reservation import benchmark
+
+logger = logging.getLogger('log')
+
+
+class Command(BaseCommand):
+    def handle(self, *args, **options):
+        logger.info("start to bench_host_reservation")
+        concurrency = int(os.getenv('BENCH_HOST_CONCURRENCY', 50))
+        hosts = int(os.getenv('BENCH_HOST_COUNT', 3))
+        ret = benchmark(concurrency, hosts)
+        for name in ('legacy', 'reserved'):
+            self.stdout.write('{:<10}created: {:>3}, double bookings: {:>3}, p50: {} ms, p95: {} ms, max: {} ms'.format(
+                name, ret[name]['created'], ret[name]['double_bookings'], ret[name]['p50'], ret[name]['p95'],
+                ret[name]['max']))
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/16 16:40
+# @Author  : Tom_zc
+# @FileName: bench_http_client.py
+# @Software: PyCharm
+import logging
+import os
+
+from django.core.management.base import BaseCommand
+
+from app_meeting_server.utils.bench.http_client import benchmark
+
+logger = logging.getLogger('log')
+
+
+class Command(BaseCommand):
+    def handle(self, *args, **options):
+        logger.info("start to bench_http_client")
+        times = int(os.getenv('BENCH_HTTP_TIMES', 200))
+        ret = benchmark(times)
+        for name in ('bare', 'pooled'):
+            self.stdout.write('{:<8}{:>10.4f} ms/request{:>6} connections'.format(
+                name, ret[name]['ms'], ret[name]['connections']))
+        self.stdout.write('timeout {:>10.4f} ms'.format(ret['timeout']['ms']))
+        self.stdout.write('flaky   status_code: {}, requests: {}'.format(
+            ret['flaky']['status_code'], ret['flaky']['requests']))
+        self.stdout.write('stats   {}'.format(ret['stats']))
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/26 16:10
+# @Author  : Tom_zc
+# @FileName: bench_list_columns.py
+# @Software: PyCharm
+import base64
+import json
+import logging
+import os
+import secrets
+from types import SimpleNamespace
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app_meeting_server.utils.bench.projection import measure_bytes
+from app_meeting_server.utils.projection import apply_projection
+from mindspore.models import User, Group, Meeting, Activity
+from mindspore.serializers import MeetingsListSerializer, ActivitiesSerializer
+from mindspore.views import MeetingActivityDataView
+
+logger = logging.getLogger('log')
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """compare the bytes read by the list queries with all the columns and the projected columns, rollback at last"""
+    date = '2000-01-01'
+
+    def make_synthetic_rows(self, count):
+        prefix = secrets.token_hex(4)
+        user = User.objects.create(nickname='bench_{}'.format(prefix), openid='bench_{}'.format(prefix))
+        group = Group.objects.create(name='bench_{}'.format(prefix), group_type=1)
+        wx_code = base64.b64encode(os.urandom(24 * 1024)).decode()
+        schedules = json.dumps([{'start': '10:00', 'end': '11:00', 'topic': 'topic {}'.format(i)} for i in range(20)])
+        for i in range(count):
+            Meeting.objects.create(topic='bench {}'.format(i), group_name=group.name, sponsor='bench',
+                                   date=self.date, start='10:00', end='11:00', agenda='agenda ' * 200,
+                                   emaillist=';'.join('user{}@example.com'.format(j) for j in range(50)),
+                                   host_id='host@example.com', mid='{}{}'.format(prefix, i), group_type=1,
+                                   meeting_type=1, user=user, group=group)
+            Activity.objects.create(title='bench {}'.format(i), activity_type=1, activity_category=1,
+                                    register_method=1, start_date=self.date, end_date=self.date, status=3,
+                                    synopsis='synopsis ' * 100, schedules=schedules, wx_code=wx_code, user=user)
+        return group
+
+    def write(self, name, full, projected):
+        self.stdout.write('{:<40}all columns: {:>10} bytes  projected: {:>10} bytes  {:>6.1f}%'.format(
+            name, full, projected, projected * 100 / full if full else 0))
+
+    def handle(self, *args, **options):
+        count = int(os.getenv('BENCH_LIST_COLUMNS_COUNT', 50))
+        logger.info("start to bench_list_columns")
+        context = {'request': SimpleNamespace(user=AnonymousUser())}
+        try:
+            with transaction.atomic():
+                group = self.make_synthetic_rows(count)
+                for serializer_class, queryset in (
+                        (MeetingsListSerializer, Meeting.objects.filter(group_name=group.name)),
+                        (ActivitiesSerializer, Activity.objects.filter(start_date=self.date))):
+                    projected = apply_projection(queryset, serializer_class)
+                    same = serializer_class(queryset, many=True, context=context).data == \
+                        serializer_class(projected, many=True, context=context).data
+                    self.write('{} same: {}'.format(serializer_class.__name__, same), measure_bytes(queryset),
+                               measure_bytes(projected))
+                view = MeetingActivityDataView()
+                for name, queryset in (('MeetingActivityDataView meetings', view.get_meetings_queryset(self.date)),
+                                       ('MeetingActivityDataView activity', view.get_activity_queryset(self.date))):
+                    self.write(name, measure_bytes(queryset.values()), measure_bytes(queryset))
+                raise Rollback()
+        except Rollback:
+            logger.info("bench_list_columns finished, the synthetic data has been rollback")
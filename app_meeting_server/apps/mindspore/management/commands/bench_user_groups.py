@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/26 10:30
+# @Author  : Tom_zc
+# @FileName: bench_user_groups.py
+# @Software: PyCharm
+import logging
+import os
+import secrets
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from app_meeting_server.utils.projection import apply_projection
+from mindspore.models import User, Group, GroupUser
+from mindspore.serializers import UserGroupSerializer
+
+logger = logging.getLogger('log')
+
+
+class Rollback(Exception):
+    pass
+
+
+class LegacyUserGroupSerializer(UserGroupSerializer):
+    """the description before the group was joined, only used by the benchmark"""
+
+    def get_description(self, obj):
+        if Group.objects.get(id=obj.group_id).group_type == 1:
+            return 'SIG会议'
+        elif Group.objects.get(id=obj.group_id).group_type == 2:
+            return 'MSG会议'
+        elif Group.objects.get(id=obj.group_id).group_type == 3:
+            return '专家委员会'
+        else:
+            return ''
+
+
+class Command(BaseCommand):
+    """compare the user groups serialized with the per-row group lookups and the joined group, rollback at last"""
+    sizes = (10, 50)
+
+    def make_synthetic_user(self, count):
+        prefix = secrets.token_hex(4)
+        user = User.objects.create(nickname='bench_{}'.format(prefix), openid='bench_{}'.format(prefix))
+        groups = Group.objects.bulk_create([Group(name='bench_{}_{}'.format(prefix, i), group_type=i % 4 or None)
+                                            for i in range(count)])
+        groups = Group.objects.filter(name__startswith='bench_{}_'.format(prefix)).only('id')
+        GroupUser.objects.bulk_create([GroupUser(group_id=group.id, user_id=user.id) for group in groups])
+        return user
+
+    def bench(self, serializer_class, queryset, times):
+        with CaptureQueriesContext(connection) as context:
+            data = serializer_class(list(queryset), many=True).data
+        start = time.perf_counter()
+        for _ in range(times):
+            serializer_class(list(queryset), many=True).data
+        return (time.perf_counter() - start) * 1000 / times, len(context), data
+
+    def handle(self, *args, **options):
+        times = int(os.getenv('BENCH_USER_GROUPS_TIMES', 50))
+        logger.info("start to bench_user_groups")
+        try:
+            with transaction.atomic():
+                user = self.make_synthetic_user(max(self.sizes))
+                for size in self.sizes:
+                    ids = GroupUser.objects.filter(user_id=user.id).order_by('id').values_list('id', flat=True)[:size]
+                    queryset = GroupUser.objects.filter(id__in=list(ids))
+                    legacy_cost, legacy_queries, legacy_data = self.bench(LegacyUserGroupSerializer, queryset, times)
+                    joined_cost, joined_queries, joined_data = self.bench(
+                        UserGroupSerializer, apply_projection(queryset, UserGroupSerializer), times)
+                    self.stdout.write('size {:>3}  legacy: {:>8.3f} ms {:>4} queries  joined: {:>8.3f} ms {:>4} '
+                                      'queries  same: {}'.format(size, legacy_cost, legacy_queries, joined_cost,
+                                                                 joined_queries, legacy_data == joined_data))
+                raise Rollback()
+        except Rollback:
+            logger.info("bench_user_groups finished, the synthetic data has been rollback")
@@ -4,6 +4,7 @@ from datetime import datetime
 from django.conf import settings
 from django.core.management.base import BaseCommand
 from obs import ObsClient
+from app_meeting_server.utils.token_cache import token_cache
 
 logger = logging.getLogger('log')
 BUCKET_NAME = settings.QUERY_BUCKETNAME
@@ -42,4 +43,5 @@ class Command(BaseCommand):
             logger.info('There is no need to update agreement, exit.')
             return
         User.objects.all().update(agree_privacy_policy=False)
+        token_cache.clear()
         logger.info('Notice the target object has been modified, update agreement status of all users.')
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/25 10:20
+# @Author  : Tom_zc
+# @FileName: check_schedule_indexes.py
+# @Software: PyCharm
+import datetime
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app_meeting_server.utils.subscription_dispatcher import get_due_meetings
+from mindspore.models import Meeting, Activity
+
+logger = logging.getLogger('log')
+
+
+class Command(BaseCommand):
+    """assert that the plans of the window queries of meetings and activities use the indexes on the typed fields"""
+
+    def get_querysets(self):
+        today = datetime.date.today()
+        week_before = today - datetime.timedelta(days=7)
+        week_later = today + datetime.timedelta(days=7)
+        meeting_index = 'meeting_delete_date_start'
+        activity_index = 'activity_delete_status_start'
+        meetings = Meeting.objects.filter(is_delete=0)
+        yield 'weekly meetings', meetings.filter(meeting_date__gte=week_before, meeting_date__lte=week_later), \
+            meeting_index
+        yield 'daily meetings', meetings.filter(meeting_date=today), meeting_index
+        yield 'recent meetings', meetings.filter(meeting_date__gte=today), meeting_index
+        yield 'host conflict', meetings.filter(meeting_date=today, end_time__gt='09:30', start_time__lt='11:30'), \
+            meeting_index
+        yield 'due meetings', get_due_meetings(Meeting), meeting_index
+        activities = Activity.objects.filter(is_delete=0)
+        yield 'recent activities', activities.filter(status__gt=2, activity_start_date__gte=today), activity_index
+        yield 'activity dates', activities.filter(status__in=[3, 4, 5], activity_start_date__gte=week_before,
+                                                  activity_start_date__lte=week_later), activity_index
+        yield 'daily activities', activities.filter(status__in=[3, 4, 5], activity_start_date__lte=today,
+                                                    activity_end_date__gte=today), activity_index
+
+    def handle(self, *args, **options):
+        logger.info("start to check_schedule_indexes")
+        failed = list()
+        for name, queryset, index in self.get_querysets():
+            plan = queryset.explain()
+            if index not in plan:
+                failed.append(name)
+                self.stderr.write('{} does not use {}:\n{}'.format(name, index, plan))
+            else:
+                self.stdout.write('{:<20}{}'.format(name, index))
+        if failed:
+            raise CommandError('{} queries do not use the indexes'.format(len(failed)))
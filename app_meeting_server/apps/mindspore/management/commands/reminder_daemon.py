@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/19 16:45
+# @Author  : Tom_zc
+# @FileName: reminder_daemon.py
+# @Software: PyCharm
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app_meeting_server.utils.reminder import ReminderDaemon
+
+logger = logging.getLogger('log')
+
+
+class Command(BaseCommand):
+    def handle(self, *args, **options):
+        logger.info("start to run reminder_daemon")
+        daemon = ReminderDaemon(offsets=tuple(settings.REMINDER_OFFSETS),
+                                tick=settings.REMINDER_TICK,
+                                slots=settings.REMINDER_WHEEL_SLOTS,
+                                poll_interval=settings.REMINDER_POLL_INTERVAL,
+                                retention_days=settings.REMINDER_CHANGE_RETENTION_DAYS,
+                                gap_timeout=settings.REMINDER_CHANGE_GAP_TIMEOUT,
+                                retry_delay=settings.REMINDER_RETRY_DELAY,
+                                retry_times=settings.REMINDER_RETRY_TIMES)
+        daemon.run()
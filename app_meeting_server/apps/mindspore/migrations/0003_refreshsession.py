@@ -0,0 +1,31 @@
+# Generated by Django 3.2.23 on 2026-10-18 18:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mindspore', '0002_auto_20231123_0935'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RefreshSession',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(max_length=64, unique=True, verbose_name='刷新令牌id')),
+                ('digest', models.CharField(max_length=255, verbose_name='刷新签名')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='过期时间')),
+                ('create_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'meetings_refreshsession',
+                'verbose_name_plural': 'meetings_refreshsession',
+                'db_table': 'meetings_refreshsession',
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.23 on 2026-10-18 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mindspore', '0005_job_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeetingChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('meeting_id', models.IntegerField(verbose_name='会议id')),
+                ('action', models.CharField(max_length=16, verbose_name='变更类型')),
+                ('create_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': 'meetings_meeting_change',
+                'verbose_name_plural': 'meetings_meeting_change',
+                'db_table': 'meetings_meeting_change',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReminderLedger',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('meeting_id', models.IntegerField(verbose_name='会议id')),
+                ('offset', models.IntegerField(verbose_name='提前提醒分钟数')),
+                ('fire_at', models.DateTimeField(verbose_name='提醒时间')),
+                ('create_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': 'meetings_reminder_ledger',
+                'verbose_name_plural': 'meetings_reminder_ledger',
+                'db_table': 'meetings_reminder_ledger',
+                'unique_together': {('meeting_id', 'offset')},
+            },
+        ),
+    ]
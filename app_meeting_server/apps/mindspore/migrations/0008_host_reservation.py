@@ -0,0 +1,74 @@
+# Generated by Django 3.2.23 on 2026-10-18 19:18
+
+import datetime
+import uuid
+
+from django.db import migrations, models
+
+# copy of the rules in utils.host_reservation when the table is created
+SLOT_MINUTES = 15
+GAP_MINUTES = 30
+
+
+def get_slots(date, start, end):
+    half_gap = datetime.timedelta(minutes=GAP_MINUTES // 2)
+    start_time = datetime.datetime.strptime('{} {}'.format(date, start), '%Y-%m-%d %H:%M') - half_gap
+    end_time = datetime.datetime.strptime('{} {}'.format(date, end), '%Y-%m-%d %H:%M') + half_gap
+    step = datetime.timedelta(minutes=SLOT_MINUTES)
+    cur = start_time.replace(minute=start_time.minute - start_time.minute % SLOT_MINUTES)
+    slots = list()
+    while cur < end_time:
+        slots.append((cur.strftime('%Y-%m-%d'), (cur.hour * 60 + cur.minute) // SLOT_MINUTES))
+        cur += step
+    return slots
+
+
+def backfill_reservations(apps, schema_editor):
+    """reserve the slots of the upcoming meetings created before the table, the conflicts are ignored"""
+    model = apps.get_model('mindspore', 'HostReservation')
+    meeting_model = apps.get_model('mindspore', 'Meeting')
+    today = datetime.datetime.now().strftime('%Y-%m-%d')
+    rows = list()
+    for meeting in meeting_model.objects.filter(is_delete=0, date__gte=today).values(
+            'mid', 'host_id', 'date', 'start', 'end', 'mplatform'):
+        if not meeting['host_id'] or not meeting['mplatform']:
+            continue
+        try:
+            slots = get_slots(meeting['date'], meeting['start'], meeting['end'])
+        except (TypeError, ValueError):
+            continue
+        token = uuid.uuid4().hex
+        for slot_date, slot in slots:
+            rows.append(model(platform=meeting['mplatform'], host_id=meeting['host_id'], date=slot_date,
+                              slot=slot, token=token, mid=meeting['mid']))
+    model.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mindspore', '0007_participants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HostReservation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(max_length=20, verbose_name='会议平台')),
+                ('host_id', models.CharField(max_length=254, verbose_name='host_id')),
+                ('date', models.CharField(max_length=30, verbose_name='会议日期')),
+                ('slot', models.SmallIntegerField(verbose_name='时间片')),
+                ('token', models.CharField(db_index=True, max_length=32, verbose_name='预定标识')),
+                ('mid', models.CharField(blank=True, db_index=True, max_length=20, null=True, verbose_name='会议id')),
+                ('create_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': 'meetings_host_reservation',
+                'verbose_name_plural': 'meetings_host_reservation',
+                'db_table': 'meetings_host_reservation',
+                'unique_together': {('platform', 'host_id', 'date', 'slot')},
+            },
+        ),
+        migrations.RunPython(backfill_reservations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 3.2.23 on 2026-10-18 19:25
+
+import datetime
+
+from django.db import migrations, models
+
+
+def parse_date(value):
+    try:
+        return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_time(value):
+    try:
+        return datetime.datetime.strptime(value, '%H:%M').time()
+    except (TypeError, ValueError):
+        return None
+
+
+def backfill_schedule_fields(apps, schema_editor):
+    for model_name, schedule_fields in (
+        ('Meeting', {'date': ('meeting_date', parse_date), 'start': ('start_time', parse_time),
+                     'end': ('end_time', parse_time)}),
+        ('Activity', {'start_date': ('activity_start_date', parse_date),
+                      'end_date': ('activity_end_date', parse_date)}),
+    ):
+        model = apps.get_model('mindspore', model_name)
+        typed_fields = [typed_field for typed_field, _ in schedule_fields.values()]
+        objs = list()
+        for obj in model.objects.only('id', *schedule_fields.keys()).iterator():
+            for field, (typed_field, parser) in schedule_fields.items():
+                setattr(obj, typed_field, parser(getattr(obj, field)))
+            objs.append(obj)
+            if len(objs) >= 1000:
+                model.objects.bulk_update(objs, typed_fields)
+                objs = list()
+        if objs:
+            model.objects.bulk_update(objs, typed_fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mindspore', '0008_host_reservation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='activity_end_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='活动结束日期'),
+        ),
+        migrations.AddField(
+            model_name='activity',
+            name='activity_start_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='活动开始日期'),
+        ),
+        migrations.AddField(
+            model_name='meeting',
+            name='end_time',
+            field=models.TimeField(blank=True, editable=False, null=True, verbose_name='会议结束时间'),
+        ),
+        migrations.AddField(
+            model_name='meeting',
+            name='meeting_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='会议日期'),
+        ),
+        migrations.AddField(
+            model_name='meeting',
+            name='start_time',
+            field=models.TimeField(blank=True, editable=False, null=True, verbose_name='会议开始时间'),
+        ),
+        migrations.RunPython(backfill_schedule_fields, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['is_delete', 'status', 'activity_start_date'], name='activity_delete_status_start'),
+        ),
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(fields=['is_delete', 'meeting_date', 'start_time'], name='meeting_delete_date_start'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.23 on 2026-10-18 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mindspore', '0009_schedule_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='refreshsession',
+            name='access_jti',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='访问令牌id'),
+        ),
+    ]
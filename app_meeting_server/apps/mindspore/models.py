@@ -1,4 +1,5 @@
-from app_meeting_server.utils.models import BaseUser, BaseMeeting, BaseActivity
+from app_meeting_server.utils.models import BaseUser, BaseMeeting, BaseActivity, BaseRefreshSession, BaseJob, \
+    BaseMeetingChange, BaseReminderLedger, BaseParticipants, BaseHostReservation, parse_date
 from django.db import models
 
 
@@ -13,6 +14,16 @@ class User(BaseUser):
         verbose_name_plural = verbose_name
 
 
+class RefreshSession(BaseRefreshSession):
+    """刷新令牌会话表"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = "meetings_refreshsession"
+        verbose_name = "meetings_refreshsession"
+        verbose_name_plural = verbose_name
+
+
 class Group(models.Model):
     """用户组表"""
     name = models.CharField(verbose_name='组名', max_length=50)
@@ -74,6 +85,7 @@ class Meeting(BaseMeeting):
 
     class Meta:
         db_table = "meetings_meeting"
+        indexes = [models.Index(fields=['is_delete', 'meeting_date', 'start_time'], name='meeting_delete_date_start')]
         verbose_name = "meetings_meeting"
         verbose_name_plural = verbose_name
 
@@ -111,9 +123,18 @@ class Activity(BaseActivity):
                                                  choices=((1, '课程'), (2, 'MSG'), (3, '赛事'), (4, '其他')))
     register_method = models.SmallIntegerField(verbose_name='报名方式', choices=((1, '小程序报名'), (2, '跳转链接')))
     online_url = models.CharField(verbose_name='线上链接', max_length=255, null=True, blank=True)
+    activity_start_date = models.DateField(verbose_name='活动开始日期', null=True, blank=True, editable=False)
+    activity_end_date = models.DateField(verbose_name='活动结束日期', null=True, blank=True, editable=False)
+
+    SCHEDULE_FIELDS = {
+        'start_date': ('activity_start_date', parse_date),
+        'end_date': ('activity_end_date', parse_date),
+    }
 
     class Meta:
         db_table = "meetings_activity"
+        indexes = [models.Index(fields=['is_delete', 'status', 'activity_start_date'],
+                                name='activity_delete_status_start')]
         verbose_name = "meetings_activity"
         verbose_name_plural = verbose_name
 
@@ -128,3 +149,51 @@ class ActivityCollect(models.Model):
         db_table = "meetings_activitycollect"
         verbose_name = "meetings_activitycollect"
         verbose_name_plural = verbose_name
+
+
+class Job(BaseJob):
+    """后台任务表"""
+
+    class Meta:
+        db_table = "meetings_job"
+        verbose_name = "meetings_job"
+        verbose_name_plural = verbose_name
+        index_together = ('status', 'available_at')
+
+
+class MeetingChange(BaseMeetingChange):
+    """会议变更记录表"""
+
+    class Meta:
+        db_table = "meetings_meeting_change"
+        verbose_name = "meetings_meeting_change"
+        verbose_name_plural = verbose_name
+
+
+class ReminderLedger(BaseReminderLedger):
+    """会议提醒发送记录表"""
+
+    class Meta:
+        unique_together = ('meeting_id', 'offset')
+        db_table = "meetings_reminder_ledger"
+        verbose_name = "meetings_reminder_ledger"
+        verbose_name_plural = verbose_name
+
+
+class Participants(BaseParticipants):
+    """已结束会议的参会者表"""
+
+    class Meta:
+        db_table = "meetings_participants"
+        verbose_name = "meetings_participants"
+        verbose_name_plural = verbose_name
+
+
+class HostReservation(BaseHostReservation):
+    """会议主持人时间片预定表"""
+
+    class Meta:
+        unique_together = ('platform', 'host_id', 'date', 'slot')
+        db_table = "meetings_host_reservation"
+        verbose_name = "meetings_host_reservation"
+        verbose_name_plural = verbose_name
@@ -1,3 +1,4 @@
+import json
 import logging
 import traceback
 
@@ -8,10 +9,14 @@ from rest_framework.serializers import ModelSerializer
 from app_meeting_server.utils.common import get_uuid, encrypt_openid, refresh_token_and_refresh_token, get_cur_date
 from app_meeting_server.utils.permissions import MeetigsAdminPermission
 from app_meeting_server.utils.ret_code import RetCode
+from app_meeting_server.utils.token_cache import token_cache
 from app_meeting_server.utils.wx_apis import get_openid
-from mindspore.models import Group, Meeting, Collect, User, GroupUser, City, CityUser, Activity, ActivityCollect
+from mindspore.models import Group, Meeting, Collect, User, GroupUser, City, CityUser, Activity, ActivityCollect, \
+    Job
 from app_meeting_server.utils.check_params import check_group_id, check_user_ids
 from app_meeting_server.utils.ret_api import MyValidationError
+from app_meeting_server.utils.list_prefetch import PrefetchListSerializer, PrefetchSerializerMixin, \
+    get_collection_map, get_request_user_id
 
 logger = logging.getLogger('log')
 
@@ -120,6 +125,7 @@ class GroupUserAddSerializer(ModelSerializer):
                 for user in users:
                     groupuser = GroupUser.objects.create(group_id=group_id.id, user_id=int(user.id))
                     User.objects.filter(id=int(user.id), level=1).update(level=2)
+                    token_cache.invalidate_user(user.id)
                     result_list.append(groupuser)
             return result_list
         except Exception as e:
@@ -160,6 +166,7 @@ class CityUserAddSerializer(ModelSerializer):
                 for user in users:
                     CityUser.objects.create(city_id=city_id.id, user_id=int(user.id))
                     User.objects.filter(id=int(user.id), level=1).update(level=2)
+                    token_cache.invalidate_user(user.id)
             return True
         except Exception as e:
             logger.error('Failed to add city user.and e:{}'.format(str(e)))
@@ -213,16 +220,16 @@ class UserGroupSerializer(ModelSerializer):
     class Meta:
         model = GroupUser
         fields = ['group', 'group_name', 'group_type', 'etherpad', 'description']
+        method_sources = {'description': ['group.group_type']}
+
+    descriptions = {
+        1: 'SIG会议',
+        2: 'MSG会议',
+        3: '专家委员会',
+    }
 
     def get_description(self, obj):
-        if Group.objects.get(id=obj.group_id).group_type == 1:
-            return 'SIG会议'
-        elif Group.objects.get(id=obj.group_id).group_type == 2:
-            return 'MSG会议'
-        elif Group.objects.get(id=obj.group_id).group_type == 3:
-            return '专家委员会'
-        else:
-            return ''
+        return self.descriptions.get(obj.group.group_type, '')
 
 
 class UserCitySerializer(ModelSerializer):
@@ -253,23 +260,24 @@ class MeetingDelSerializer(ModelSerializer):
         fields = ['mmid']
 
 
-class MeetingsListSerializer(ModelSerializer):
+class MeetingsListSerializer(PrefetchSerializerMixin, ModelSerializer):
     collection_id = serializers.SerializerMethodField()
 
     class Meta:
         model = Meeting
         fields = ['id', 'collection_id', 'user_id', 'group_id', 'topic', 'sponsor', 'group_name', 'city', 'date',
                   'start', 'end', 'agenda', 'etherpad', 'mid', 'mmid', 'join_url', 'mplatform']
+        list_serializer_class = PrefetchListSerializer
+        method_sources = {'collection_id': ['id']}
+
+    def get_prefetched(self, meetings):
+        user_id = get_request_user_id(self.context)
+        return {
+            'collection_id': get_collection_map(Collect, 'meeting_id', user_id, [meeting.id for meeting in meetings]),
+        }
 
     def get_collection_id(self, obj):
-        user = None
-        request = self.context.get("request")
-        if request and hasattr(request, "user"):
-            user = request.user
-        try:
-            return Collect.objects.filter(user_id=user.id, meeting_id=obj.id).values()[0]['id']
-        except IndexError:
-            return
+        return self.get_prefetched_value('collection_id', obj, obj.id)
 
 
 class CollectSerializer(ModelSerializer):
@@ -299,10 +307,10 @@ class ActivityUpdateSerializer(ModelSerializer):
 class ActivityDraftUpdateSerializer(ModelSerializer):
     class Meta:
         model = Activity
-        fields = '__all__'
+        exclude = ['activity_start_date', 'activity_end_date']
 
 
-class ActivitiesSerializer(ModelSerializer):
+class ActivitiesSerializer(PrefetchSerializerMixin, ModelSerializer):
     collection_id = serializers.SerializerMethodField()
 
     class Meta:
@@ -310,16 +318,18 @@ class ActivitiesSerializer(ModelSerializer):
         fields = ['id', 'collection_id', 'title', 'start_date', 'end_date', 'activity_category',
                   'activity_type', 'register_method', 'register_url', 'synopsis', 'address', 'detail_address',
                   'online_url', 'longitude', 'latitude', 'schedules', 'poster', 'status', 'user']
+        list_serializer_class = PrefetchListSerializer
+        method_sources = {'collection_id': ['id']}
+
+    def get_prefetched(self, activities):
+        user_id = get_request_user_id(self.context)
+        return {
+            'collection_id': get_collection_map(ActivityCollect, 'activity_id', user_id,
+                                                [activity.id for activity in activities]),
+        }
 
     def get_collection_id(self, obj):
-        user = None
-        request = self.context.get("request")
-        if request and hasattr(request, "user"):
-            user = request.user
-        try:
-            return ActivityCollect.objects.filter(user_id=user.id, activity_id=obj.id).values()[0]['id']
-        except IndexError:
-            return
+        return self.get_prefetched_value('collection_id', obj, obj.id)
 
 
 class ActivityRetrieveSerializer(ActivitiesSerializer):
@@ -328,6 +338,7 @@ class ActivityRetrieveSerializer(ActivitiesSerializer):
         fields = ['id', 'collection_id', 'title', 'start_date', 'end_date', 'activity_category',
                   'activity_type', 'register_method', 'register_url', 'synopsis', 'address', 'detail_address',
                   'online_url', 'longitude', 'latitude', 'schedules', 'poster', 'status', 'user', 'wx_code', 'sign_url']
+        list_serializer_class = PrefetchListSerializer
 
 
 class ActivityCollectSerializer(ModelSerializer):
@@ -340,3 +351,14 @@ class ApplicantInfoSerializer(ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'name', 'gitee_name']
+
+
+class JobSerializer(ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = ['id', 'name', 'status', 'attempts', 'progress', 'create_time', 'update_time']
+
+    def get_progress(self, obj):
+        return json.loads(obj.progress or '{}')
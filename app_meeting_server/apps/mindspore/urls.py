@@ -8,7 +8,8 @@ from mindspore.views import LoginView, UsersIncludeView, UsersExcludeView, SigsV
     DraftsListView, ActivityCollectView, ActivityCollectionsView, ActivityCollectionDelView, MyCountsView, \
     CityMembersView, NonCityMembersView, CitiesView,AddCityView, CityUserAddView, CityUserDelView, UserCityView, \
     RecentActivitiesView, PublishedActivitiesView, WaitingPublishingActivitiesView, CountActivitiesView, \
-    MeetingActivityDateView, MeetingActivityDataView, AgreePrivacyPolicyView, RevokeAgreementView, LogoutView, LogoffView, PingView, RefreshView
+    MeetingActivityDateView, MeetingActivityDataView, AgreePrivacyPolicyView, RevokeAgreementView, LogoutView, LogoffView, PingView, RefreshView, \
+    JobView
 
 urlpatterns = [
 
@@ -47,6 +48,7 @@ urlpatterns = [
     # meeting
     path('meetings/', CreateMeetingView.as_view()),               # 预定会议
     path('meeting/<int:mid>/', CancelMeetingView.as_view()),      # 取消会议
+    path('job/<int:pk>/', JobView.as_view()),                     # 查询后台任务状态
     path('meetings/<int:pk>/', MeetingDetailView.as_view()),      # 会议详情
     path('meetingslist/', MeetingsListView.as_view()),            # 会议列表
     path('collect/', CollectMeetingView.as_view()),               # 收藏会议
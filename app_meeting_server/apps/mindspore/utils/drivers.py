@@ -1,4 +1,6 @@
+from django.conf import settings
 from mindspore.models import Meeting
+from app_meeting_server.utils.participants_store import ParticipantsStore
 from app_meeting_server.utils import tencent_apis, welink_apis
 from mindspore.utils import tencent_apis as mta
 from mindspore.utils import welink_apis as mwa
@@ -34,3 +36,9 @@ def getParticipants(mid):
     elif mplatform == 'welink':
         status, res = mwa.getParticipants(mid)
     return status, res
+
+
+participants_store = ParticipantsStore(getParticipants,
+                                       settle_minutes=settings.PARTICIPANTS_SETTLE_MINUTES,
+                                       maxsize=settings.PARTICIPANTS_CACHE_MAXSIZE,
+                                       ttl=settings.PARTICIPANTS_CACHE_TTL)
@@ -1,6 +1,6 @@
 import datetime
+import json
 import math
-import secrets
 from django.conf import settings
 
 from django.db import transaction
@@ -13,24 +13,22 @@ from rest_framework.mixins import CreateModelMixin, UpdateModelMixin, ListModelM
     DestroyModelMixin
 from rest_framework_simplejwt.views import TokenRefreshView
 
-from app_meeting_server.utils import wx_apis
 from app_meeting_server.utils.my_pagination import MyPagination
 from app_meeting_server.utils.permissions import MeetigsAdminPermission, ActivityAdminPermission, \
     QueryPermission, MaintainerPermission, SponsorPermission, MaintainerAndAdminPermission, AdminPermission
 from mindspore.models import Activity, ActivityCollect
-from mindspore.models import GroupUser, Group, User, Collect, City, CityUser
+from mindspore.models import GroupUser, Group, User, Collect, City, CityUser, Job
 from mindspore.serializers import LoginSerializer, GroupsSerializer, GroupUserAddSerializer, GroupUserDelSerializer, \
     UserInfoSerializer, UserGroupSerializer, \
     MeetingSerializer, MeetingDelSerializer, MeetingsListSerializer, CollectSerializer, CitiesSerializer, \
     CityUserAddSerializer, CityUserDelSerializer, UserCitySerializer, SponsorSerializer, ActivitySerializer, \
     ActivityUpdateSerializer, ActivityDraftUpdateSerializer, ActivitiesSerializer, ActivityRetrieveSerializer, \
-    ActivityCollectSerializer, UpdateUserInfoSerializer, UsersSerializer
-from mindspore.utils.send_email import sendmail
+    ActivityCollectSerializer, UpdateUserInfoSerializer, UsersSerializer, JobSerializer
 from mindspore.utils.tencent_apis import *
-from mindspore.utils import gene_wx_code, drivers, send_cancel_email
+from mindspore.utils import gene_wx_code, drivers
 from app_meeting_server.utils.auth import CustomAuthentication, CustomAuthenticationWithoutPolicyAgreen
-from app_meeting_server.utils.common import get_cur_date, decrypt_openid, \
-    refresh_token_and_refresh_token, clear_token, start_thread, get_date_by_start_and_end, get_version_params
+from app_meeting_server.utils.common import get_cur_date, \
+    refresh_token_and_refresh_token, clear_token, get_date_by_start_and_end, get_version_params
 from app_meeting_server.utils.operation_log import LoggerContext, OperationLogModule, OperationLogDesc, \
     OperationLogType, PolicyLoggerContext
 from app_meeting_server.utils.ret_api import MyValidationError, ret_access_json, ret_json
@@ -39,6 +37,13 @@ from app_meeting_server.utils.check_params import check_group_id_and_user_ids, \
     check_publish, check_type, check_date, check_int, check_schedules_more_string, check_end_date, \
     check_invalid_content, check_field, check_gitee_name
 from app_meeting_server.utils.ret_code import RetCode
+from app_meeting_server.utils.token_cache import token_cache
+from app_meeting_server.utils.job_queue import enqueue
+from app_meeting_server.utils.reminder import record_meeting_change, MEETING_CREATED, MEETING_CANCELED
+from mindspore.jobs import SEND_MEETING_EMAIL, CANCEL_MEETING, CANCEL_MEETING_STAGES, FETCH_PARTICIPANTS
+from app_meeting_server.utils.participants_store import get_cache_age
+from app_meeting_server.utils.host_reservation import host_reserver
+from app_meeting_server.utils.projection import ProjectionMixin
 
 logger = logging.getLogger('log')
 
@@ -165,6 +170,7 @@ class AgreePrivacyPolicyView(GenericAPIView, UpdateModelMixin):
                                                                 agree_privacy_policy_time=cur_date,
                                                                 agree_privacy_policy_version=policy_version,
                                                                 agree_privacy_app_policy_version=app_policy_version)
+            token_cache.invalidate_user(self.request.user.id)
             policy_log_context.result = True
         resp = ret_access_json(request.user, msg="Agree to privacy statement")
         return resp
@@ -231,6 +237,7 @@ class UpdateUserInfoView(GenericAPIView, UpdateModelMixin):
         if gitee_name:
             check_gitee_name(gitee_name)
         super(UpdateUserInfoView, self).update(request, *args, **kwargs)
+        token_cache.invalidate_user(kwargs.get('pk'))
         return ret_access_json(request.user)
 
 
@@ -307,7 +314,7 @@ class SigsView(GenericAPIView, ListModelMixin):
         return self.list(request, *args, **kwargs)
 
 
-class UserGroupView(GenericAPIView, ListModelMixin):
+class UserGroupView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """查询用户所在SIG组信息"""
     serializer_class = UserGroupSerializer
     queryset = GroupUser.objects.all()
@@ -396,11 +403,13 @@ class ParticipantsView(GenericAPIView):
 
     def get(self, request, *args, **kwargs):
         mid = self.kwargs.get('mid')
-        if not Meeting.objects.filter(mid=mid, is_delete=0):
+        meeting = Meeting.objects.filter(mid=mid, is_delete=0).values('date', 'end').first()
+        if meeting is None:
             return JsonResponse({'code': 400, 'msg': 'Bad Request'})
-        status, res = drivers.getParticipants(mid)
+        # 已结束会议的参会者从缓存读取, cache_age为缓存的秒数
+        status, res, cached_at = drivers.participants_store.get(mid, meeting['date'], meeting['end'])
         if status == 200:
-            return JsonResponse(res)
+            return JsonResponse(dict(res, cache_age=get_cache_age(cached_at)))
         resp = JsonResponse(res)
         resp.status_code = 400
         return resp
@@ -508,6 +517,7 @@ class SponsorsAddView(GenericAPIView, CreateModelMixin):
                                                                                             match_queryset))
             raise MyValidationError(RetCode.INFORMATION_CHANGE_ERROR)
         User.objects.filter(id__in=new_user_ids, activity_level=1, is_delete=0).update(activity_level=2)
+        token_cache.invalidate_users(new_user_ids)
         return ret_access_json(request.user)
 
 
@@ -535,6 +545,7 @@ class SponsorsDelView(GenericAPIView, CreateModelMixin):
                                                                                             match_queryset))
             raise MyValidationError(RetCode.INFORMATION_CHANGE_ERROR)
         User.objects.filter(id__in=new_user_ids, activity_level=2).update(activity_level=1)
+        token_cache.invalidate_users(new_user_ids)
         return ret_access_json(request.user)
 
 
@@ -621,7 +632,7 @@ class CityUserDelView(GenericAPIView, CreateModelMixin):
         return ret_access_json(request.user)
 
 
-class UserCityView(GenericAPIView, ListModelMixin):
+class UserCityView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """查询用户所在城市组"""
     serializer_class = UserCitySerializer
     queryset = CityUser.objects.all()
@@ -734,46 +745,57 @@ class CreateMeetingView(GenericAPIView, CreateModelMixin):
         end_search = datetime.datetime.strftime(
             (datetime.datetime.strptime(end, '%H:%M') + datetime.timedelta(minutes=30)),
             '%H:%M')
-        meetings = Meeting.objects.filter(is_delete=0, date=date, end__gt=start_search, start__lt=end_search).values()
-        unavailable_host_ids = [meeting['host_id'] for meeting in meetings]
+        unavailable_host_ids = Meeting.objects.filter(is_delete=0, meeting_date=date, end_time__gt=start_search,
+                                                      start_time__lt=end_search).values_list('host_id', flat=True)
         available_host_id = list(set(host_list) - set(unavailable_host_ids))
-        if len(available_host_id) == 0:
+        # 2.从available_host_id中随机预定一个host_id的时间片, 调用平台失败时释放
+        reservation = host_reserver.reserve(platform, available_host_id, date, start, end)
+        if reservation is None:
             logger.info('no available host')
             raise MyValidationError(RetCode.STATUS_MEETING_DATE_CONFLICT)
-        # 2.从available_host_id中随机生成一个host_id,并在host_dict中取出
-        host_id = secrets.choice(available_host_id)
-        status, resp = drivers.createMeeting(platform, date, start, end, topic, host_id, record)
+        host_id = reservation.host_id
+        try:
+            status, resp = drivers.createMeeting(platform, date, start, end, topic, host_id, record)
+        except Exception:
+            reservation.release()
+            raise
         if status not in [200, 201]:
+            reservation.release()
             logger.error("Failed to create meeting, and code is {}".format(str(status)))
             raise MyValidationError(RetCode.STATUS_MEETING_FAILED_CREATE)
         meeting_id = resp.get("mmid")
         meeting_code = resp.get('mid')
         join_url = resp.get('join_url')
-        # 3.保存数据
-        new_meetings = Meeting.objects.create(
-            mid=meeting_code,
-            mmid=meeting_id,
-            topic=topic,
-            community=community,
-            meeting_type=meeting_type,
-            group_type=meeting_type,
-            sponsor=sponsor,
-            agenda=agenda,
-            date=date,
-            start=start,
-            end=end,
-            join_url=join_url,
-            etherpad=etherpad,
-            emaillist=emaillist,
-            group_name=group_name,
-            host_id=host_id,
-            user_id=user_id,
-            group_id=group_id,
-            city=city,
-            mplatform=platform
-        )
+        # 3.保存数据, 与发送email的任务在同一事务中提交
+        with transaction.atomic():
+            new_meetings = Meeting.objects.create(
+                mid=meeting_code,
+                mmid=meeting_id,
+                topic=topic,
+                community=community,
+                meeting_type=meeting_type,
+                group_type=meeting_type,
+                sponsor=sponsor,
+                agenda=agenda,
+                date=date,
+                start=start,
+                end=end,
+                join_url=join_url,
+                etherpad=etherpad,
+                emaillist=emaillist,
+                group_name=group_name,
+                host_id=host_id,
+                user_id=user_id,
+                group_id=group_id,
+                city=city,
+                mplatform=platform
+            )
+            reservation.bind(meeting_code)
+            enqueue(SEND_MEETING_EMAIL, {'mid': meeting_code, 'record': record})
+            record_meeting_change(new_meetings.id, MEETING_CREATED)
+            enqueue(FETCH_PARTICIPANTS, {'mid': meeting_code},
+                    delay=drivers.participants_store.get_delay(date, end))
         logger.info('created a {} meeting which mid is {}.'.format(platform, meeting_code))
-        start_thread(sendmail, meeting_code, record)
         return ret_access_json(request.user, id=new_meetings.id)
 
 
@@ -810,43 +832,35 @@ class CancelMeetingView(GenericAPIView, UpdateModelMixin):
         if int((start_date - cur_date).total_seconds()) < 1 * 60 * 60:
             raise MyValidationError(RetCode.STATUS_MEETING_CANNNOT_BE_DELETE)
 
+        # 先取消平台的会议, 失败时拒绝请求, 会议和主持人的预定保持不变
         status = drivers.cancelMeeting(mid)
-        # 数据库更改Meeting的is_delete=1
-        if status != 200:
-            logger.error('Failed to delete meeting {}'.format(str(status)))
+        if status not in [200, 204]:
+            logger.error('Failed to cancel meeting {} on platform, and code is {}'.format(mid, status))
             raise MyValidationError(RetCode.STATUS_FAILED)
-        # 发送删除通知邮件
-        send_cancel_email.sendmail(mid)
-        Meeting.objects.filter(mid=mid).update(is_delete=1)
-        # 发送会议取消通知
-        collections = Collect.objects.filter(meeting_id=meeting.id)
-        if collections:
-            access_token = wx_apis.get_token()
-            topic = meeting.topic
-            date = meeting.date
-            start_time = meeting.start
-            time = date + ' ' + start_time
-            for collection in collections:
-                user_id = collection.user_id
-                user = User.objects.get(id=user_id)
-                nickname = user.nickname
-                encrypt_openid = user.openid
-                openid = decrypt_openid(encrypt_openid)
-                content = wx_apis.get_remove_template(openid, topic, time, mid)
-                r = wx_apis.send_subscription(content, access_token)
-                if r.status_code != 200:
-                    logger.error('status code: {}'.format(r.status_code))
-                    logger.error('content: {}'.format(r.json()))
-                else:
-                    if r.json()['errcode'] != 0:
-                        logger.warning('Error Code: {}'.format(r.json()['errcode']))
-                        logger.warning('Error Msg: {}'.format(r.json()['errmsg']))
-                        logger.warning('receiver: {}'.format(nickname))
-                    else:
-                        logger.info('meeting {} cancel message sent to {}.'.format(mid, nickname))
-                # 删除收藏
-                collection.delete()
-        return ret_access_json(request.user)
+        # 数据库更改Meeting的is_delete=1, 取消会议的后续流程在后台任务中执行
+        with transaction.atomic():
+            Meeting.objects.filter(mid=mid).update(is_delete=1)
+            host_reserver.release_meeting(mid)
+            record_meeting_change(meeting.id, MEETING_CANCELED)
+            job = enqueue(CANCEL_MEETING, {'meeting_id': meeting.id, 'user_id': user_id}, stages=CANCEL_MEETING_STAGES)
+        logger.info('{} has canceled the meeting which mid was {}, job: {}'.format(user_id, mid, job.id))
+        return ret_access_json(request.user, job_id=job.id)
+
+
+class JobView(GenericAPIView, RetrieveModelMixin):
+    """查询后台任务状态"""
+    serializer_class = JobSerializer
+    queryset = Job.objects.all()
+    authentication_classes = (CustomAuthentication,)
+    permission_classes = (MaintainerAndAdminPermission,)
+
+    def get(self, request, *args, **kwargs):
+        job = self.get_object()
+        if json.loads(job.payload).get('user_id') != request.user.id and \
+                request.user.level != MeetigsAdminPermission.level:
+            logger.error('User {} has no access to job {}'.format(request.user.id, job.id))
+            raise MyValidationError(RetCode.STATUS_USER_HAS_NO_PERMISSIONS)
+        return ret_access_json(request.user, data=self.get_serializer(job).data)
 
 
 class MeetingDetailView(GenericAPIView, RetrieveModelMixin):
@@ -858,7 +872,7 @@ class MeetingDetailView(GenericAPIView, RetrieveModelMixin):
         return self.retrieve(request, *args, **kwargs)
 
 
-class MeetingsListView(GenericAPIView, ListModelMixin):
+class MeetingsListView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """会议列表"""
     serializer_class = MeetingsListSerializer
     queryset = Meeting.objects.filter(is_delete=0).order_by('-date', 'start')
@@ -877,13 +891,13 @@ class MeetingsListView(GenericAPIView, ListModelMixin):
         if meeting_type == 'tech':
             self.queryset = self.queryset.filter(meeting_type=3)
         if meeting_range == 'daily':
-            self.queryset = self.queryset.filter(date=today)
+            self.queryset = self.queryset.filter(meeting_date=today)
         if meeting_range == 'weekly':
             week_before = datetime.datetime.strftime(datetime.datetime.today() - datetime.timedelta(days=7), '%Y-%m-%d')
             week_later = datetime.datetime.strftime(datetime.datetime.today() + datetime.timedelta(days=7), '%Y-%m-%d')
-            self.queryset = self.queryset.filter(Q(date__gte=week_before) & Q(date__lte=week_later))
+            self.queryset = self.queryset.filter(Q(meeting_date__gte=week_before) & Q(meeting_date__lte=week_later))
         if meeting_range == 'recently':
-            self.queryset = self.queryset.filter(date__gte=today)
+            self.queryset = self.queryset.filter(meeting_date__gte=today)
         return self.list(request, *args, **kwargs)
 
 
@@ -949,7 +963,7 @@ class CollectionDelView(GenericAPIView, DestroyModelMixin):
         return queryset
 
 
-class MyMeetingsView(GenericAPIView, ListModelMixin):
+class MyMeetingsView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """我预定的所有会议"""
     serializer_class = MeetingsListSerializer
     queryset = Meeting.objects.all().filter(is_delete=0)
@@ -968,7 +982,7 @@ class MyMeetingsView(GenericAPIView, ListModelMixin):
         return queryset
 
 
-class MyCollectionsView(GenericAPIView, ListModelMixin):
+class MyCollectionsView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """我收藏的会议"""
     serializer_class = MeetingsListSerializer
     queryset = Meeting.objects.all()
@@ -1102,7 +1116,7 @@ class ActivityUpdateView(GenericAPIView, UpdateModelMixin):
         return queryset
 
 
-class WaitingActivities(GenericAPIView, ListModelMixin):
+class WaitingActivities(ProjectionMixin, GenericAPIView, ListModelMixin):
     """待审活动列表"""
     serializer_class = ActivitiesSerializer
     queryset = Activity.objects.filter(is_delete=0, status=2).order_by('-start_date', 'id')
@@ -1312,7 +1326,7 @@ class DraftView(GenericAPIView, RetrieveModelMixin, DestroyModelMixin):
         return queryset
 
 
-class ActivitiesListView(GenericAPIView, ListModelMixin):
+class ActivitiesListView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """活动列表"""
     serializer_class = ActivitiesSerializer
     queryset = Activity.objects.filter(is_delete=0, status__gt=2).order_by('-start_date', 'id')
@@ -1344,14 +1358,14 @@ class ActivitiesListView(GenericAPIView, ListModelMixin):
         return self.list(request, *args, **kwargs)
 
 
-class RecentActivitiesView(GenericAPIView, ListModelMixin):
+class RecentActivitiesView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """最近的活动列表"""
     serializer_class = ActivitiesSerializer
     queryset = Activity.objects.filter(is_delete=0)
     pagination_class = MyPagination
 
     def get(self, request, *args, **kwargs):
-        self.queryset = self.queryset.filter(status__gt=2, start_date__gte=datetime.datetime.now().
+        self.queryset = self.queryset.filter(status__gt=2, activity_start_date__gte=datetime.datetime.now().
                                              strftime('%Y-%m-%d')).order_by('-start_date', 'id')
         return self.list(request, *args, **kwargs)
 
@@ -1365,7 +1379,7 @@ class ActivityDetailView(GenericAPIView, RetrieveModelMixin):
         return self.retrieve(request, *args, **kwargs)
 
 
-class DraftsListView(GenericAPIView, ListModelMixin):
+class DraftsListView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """活动草案列表(草稿箱)"""
     serializer_class = ActivitiesSerializer
     queryset = Activity.objects.all()
@@ -1382,7 +1396,7 @@ class DraftsListView(GenericAPIView, ListModelMixin):
         return queryset
 
 
-class PublishedActivitiesView(GenericAPIView, ListModelMixin):
+class PublishedActivitiesView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """我发布的活动列表(已发布)"""
     serializer_class = ActivitiesSerializer
     queryset = Activity.objects.all().order_by('-start_date', 'id')
@@ -1398,7 +1412,7 @@ class PublishedActivitiesView(GenericAPIView, ListModelMixin):
         return queryset
 
 
-class WaitingPublishingActivitiesView(GenericAPIView, ListModelMixin):
+class WaitingPublishingActivitiesView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """待发布的活动列表(待发布)"""
     serializer_class = ActivitiesSerializer
     queryset = Activity.objects.all()
@@ -1443,7 +1457,7 @@ class ActivityCollectView(GenericAPIView, CreateModelMixin):
         return ret_access_json(request.user)
 
 
-class ActivityCollectionsView(GenericAPIView, ListModelMixin):
+class ActivityCollectionsView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """收藏活动列表"""
     serializer_class = ActivitiesSerializer
     queryset = Activity.objects.all()
@@ -1527,16 +1541,16 @@ class MeetingActivityDateView(GenericAPIView, ListModelMixin):
 
     def get_meetings(self):
         date_list = self._meeting_queryset.filter(
-            date__gte=(datetime.datetime.now() - datetime.timedelta(days=180)).strftime('%Y-%m-%d'),
-            date__lte=(datetime.datetime.now() + datetime.timedelta(days=30)).strftime('%Y-%m-%d')). \
+            meeting_date__gte=(datetime.datetime.now() - datetime.timedelta(days=180)).strftime('%Y-%m-%d'),
+            meeting_date__lte=(datetime.datetime.now() + datetime.timedelta(days=30)).strftime('%Y-%m-%d')). \
             distinct().order_by('-date', 'id').values_list("date", flat=True)
         return date_list
 
     def get_activity(self):
         all_date_list = self._activity_queryset.filter(
-            start_date__gte=(datetime.datetime.now() - datetime.timedelta(days=180)).strftime('%Y-%m-%d'),
-            start_date__lte=(datetime.datetime.now() + datetime.timedelta(days=30)).strftime('%Y-%m-%d')).values(
-            "start_date", "end_date")
+            activity_start_date__gte=(datetime.datetime.now() - datetime.timedelta(days=180)).strftime('%Y-%m-%d'),
+            activity_start_date__lte=(datetime.datetime.now() + datetime.timedelta(days=30)).strftime('%Y-%m-%d')). \
+            values("start_date", "end_date")
         all_ret_date_list = list()
         for all_date in all_date_list:
             start_date_str = all_date["start_date"]
@@ -1567,9 +1581,22 @@ class MeetingActivityDateView(GenericAPIView, ListModelMixin):
 class MeetingActivityDataView(GenericAPIView, ListModelMixin):
     _meeting_queryset = Meeting.objects.filter(is_delete=0)
     _activity_queryset = Activity.objects.filter(status__in=[3, 4, 5], is_delete=0)
+    meeting_fields = ('id', 'group_name', 'meeting_type', 'city', 'start', 'end', 'topic', 'sponsor', 'agenda',
+                      'user__avatar', 'join_url', 'mid', 'etherpad', 'replay_url', 'mplatform')
+    activity_fields = ('id', 'title', 'start_date', 'end_date', 'activity_type', 'activity_category', 'address',
+                       'detail_address', 'longitude', 'latitude', 'register_method', 'online_url', 'register_url',
+                       'synopsis', 'sign_url', 'poster', 'wx_code', 'schedules')
+
+    def get_meetings_queryset(self, query_date):
+        return self._meeting_queryset.filter(meeting_date=query_date).values(*self.meeting_fields) \
+            .order_by('-date', 'id')
+
+    def get_activity_queryset(self, query_date):
+        return self._activity_queryset.filter(activity_start_date__lte=query_date, activity_end_date__gte=query_date) \
+            .values(*self.activity_fields).order_by('create_time')
 
     def get_meetings(self, query_date):
-        queryset = self._meeting_queryset.filter(date=query_date).values().order_by('-date', 'id')
+        queryset = self.get_meetings_queryset(query_date)
         list_data = [{
             'id': meeting["id"],
             'group_name': meeting["group_name"],
@@ -1584,7 +1611,7 @@ class MeetingActivityDataView(GenericAPIView, ListModelMixin):
             'name': meeting["topic"],
             'creator': meeting["sponsor"],
             'detail': meeting["agenda"],
-            'url': User.objects.get(id=meeting["user_id"]).avatar,
+            'url': meeting["user__avatar"],
             'join_url': meeting["join_url"],
             'meeting_id': meeting["mid"],
             'etherpad': meeting["etherpad"],
@@ -1594,8 +1621,7 @@ class MeetingActivityDataView(GenericAPIView, ListModelMixin):
         return list_data
 
     def get_activity(self, query_date):
-        queryset = self._activity_queryset.filter(start_date__lte=query_date,
-                                                  end_date__gte=query_date).values().order_by('create_time')
+        queryset = self.get_activity_queryset(query_date)
         list_data = [{
             'id': activity["id"],
             'title': activity["title"],
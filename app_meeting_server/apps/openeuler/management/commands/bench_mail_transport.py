@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/22 11:30
+# @Author  : Tom_zc
+# @FileName: bench_mail_transport.py
+# @Software: PyCharm
+import logging
+import os
+
+from django.core.management.base import BaseCommand
+
+from app_meeting_server.utils.bench.mail_transport import benchmark
+
+logger = logging.getLogger('log')
+
+
+class Command(BaseCommand):
+    def handle(self, *args, **options):
+        logger.info("start to bench_mail_transport")
+        times = int(os.getenv('BENCH_MAIL_TIMES', 100))
+        ret = benchmark(times)
+        for name in ('bare', 'pooled'):
+            self.stdout.write('{:<8}{:>10.4f} ms/message{:>6} connections'.format(
+                name, ret[name]['ms'], ret[name]['connections']))
+        self.stdout.write('dropped failed: {}, connections: {}'.format(
+            ret['dropped']['failed'], ret['dropped']['connections']))
+        self.stdout.write('stats   {}'.format(ret['stats']))
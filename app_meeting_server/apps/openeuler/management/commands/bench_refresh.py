@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/11 16:40
+# @Author  : Tom_zc
+# @FileName: bench_refresh.py
+# @Software: PyCharm
+import logging
+import os
+import secrets
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from app_meeting_server.utils.common import make_refresh_signature
+from openeuler.models import User, RefreshSession
+
+logger = logging.getLogger('log')
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """compare the refresh lookup by meetings_user.refresh_signature with meetings_refreshsession, rollback at last"""
+    batch_size = 10000
+    sample_count = 20
+
+    @staticmethod
+    def check_database():
+        """the synthetic users are inserted into meetings_user, refuse to run against the live database"""
+        name = str(connection.settings_dict['NAME'])
+        test_name = connection.settings_dict.get('TEST', dict()).get('NAME') or 'test_'
+        if os.getenv('BENCH_REFRESH_FORCE') == 'true' or os.path.basename(name).startswith(test_name):
+            return
+        raise CommandError('The database {} is not a test database, set BENCH_REFRESH_FORCE=true to run'.format(name))
+
+    def make_synthetic_users(self, count):
+        prefix = secrets.token_hex(4)
+        expires_at = datetime.now() + timedelta(hours=1)
+        samples = list()
+        for start in range(0, count, self.batch_size):
+            end = min(start + self.batch_size, count)
+            users = User.objects.bulk_create([User(nickname='bench_{}_{}'.format(prefix, i),
+                                                   openid='bench_{}_{}'.format(prefix, i),
+                                                   refresh_signature=make_refresh_signature(secrets.token_hex(16)))
+                                              for i in range(start, end)])
+            users = User.objects.filter(openid__in=[user.openid for user in users]).only('id', 'refresh_signature')
+            # the digest of session is the refresh_signature of its user, both lookups find the same user
+            sessions = [RefreshSession(user_id=user.id, jti=secrets.token_hex(24),
+                                       digest=user.refresh_signature, expires_at=expires_at)
+                        for user in users]
+            RefreshSession.objects.bulk_create(sessions)
+            samples.append(sessions[-1])
+        return samples
+
+    def bench(self, func, samples):
+        start = time.perf_counter()
+        for sample in samples:
+            func(sample)
+        return (time.perf_counter() - start) * 1000 / len(samples)
+
+    def handle(self, *args, **options):
+        self.check_database()
+        count = int(os.getenv('BENCH_REFRESH_USERS', 1000000))
+        logger.info("start to bench_refresh with {} synthetic users".format(count))
+        try:
+            with transaction.atomic():
+                samples = self.make_synthetic_users(count)[-self.sample_count:]
+                scan_cost = self.bench(
+                    lambda x: User.objects.filter(refresh_signature=x.digest).first(), samples)
+                index_cost = self.bench(
+                    lambda x: RefreshSession.objects.select_related('user').filter(jti=x.jti,
+                                                                                   user_id=x.user_id).first(),
+                    samples)
+                self.stdout.write('users: {}'.format(count))
+                self.stdout.write('refresh_signature scan: {:>12.4f} ms/request'.format(scan_cost))
+                self.stdout.write('refresh session index:  {:>12.4f} ms/request'.format(index_cost))
+                raise Rollback()
+        except Rollback:
+            logger.info("bench_refresh finished, the synthetic data has been rollback")
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/8 14:05
+# @Author  : Tom_zc
+# @FileName: bench_signature.py
+# @Software: PyCharm
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app_meeting_server.utils.my_refresh import MyAccessToken
+from app_meeting_server.utils.bench.signature import benchmark
+
+logger = logging.getLogger('log')
+
+
+class Command(BaseCommand):
+    def handle(self, *args, **options):
+        logger.info("start to bench_signature")
+        token = MyAccessToken()
+        token['user_id'] = 1
+        ret = benchmark(str(token), settings.SIGNATURE_SECRET)
+        for algorithm, cost in ret.items():
+            flag = '*' if algorithm == settings.SIGNATURE_BACKEND else ' '
+            self.stdout.write('{} {:<16}{:>12.4f} ms/request'.format(flag, algorithm, cost))
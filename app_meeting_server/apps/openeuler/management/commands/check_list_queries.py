@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/25 16:40
+# @Author  : Tom_zc
+# @FileName: check_list_queries.py
+# @Software: PyCharm
+import logging
+import secrets
+from types import SimpleNamespace
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, URLResolver
+
+from app_meeting_server.utils.bench.projection import count_list_queries
+from app_meeting_server.utils.projection import ProjectionMixin, get_projection
+from openeuler.models import User, Group, GroupUser, Meeting, Activity
+from openeuler.serializers import MeetingListSerializer, ActivitiesSerializer, ActivityRetrieveSerializer
+
+logger = logging.getLogger('log')
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    assert that the list serializers and the projected list views run the same number of queries for any page size,
+    the synthetic rows of the views are rollback at last.
+    """
+    sizes = (1, 10, 50)
+
+    def get_serializers(self):
+        yield MeetingListSerializer, lambda i: Meeting(id=i, mid=str(i), user_id=1, group_id=1)
+        yield ActivitiesSerializer, lambda i: Activity(id=i, user_id=1)
+        yield ActivityRetrieveSerializer, lambda i: Activity(id=i, user_id=1)
+
+    def get_projected_views(self, patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from self.get_projected_views(pattern.url_patterns)
+                continue
+            view_class = getattr(pattern.callback, 'cls', None)
+            if view_class is not None and issubclass(view_class, ProjectionMixin):
+                yield str(pattern.pattern), view_class
+
+    def make_synthetic_rows(self, model, user, count):
+        """the rows of the model which belong to the user, return False if the model is unknown"""
+        prefix = secrets.token_hex(4)
+        if model is GroupUser:
+            Group.objects.bulk_create([Group(group_name='check_{}_{}'.format(prefix, i)) for i in range(count)])
+            groups = Group.objects.filter(group_name__startswith='check_{}_'.format(prefix)).only('id')
+            GroupUser.objects.bulk_create([GroupUser(group_id=group.id, user_id=user.id) for group in groups])
+            return True
+        return False
+
+    def count_queries(self, serializer_class, items, user):
+        request = SimpleNamespace(user=user)
+        with CaptureQueriesContext(connection) as context:
+            serializer_class(items, many=True, context={'request': request}).data
+        return len(context)
+
+    def format_counts(self, name, counts):
+        return '{:<40}{}'.format(name, ', '.join('{} rows: {} queries'.format(size, count)
+                                                 for size, count in zip(self.sizes, counts)))
+
+    def check_serializers(self, failed):
+        for serializer_class, factory in self.get_serializers():
+            for user in (User(id=1), AnonymousUser()):
+                counts = [self.count_queries(serializer_class, [factory(i) for i in range(1, size + 1)], user)
+                          for size in self.sizes]
+                name = '{} {}'.format(serializer_class.__name__, 'anonymous' if user.is_anonymous else 'user')
+                self.stdout.write(self.format_counts(name, counts))
+                if len(set(counts)) != 1:
+                    failed.append(name)
+
+    def check_views(self, failed):
+        for route, view_class in self.get_projected_views(get_resolver().url_patterns):
+            serializer_class = view_class.serializer_class
+            projection = get_projection(serializer_class)
+            if not projection.select_related and not projection.prefetch_related:
+                # the projected columns never add queries, the serializer is checked by check_serializers
+                continue
+            user = User.objects.create(nickname='check', openid='check_{}'.format(secrets.token_hex(4)))
+            view = view_class()
+            view.kwargs = {'pk': user.id}
+            view.request = SimpleNamespace(user=user, query_params=dict())
+            if not self.make_synthetic_rows(serializer_class.Meta.model, user, max(self.sizes)):
+                failed.append('{} has no synthetic rows'.format(route))
+                continue
+            context = {'request': view.request}
+            unprojected = count_list_queries(serializer_class, view.get_queryset(), self.sizes, context)
+            counts = count_list_queries(serializer_class, view.filter_queryset(view.get_queryset()), self.sizes,
+                                        context)
+            self.stdout.write(self.format_counts('{} unprojected'.format(view_class.__name__), unprojected))
+            self.stdout.write(self.format_counts(view_class.__name__, counts))
+            if len(set(counts)) != 1:
+                failed.append(route)
+
+    def handle(self, *args, **options):
+        logger.info("start to check_list_queries")
+        failed = list()
+        self.check_serializers(failed)
+        try:
+            with transaction.atomic():
+                self.check_views(failed)
+                raise Rollback()
+        except Rollback:
+            logger.info("check_list_queries finished, the synthetic data has been rollback")
+        if failed:
+            raise CommandError('{} lists run queries per row: {}'.format(len(failed), ', '.join(failed)))
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/12 11:03
+# @Author  : Tom_zc
+# @FileName: check_permission_queries.py
+# @Software: PyCharm
+import itertools
+import logging
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, URLResolver
+
+logger = logging.getLogger('log')
+
+
+class Command(BaseCommand):
+    """assert that the permission classes of all views do not query the database"""
+
+    def get_views(self, patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from self.get_views(pattern.url_patterns)
+                continue
+            view_class = getattr(pattern.callback, 'cls', None)
+            if view_class is not None:
+                yield str(pattern.pattern), view_class
+
+    def get_users(self):
+        user_model = get_user_model()
+        for user_id, (level, activity_level) in enumerate(itertools.product((1, 2, 3), (1, 2, 3)), start=1):
+            yield user_model(id=user_id, level=level, activity_level=activity_level)
+
+    def handle(self, *args, **options):
+        logger.info("start to check_permission_queries")
+        failed = list()
+        count = 0
+        for route, view_class in self.get_views(get_resolver().url_patterns):
+            view = view_class()
+            for user in self.get_users():
+                request = SimpleNamespace(user=user, GET={'token': settings.QUERY_TOKEN})
+                with CaptureQueriesContext(connection) as context:
+                    for permission in view.get_permissions():
+                        permission.has_permission(request, view)
+                        permission.has_object_permission(request, view, None)
+                count += 1
+                if len(context) != 0:
+                    failed.append('{} {} queries:{}'.format(route, view_class.__name__, len(context)))
+        for msg in sorted(set(failed)):
+            self.stderr.write(msg)
+        if failed:
+            raise CommandError('{} permission checks queried the database'.format(len(failed)))
+        self.stdout.write('{} permission checks, 0 queries'.format(count))
@@ -11,7 +11,8 @@ from django.core.management.base import BaseCommand
 from app_meeting_server.utils.permissions import MeetigsAdminPermission, ActivityAdminPermission
 from openeuler.models import User, GroupUser, Meeting, Collect, Activity, ActivityCollect, Video, Record
 from django.db import transaction
-from app_meeting_server.utils.common import get_cur_date
+from app_meeting_server.utils.common import get_cur_date, clean_refresh_session
+from app_meeting_server.utils.session_store import token_session_store
 
 logger = logging.getLogger('log')
 
@@ -106,3 +107,16 @@ class Command(BaseCommand):
             self.clear_expired_activity_data()
         except Exception as e:
             logger.error("clear_expired_activity_data {}".format(e))
+        logger.info("5.start to check clean_refresh_session")
+        try:
+            ret = clean_refresh_session()
+            logger.info("delete expired refresh session and result is:{}".format(str(ret)))
+        except Exception as e:
+            logger.error("clean_refresh_session {}".format(e))
+        logger.info("6.start to check sweep token session")
+        try:
+            if token_session_store.enabled:
+                ret = token_session_store.sweep()
+                logger.info("sweep expired token session and result is:{}".format(str(ret)))
+        except Exception as e:
+            logger.error("sweep token session {}".format(e))
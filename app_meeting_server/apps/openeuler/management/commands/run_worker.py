@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/18 14:36
+# @Author  : Tom_zc
+# @FileName: run_worker.py
+# @Software: PyCharm
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app_meeting_server.utils.job_queue import JobWorker
+from openeuler import jobs  # noqa: register the handlers of jobs
+
+logger = logging.getLogger('log')
+
+
+class Command(BaseCommand):
+    def handle(self, *args, **options):
+        logger.info("start to run_worker")
+        worker = JobWorker(concurrency=settings.JOB_WORKER_CONCURRENCY,
+                           visibility_timeout=settings.JOB_VISIBILITY_TIMEOUT,
+                           poll_interval=settings.JOB_POLL_INTERVAL,
+                           retention_days=settings.JOB_RETENTION_DAYS)
+        worker.run()
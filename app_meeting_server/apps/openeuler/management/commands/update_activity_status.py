@@ -8,7 +8,8 @@ logger = logging.getLogger('log')
 
 def update_activity_status():
     logger.info('start to update activity status')
-    activities = Activity.objects.filter(is_delete=0, status__in=[3, 4, 5])
+    activities = Activity.objects.filter(is_delete=0, status__in=[3, 4, 5]).select_related('user') \
+        .only('id', 'date', 'status', 'title', 'user', 'user__gitee_name')
     today = datetime.date.today().strftime('%Y-%m-%d')
     for activity in activities:
         if activity.date == today and activity.status == 3:
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.23 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openeuler', '0007_refreshsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=64, verbose_name='任务名称')),
+                ('payload', models.TextField(default='{}', verbose_name='任务参数')),
+                ('status', models.SmallIntegerField(choices=[(0, '待执行'), (1, '执行中'), (2, '已完成'), (3, '死信')], default=0, verbose_name='状态')),
+                ('attempts', models.SmallIntegerField(default=0, verbose_name='执行次数')),
+                ('max_attempts', models.SmallIntegerField(default=5, verbose_name='最大执行次数')),
+                ('available_at', models.DateTimeField(verbose_name='可执行时间')),
+                ('locked_by', models.CharField(blank=True, max_length=64, null=True, verbose_name='执行者')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='错误信息')),
+                ('cost', models.FloatField(blank=True, null=True, verbose_name='耗时')),
+                ('create_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('update_time', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': 'meetings_job',
+                'verbose_name_plural': 'meetings_job',
+                'db_table': 'meetings_job',
+                'index_together': {('status', 'available_at')},
+            },
+        ),
+    ]
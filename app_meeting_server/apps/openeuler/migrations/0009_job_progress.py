@@ -0,0 +1,18 @@
+# Generated by Django 3.2.23 on 2026-10-18 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openeuler', '0008_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='progress',
+            field=models.TextField(blank=True, null=True, verbose_name='阶段进度'),
+        ),
+    ]
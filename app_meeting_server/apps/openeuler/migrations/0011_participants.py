@@ -0,0 +1,33 @@
+# Generated by Django 3.2.23 on 2026-10-18 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openeuler', '0010_reminder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Participants',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mid', models.CharField(max_length=20, unique=True, verbose_name='会议id')),
+                ('content', models.TextField(verbose_name='参会者信息')),
+                ('create_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('update_time', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': 'meetings_participants',
+                'verbose_name_plural': 'meetings_participants',
+                'db_table': 'meetings_participants',
+            },
+        ),
+        migrations.AlterField(
+            model_name='meeting',
+            name='mid',
+            field=models.CharField(db_index=True, max_length=20, verbose_name='会议id'),
+        ),
+    ]
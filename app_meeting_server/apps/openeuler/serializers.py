@@ -1,3 +1,4 @@
+import json
 import logging
 import traceback
 from rest_framework import serializers
@@ -7,9 +8,12 @@ from app_meeting_server.utils.check_params import check_group_id, check_user_ids
 from app_meeting_server.utils.common import get_uuid, encrypt_openid, refresh_token_and_refresh_token, get_cur_date
 from app_meeting_server.utils.permissions import MeetigsAdminPermission
 from app_meeting_server.utils.ret_code import RetCode
+from app_meeting_server.utils.token_cache import token_cache
 from app_meeting_server.utils.wx_apis import get_openid
 from app_meeting_server.utils.ret_api import MyValidationError
-from openeuler.models import Collect, Group, User, Meeting, GroupUser, Record, Activity, ActivityCollect
+from app_meeting_server.utils.list_prefetch import PrefetchListSerializer, PrefetchSerializerMixin, \
+    get_collection_map, get_request_user_id
+from openeuler.models import Collect, Group, User, Meeting, GroupUser, Record, Activity, ActivityCollect, Job
 from django.db import transaction
 from django.conf import settings
 
@@ -99,6 +103,7 @@ class GroupUserAddSerializer(ModelSerializer):
                 for user in users:
                     group_user = GroupUser.objects.create(group_id=group_id.id, user_id=int(user.id))
                     User.objects.filter(id=int(user.id), level=1).update(level=2)
+                    token_cache.invalidate_user(user.id)
                     result_list.append(group_user)
             return result_list
         except Exception as e:
@@ -146,7 +151,17 @@ class MeetingSerializer(ModelSerializer):
         }
 
 
-class MeetingListSerializer(ModelSerializer):
+def get_video_url_map(mids):
+    """{mid: url} of the bilibili records in one query, the first record of the meeting is kept"""
+    ret = dict()
+    if not mids:
+        return ret
+    for mid, url in Record.objects.filter(mid__in=mids, platform='bilibili').order_by('id').values_list('mid', 'url'):
+        ret.setdefault(mid, url)
+    return ret
+
+
+class MeetingListSerializer(PrefetchSerializerMixin, ModelSerializer):
     collection_id = serializers.SerializerMethodField()
     video_url = serializers.SerializerMethodField()
 
@@ -154,21 +169,21 @@ class MeetingListSerializer(ModelSerializer):
         model = Meeting
         fields = ['id', 'collection_id', 'user_id', 'group_id', 'topic', 'sponsor', 'group_name', 'date', 'start',
                   'end', 'agenda', 'etherpad', 'mid', 'join_url', 'video_url', 'mplatform']
+        list_serializer_class = PrefetchListSerializer
+        method_sources = {'collection_id': ['id'], 'video_url': ['mid']}
+
+    def get_prefetched(self, meetings):
+        user_id = get_request_user_id(self.context)
+        return {
+            'collection_id': get_collection_map(Collect, 'meeting_id', user_id, [meeting.id for meeting in meetings]),
+            'video_url': get_video_url_map([meeting.mid for meeting in meetings]),
+        }
 
     def get_collection_id(self, obj):
-        user = None
-        request = self.context.get("request")
-        if request and hasattr(request, "user"):
-            user = request.user
-        try:
-            return Collect.objects.filter(user_id=user.id, meeting_id=obj.id).values()[0]['id']
-        except IndexError:
-            return
+        return self.get_prefetched_value('collection_id', obj, obj.id)
 
     def get_video_url(self, obj):
-        video_url = Record.objects.filter(mid=obj.mid, platform='bilibili').values()[0]['url'] if Record.objects.filter(
-            mid=obj.mid, platform='bilibili') else ''
-        return video_url
+        return self.get_prefetched_value('video_url', obj, obj.mid, '')
 
 
 class UsersInGroupSerializer(ModelSerializer):
@@ -226,7 +241,7 @@ class CollectSerializer(ModelSerializer):
 class AllMeetingsSerializer(ModelSerializer):
     class Meta:
         model = Meeting
-        fields = '__all__'
+        exclude = ['meeting_date', 'start_time', 'end_time']
 
 
 class SponsorSerializer(ModelSerializer):
@@ -247,7 +262,7 @@ class ActivitySerializer(ModelSerializer):
         fields = ['id', 'title', 'activity_type', 'poster', 'synopsis']
 
 
-class ActivitiesSerializer(ModelSerializer):
+class ActivitiesSerializer(PrefetchSerializerMixin, ModelSerializer):
     collection_id = serializers.SerializerMethodField()
 
     class Meta:
@@ -255,16 +270,18 @@ class ActivitiesSerializer(ModelSerializer):
         fields = ['id', 'collection_id', 'title', 'date', 'activity_type', 'synopsis', 'live_address',
                   'address', 'detail_address', 'longitude', 'latitude', 'schedules', 'poster', 'status', 'user',
                   'start', 'end', 'join_url', 'replay_url', 'register_url']
+        list_serializer_class = PrefetchListSerializer
+        method_sources = {'collection_id': ['id']}
+
+    def get_prefetched(self, activities):
+        user_id = get_request_user_id(self.context)
+        return {
+            'collection_id': get_collection_map(ActivityCollect, 'activity_id', user_id,
+                                                [activity.id for activity in activities]),
+        }
 
     def get_collection_id(self, obj):
-        user = None
-        request = self.context.get("request")
-        if request and hasattr(request, "user"):
-            user = request.user
-        try:
-            return ActivityCollect.objects.filter(user_id=user.id, activity_id=obj.id).values()[0]['id']
-        except IndexError:
-            return
+        return self.get_prefetched_value('collection_id', obj, obj.id)
 
 
 class ActivityRetrieveSerializer(ActivitiesSerializer):
@@ -273,6 +290,7 @@ class ActivityRetrieveSerializer(ActivitiesSerializer):
         fields = ['id', 'collection_id', 'title', 'date', 'activity_type', 'synopsis', 'live_address',
                   'address', 'detail_address', 'longitude', 'latitude', 'schedules', 'poster', 'status', 'user',
                   'wx_code', 'start', 'end', 'join_url', 'replay_url', 'register_url']
+        list_serializer_class = PrefetchListSerializer
 
 
 class ActivityUpdateSerializer(ModelSerializer):
@@ -297,3 +315,14 @@ class ApplicantInfoSerializer(ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'gitee_name']
+
+
+class JobSerializer(ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = ['id', 'name', 'status', 'attempts', 'progress', 'create_time', 'update_time']
+
+    def get_progress(self, obj):
+        return json.loads(obj.progress or '{}')
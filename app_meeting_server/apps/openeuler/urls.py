@@ -9,7 +9,7 @@ from openeuler.views import LoginView, GroupsView, MeetingView, MeetingsView, Us
     DraftPublishView, SponsorActivitiesPublishingView, ActivityCollectView, ActivityCollectDelView, \
     MyActivityCollectionsView, CountActivitiesView, MyCountsView, MeetingsRecentlyView, \
     AgreePrivacyPolicyView, RevokeAgreementView, LogoutView, LogoffView, PingView, MeetingsGroupView, \
-    RefreshView, MeetingActivityDateView, MeetingActivityDataView
+    RefreshView, MeetingActivityDateView, MeetingActivityDataView, JobView
 
 urlpatterns = [
     # common
@@ -43,6 +43,7 @@ urlpatterns = [
     path('meetings_daily/', MeetingsDailyView.as_view()),               # 查询当日会议详情
     path('meetings_recently/', MeetingsRecentlyView.as_view()),         # 查询近期的会议
     path('meeting/<int:mid>/', MeetingDelView.as_view()),               # 删除会议
+    path('job/<int:pk>/', JobView.as_view()),                           # 查询后台任务状态
     path('meetings/<int:pk>/', MeetingView.as_view()),                  # 查询单个会议详情
     path('mymeetings/', MyMeetingsView.as_view()),                      # 查询我创建的会议
     path('collect/', CollectView.as_view()),                            # 添加收藏
@@ -1,4 +1,6 @@
+from django.conf import settings
 from openeuler.models import Meeting
+from app_meeting_server.utils.participants_store import ParticipantsStore
 from app_meeting_server.utils import zoom_apis, welink_apis, tencent_apis
 from openeuler.utils import tencent_apis as ota
 from openeuler.utils import welink_apis as owa
@@ -41,3 +43,8 @@ def getParticipants(mid):
         status, res = ota.getParticipants(mid)
     return status, res
 
+
+participants_store = ParticipantsStore(getParticipants,
+                                       settle_minutes=settings.PARTICIPANTS_SETTLE_MINUTES,
+                                       maxsize=settings.PARTICIPANTS_CACHE_MAXSIZE,
+                                       ttl=settings.PARTICIPANTS_CACHE_TTL)
@@ -1,7 +1,4 @@
-import datetime
-import icalendar
 import logging
-import pytz
 import smtplib
 from django.conf import settings
 from email import encoders
@@ -9,10 +6,13 @@ from email.mime.base import MIMEBase
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
-from app_meeting_server.utils.file_stream import read_content
+from app_meeting_server.utils.email_template import template_registry, get_utc_time, IcsTemplate, \
+    TEMPLATE_CANCEL_EMAIL
+from app_meeting_server.utils.mail_transport import get_mail_transport
 from openeuler.models import Meeting
 
 logger = logging.getLogger('log')
+cancel_ics = IcsTemplate('-//openeuler conference calendar', 'CANCEL', sequence=1)
 
 
 def sendmail(mid):
@@ -39,37 +39,17 @@ def sendmail(mid):
     msg = MIMEMultipart()
 
     # 添加邮件主体
-    body = read_content(settings.TEMPLATE_CANCEL_EMAIL)
-    body_of_email = body.replace('{{platform}}', platform). \
-        replace('{{start_time}}', start_time). \
-        replace('{{sig_name}}', sig_name)
+    body_of_email = template_registry.render(TEMPLATE_CANCEL_EMAIL, platform=platform, start_time=start_time,
+                                             sig_name=sig_name)
     content = MIMEText(body_of_email, 'plain', 'utf-8')
     msg.attach(content)
 
     # 取消日历
-    dt_start = (datetime.datetime.strptime(date + ' ' + start, '%Y-%m-%d %H:%M') - datetime.timedelta(hours=8)). \
-        replace(tzinfo=pytz.utc)
-    dt_end = (datetime.datetime.strptime(date + ' ' + end, '%Y-%m-%d %H:%M') - datetime.timedelta(hours=8)). \
-        replace(tzinfo=pytz.utc)
-
-    cal = icalendar.Calendar()
-    cal.add('prodid', '-//openeuler conference calendar')
-    cal.add('version', '2.0')
-    cal.add('method', 'CANCEL')
-
-    event = icalendar.Event()
-    event.add('attendee', ','.join(sorted(list(set(toaddrs_list)))))
-    event.add('summary', topic)
-    event.add('dtstart', dt_start)
-    event.add('dtend', dt_end)
-    event.add('dtstamp', dt_start)
-    event.add('uid', platform + mid)
-    event.add('sequence', 1)
-
-    cal.add_component(event)
+    ics = cancel_ics.render(','.join(sorted(list(set(toaddrs_list)))), topic, get_utc_time(date, start),
+                            get_utc_time(date, end), platform + mid)
 
     part = MIMEBase('text', 'calendar', method='CANCEL')
-    part.set_payload(cal.to_ical())
+    part.set_payload(ics)
     encoders.encode_base64(part)
     part.add_header('Content-class', 'urn:content-classes:calendarmessage')
 
@@ -83,12 +63,8 @@ def sendmail(mid):
     # 登录服务器发送邮件
     try:
         sender = settings.SMTP_SERVER_SENDER
-        server = smtplib.SMTP(settings.SMTP_SERVER_HOST, settings.SMTP_SERVER_PORT)
-        server.ehlo()
-        server.starttls()
-        server.login(settings.SMTP_SERVER_USER, settings.SMTP_SERVER_PASS)
-        server.sendmail(sender, toaddrs_list, msg.as_string())
-        server.quit()
+        get_mail_transport().send(sender, toaddrs_list, msg.as_string())
         logger.info('send cancel email success: {}'.format(topic))
     except smtplib.SMTPException as e:
         logger.error(e)
+        raise
@@ -1,8 +1,7 @@
 import json
 import logging
-import requests
 from openeuler.models import Meeting
-from app_meeting_server.utils.tencent_apis import get_signature, get_url
+from app_meeting_server.utils.tencent_apis import client, get_signature, get_url
 
 logger = logging.getLogger('log')
 
@@ -19,7 +18,7 @@ def cancelMeeting(mid):
     uri = '/v1/meetings/{}/cancel'.format(mmid)
     url = get_url(uri)
     signature, headers = get_signature('POST', uri, payload)
-    r = requests.post(url, headers=headers, data=payload)
+    r = client.post(url, headers=headers, data=payload)
     if r.status_code != 200:
         logger.error('Fail to cancel meeting {}'.format(mid))
         logger.error(r.json())
@@ -35,5 +34,5 @@ def getParticipants(mid):
     uri = '/v1/meetings/{}/participants?userid={}'.format(mmid, host_id)
     url = get_url(uri)
     signature, headers = get_signature('GET', uri, "")
-    r = requests.get(url, headers=headers)
+    r = client.get(url, headers=headers)
     return r.status_code, r.json()
\ No newline at end of file
@@ -1,7 +1,6 @@
 import datetime
 import logging
 import json
-import secrets
 import time
 from django.conf import settings
 from django.db import transaction
@@ -13,7 +12,7 @@ from rest_framework.mixins import ListModelMixin, CreateModelMixin, RetrieveMode
     UpdateModelMixin
 from app_meeting_server.utils.my_pagination import MyPagination
 from openeuler.models import User, Group, Meeting, GroupUser, Collect, Video, Record, \
-    Activity, ActivityCollect
+    Activity, ActivityCollect, Job
 from app_meeting_server.utils.permissions import MaintainerPermission, MeetigsAdminPermission, \
     ActivityAdminPermission, SponsorPermission, QueryPermission, AdminPermission, MaintainerAndAdminPermission
 from openeuler.serializers import LoginSerializer, GroupsSerializer, MeetingSerializer, \
@@ -21,21 +20,26 @@ from openeuler.serializers import LoginSerializer, GroupsSerializer, MeetingSeri
     UserGroupSerializer, MeetingListSerializer, GroupUserDelSerializer, UserInfoSerializer, \
     MeetingsDataSerializer, AllMeetingsSerializer, CollectSerializer, SponsorSerializer, ActivitySerializer, \
     ActivitiesSerializer, ActivityDraftUpdateSerializer, ActivityUpdateSerializer, \
-    ActivityCollectSerializer, ActivityRetrieveSerializer
-from openeuler.utils.send_email import sendmail
+    ActivityCollectSerializer, ActivityRetrieveSerializer, JobSerializer
 from rest_framework import permissions
-from openeuler.utils import gene_wx_code, drivers, send_cancel_email
+from openeuler.utils import gene_wx_code, drivers
 from app_meeting_server.utils.auth import CustomAuthentication, CustomAuthenticationWithoutPolicyAgreen
-from app_meeting_server.utils import wx_apis
 from app_meeting_server.utils.operation_log import LoggerContext, OperationLogModule, OperationLogDesc, \
     OperationLogType, PolicyLoggerContext
-from app_meeting_server.utils.common import get_cur_date, decrypt_openid, clear_token, refresh_token_and_refresh_token, \
-    start_thread, get_version_params
+from app_meeting_server.utils.common import get_cur_date, clear_token, refresh_token_and_refresh_token, \
+    get_version_params
 from app_meeting_server.utils.ret_api import MyValidationError, ret_json, ret_access_json
 from app_meeting_server.utils.check_params import check_group_id_and_user_ids, \
     check_user_ids, check_activity_params, check_meetings_params, check_schedules_string, check_date, check_type, \
     check_refresh_token, check_int, check_gitee_name
 from app_meeting_server.utils.ret_code import RetCode
+from app_meeting_server.utils.token_cache import token_cache
+from app_meeting_server.utils.job_queue import enqueue
+from app_meeting_server.utils.reminder import record_meeting_change, MEETING_CREATED, MEETING_CANCELED
+from openeuler.jobs import SEND_MEETING_EMAIL, CANCEL_MEETING, CANCEL_MEETING_STAGES, FETCH_PARTICIPANTS
+from app_meeting_server.utils.participants_store import get_cache_age
+from app_meeting_server.utils.host_reservation import host_reserver
+from app_meeting_server.utils.projection import ProjectionMixin
 from rest_framework_simplejwt.views import TokenRefreshView
 
 logger = logging.getLogger('log')
@@ -164,6 +168,7 @@ class AgreePrivacyPolicyView(GenericAPIView, UpdateModelMixin):
                                                                 agree_privacy_policy_time=cur_date,
                                                                 agree_privacy_policy_version=policy_version,
                                                                 agree_privacy_app_policy_version=app_policy_version)
+            token_cache.invalidate_user(self.request.user.id)
             policy_log_context.result = True
         resp = ret_access_json(request.user, msg="Agree to privacy statement")
         return resp
@@ -382,6 +387,7 @@ class SponsorAddView(GenericAPIView, CreateModelMixin):
                                                                                             match_queryset))
             raise MyValidationError(RetCode.INFORMATION_CHANGE_ERROR)
         User.objects.filter(id__in=new_user_ids, activity_level=1, is_delete=0).update(activity_level=2)
+        token_cache.invalidate_users(new_user_ids)
         return ret_access_json(request.user)
 
 
@@ -409,6 +415,7 @@ class SponsorDelView(GenericAPIView, CreateModelMixin):
                                                                                             match_queryset))
             raise MyValidationError(RetCode.INFORMATION_CHANGE_ERROR)
         User.objects.filter(id__in=new_user_ids, activity_level=2, is_delete=0).update(activity_level=1)
+        token_cache.invalidate_users(new_user_ids)
         return ret_access_json(request.user)
 
 
@@ -433,10 +440,11 @@ class UserView(GenericAPIView, UpdateModelMixin):
         if gitee_name:
             check_gitee_name(gitee_name)
         super(UserView, self).update(request, *args, **kwargs)
+        token_cache.invalidate_user(kwargs.get('pk'))
         return ret_access_json(request.user)
 
 
-class UserGroupView(GenericAPIView, ListModelMixin):
+class UserGroupView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """查询该用户的SIG组以及该组的etherpad"""
     serializer_class = UserGroupSerializer
     queryset = GroupUser.objects.all()
@@ -498,7 +506,7 @@ class MyCountsView(GenericAPIView, ListModelMixin):
 
 
 # ------------------------------meeting view------------------------------
-class MeetingsWeeklyView(GenericAPIView, ListModelMixin):
+class MeetingsWeeklyView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """查询前后一周的所有会议"""
     serializer_class = MeetingListSerializer
     queryset = Meeting.objects.filter(is_delete=0)
@@ -511,8 +519,9 @@ class MeetingsWeeklyView(GenericAPIView, ListModelMixin):
         if group_name:
             self.queryset = self.queryset.filter(group__group_name=group_name)
         self.queryset = self.queryset.filter((Q(
-            date__gte=str(datetime.datetime.now() - datetime.timedelta(days=7))[:10]) & Q(
-            date__lte=str(datetime.datetime.now() + datetime.timedelta(days=7))[:10]))).order_by('-date', 'start')
+            meeting_date__gte=str(datetime.datetime.now() - datetime.timedelta(days=7))[:10]) & Q(
+            meeting_date__lte=str(datetime.datetime.now() + datetime.timedelta(days=7))[:10]))). \
+            order_by('-date', 'start')
         return self.list(request, *args, **kwargs)
 
 
@@ -522,32 +531,32 @@ class MeetingsGroupView(GenericAPIView, ListModelMixin):
 
     def get(self, request, *args, **kwargs):
         meeting_ids = Meeting.objects.filter(is_delete=0).filter((Q(
-            date__gte=str(datetime.datetime.now() - datetime.timedelta(days=7))[:10]) & Q(
-            date__lte=str(datetime.datetime.now() + datetime.timedelta(days=7))[:10]))).values_list("group_id",
-                                                                                                    flat=True)
+            meeting_date__gte=str(datetime.datetime.now() - datetime.timedelta(days=7))[:10]) & Q(
+            meeting_date__lte=str(datetime.datetime.now() + datetime.timedelta(days=7))[:10]))).values_list(
+            "group_id", flat=True)
         self.queryset = self.queryset.filter(id__in=meeting_ids).order_by('group_name')
         return self.list(request, *args, **kwargs)
 
 
-class MeetingsDailyView(GenericAPIView, ListModelMixin):
+class MeetingsDailyView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """查询本日的所有会议"""
     serializer_class = MeetingListSerializer
     queryset = Meeting.objects.filter(is_delete=0)
     pagination_class = MyPagination
 
     def get(self, request, *args, **kwargs):
-        self.queryset = self.queryset.filter(date=str(datetime.datetime.now())[:10]).order_by('start')
+        self.queryset = self.queryset.filter(meeting_date=str(datetime.datetime.now())[:10]).order_by('start')
         return self.list(request, *args, **kwargs)
 
 
-class MeetingsRecentlyView(GenericAPIView, ListModelMixin):
+class MeetingsRecentlyView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """查询最近的会议"""
     serializer_class = MeetingListSerializer
     queryset = Meeting.objects.filter(is_delete=0)
     pagination_class = MyPagination
 
     def get(self, request, *args, **kwargs):
-        self.queryset = self.queryset.filter(date__gte=datetime.datetime.now().strftime('%Y-%m-%d')). \
+        self.queryset = self.queryset.filter(meeting_date__gte=datetime.datetime.now().strftime('%Y-%m-%d')). \
             order_by('date', 'start')
         return self.list(request, *args, **kwargs)
 
@@ -595,59 +604,50 @@ class MeetingDelView(GenericAPIView, DestroyModelMixin):
         if int((start_date - cur_date).total_seconds()) < 1 * 60 * 60:
             raise MyValidationError(RetCode.STATUS_MEETING_CANNNOT_BE_DELETE)
 
-        # 删除会议
-        drivers.cancelMeeting(mid)
-
-        # 会议作软删除
-        Meeting.objects.filter(mid=mid).update(is_delete=1)
-        meeting_id = meeting.id
-        mid = meeting.mid
-        logger.info('{} has canceled the meeting which mid was {}'.format(user_id, mid))
-
-        # 发送删除通知邮件
-        send_cancel_email.sendmail(mid)
-
-        # 发送会议取消通知
-        collections = Collect.objects.filter(meeting_id=meeting_id)
-        if collections:
-            access_token = wx_apis.get_token()
-            topic = meeting.topic
-            date = meeting.date
-            start_time = meeting.start
-            time = date + ' ' + start_time
-            for collection in collections:
-                user_id = collection.user_id
-                user = User.objects.get(id=user_id)
-                nickname = user.nickname
-                encrypt_openid = user.openid
-                openid = decrypt_openid(encrypt_openid)
-                content = wx_apis.get_remove_template(openid, topic, time, mid)
-                r = wx_apis.send_subscription(content, access_token)
-                if r.status_code != 200:
-                    logger.error('status code: {}'.format(r.status_code))
-                    logger.error('content: {}'.format(r.json()))
-                else:
-                    if r.json()['errcode'] != 0:
-                        logger.warning('Error Code: {}'.format(r.json()['errcode']))
-                        logger.warning('Error Msg: {}'.format(r.json()['errmsg']))
-                        logger.warning('receiver: {}'.format(nickname))
-                    else:
-                        logger.info('meeting {} cancel message sent to {}.'.format(mid, nickname))
-                # 删除收藏
-                collection.delete()
-        return ret_access_json(request.user)
+        # 先取消平台的会议, 失败时拒绝请求, 会议和主持人的预定保持不变
+        status = drivers.cancelMeeting(mid)
+        if status not in [200, 204]:
+            logger.error('Failed to cancel meeting {} on platform, and code is {}'.format(mid, status))
+            raise MyValidationError(RetCode.STATUS_FAILED)
+        # 会议作软删除, 取消会议的后续流程在后台任务中执行
+        with transaction.atomic():
+            Meeting.objects.filter(mid=mid).update(is_delete=1)
+            host_reserver.release_meeting(mid)
+            record_meeting_change(meeting.id, MEETING_CANCELED)
+            job = enqueue(CANCEL_MEETING, {'meeting_id': meeting.id, 'user_id': user_id}, stages=CANCEL_MEETING_STAGES)
+        logger.info('{} has canceled the meeting which mid was {}, job: {}'.format(user_id, mid, job.id))
+        return ret_access_json(request.user, job_id=job.id)
+
+
+class JobView(GenericAPIView, RetrieveModelMixin):
+    """查询后台任务状态"""
+    serializer_class = JobSerializer
+    queryset = Job.objects.all()
+    authentication_classes = (CustomAuthentication,)
+    permission_classes = (MaintainerAndAdminPermission,)
+
+    def get(self, request, *args, **kwargs):
+        job = self.get_object()
+        if json.loads(job.payload).get('user_id') != request.user.id and \
+                request.user.level != MeetigsAdminPermission.level:
+            logger.error('User {} has no access to job {}'.format(request.user.id, job.id))
+            raise MyValidationError(RetCode.STATUS_USER_HAS_NO_PERMISSIONS)
+        return ret_access_json(request.user, data=self.get_serializer(job).data)
 
 
 class SigMeetingsDataView(GenericAPIView, ListModelMixin):
     """网页SIG组日历数据"""
     serializer_class = MeetingsDataSerializer
     queryset = Meeting.objects.filter(is_delete=0).order_by('date', 'start')
+    data_fields = ('id', 'date', 'group_name', 'start', 'end', 'topic', 'sponsor', 'agenda', 'join_url', 'mid',
+                   'etherpad', 'mplatform')
 
     def get(self, request, *args, **kwargs):
         group_name = kwargs.get('gn')
         queryset = self.filter_queryset(self.get_queryset()).filter(group_name=group_name).filter((Q(
-            date__gte=str(datetime.datetime.now() - datetime.timedelta(days=180))[:10]) & Q(
-            date__lte=str(datetime.datetime.now() + datetime.timedelta(days=30))[:10]))).values()
+            meeting_date__gte=str(datetime.datetime.now() - datetime.timedelta(days=180))[:10]) & Q(
+            meeting_date__lte=str(datetime.datetime.now() + datetime.timedelta(days=30))[:10]))).values(
+            *self.data_fields)
         my_paginate = MyPagination()
         queryset = my_paginate.paginate_queryset(queryset, request)
         table_data = []
@@ -655,11 +655,9 @@ class SigMeetingsDataView(GenericAPIView, ListModelMixin):
         for query in queryset:
             date_list.append(query.get('date'))
         date_list = sorted(list(set(date_list)))
-        records = Record.objects.filter(platform='bilibili', url__isnull=False).values()
-        record_dict = {}
-        for record in records:
-            if record['platform'] == 'bilibili' and record['url']:
-                record_dict[record['mid']] = record['url']
+        records = Record.objects.filter(platform='bilibili', url__isnull=False,
+                                        mid__in=[meeting['mid'] for meeting in queryset]).values_list('mid', 'url')
+        record_dict = {mid: url for mid, url in records if url}
         for date in date_list:
             time_data = []
             for meeting in queryset:
@@ -732,18 +730,23 @@ class MeetingsView(GenericAPIView, CreateModelMixin):
             (datetime.datetime.strptime(end, '%H:%M') + datetime.timedelta(minutes=30)),
             '%H:%M')
         host_ids = list(host_dict.keys())
-        meetings = Meeting.objects.filter(is_delete=0, date=date, end__gt=start_search, start__lt=end_search,
-                                          mplatform=platform).values()
-        unavailable_host_ids = [meeting['host_id'] for meeting in meetings]
+        unavailable_host_ids = Meeting.objects.filter(is_delete=0, meeting_date=date, end_time__gt=start_search,
+                                                      start_time__lt=end_search, mplatform=platform) \
+            .values_list('host_id', flat=True)
         available_host_id = list(set(host_ids) - set(unavailable_host_ids))
-        if len(available_host_id) == 0:
+        # 2.从available_host_id中随机预定一个host_id的时间片, 调用平台失败时释放
+        reservation = host_reserver.reserve(platform, available_host_id, date, start, end)
+        if reservation is None:
             logger.warning('No available host:{} yet'.format(platform))
             raise MyValidationError(RetCode.STATUS_MEETING_NO_AVAILABLE_HOST)
-        # 2.从available_host_id中随机生成一个host_id,并在host_dict中取出
-        host_id = secrets.choice(available_host_id)
-        host = host_dict[host_id]
-        status, content = drivers.createMeeting(platform, date, start, end, topic, host, record)
+        host = host_dict[reservation.host_id]
+        try:
+            status, content = drivers.createMeeting(platform, date, start, end, topic, host, record)
+        except Exception:
+            reservation.release()
+            raise
         if status not in [200, 201]:
+            reservation.release()
             logger.error("Failed to create meeting, and code is {}".format(str(status)))
             raise MyValidationError(RetCode.STATUS_MEETING_FAILED_CREATE)
         mid = content['mid']
@@ -752,53 +755,56 @@ class MeetingsView(GenericAPIView, CreateModelMixin):
         join_url = content['join_url']
         host_id = content['host_id']
         timezone = content['timezone'] if 'timezone' in content else 'Asia/Shanghai'
-        # 3.数据库生成数据
-        Meeting.objects.create(
-            mid=mid,
-            mmid=mmid,
-            topic=topic,
-            community=community,
-            sponsor=sponsor,
-            group_name=group_name,
-            date=date,
-            start=start,
-            end=end,
-            etherpad=etherpad,
-            emaillist=emaillist,
-            timezone=timezone,
-            agenda=summary,
-            host_id=host_id,
-            join_url=join_url,
-            start_url=start_url,
-            user_id=user_id,
-            group_id=group_id,
-            mplatform=platform
-        )
+        # 3.数据库生成数据, 与发送email的任务在同一事务中提交
+        with transaction.atomic():
+            meeting = Meeting.objects.create(
+                mid=mid,
+                mmid=mmid,
+                topic=topic,
+                community=community,
+                sponsor=sponsor,
+                group_name=group_name,
+                date=date,
+                start=start,
+                end=end,
+                etherpad=etherpad,
+                emaillist=emaillist,
+                timezone=timezone,
+                agenda=summary,
+                host_id=host_id,
+                join_url=join_url,
+                start_url=start_url,
+                user_id=user_id,
+                group_id=group_id,
+                mplatform=platform
+            )
+            reservation.bind(mid)
+            # 4.发送email
+            m = {
+                'mid': mid,
+                'topic': topic,
+                'date': date,
+                'start': start,
+                'end': end,
+                'join_url': join_url,
+                'sig_name': group_name,
+                'emaillist': emaillist,
+                'platform': platform,
+                'etherpad': etherpad,
+                'agenda': summary
+            }
+            enqueue(SEND_MEETING_EMAIL, {'meeting': m, 'record': record})
+            record_meeting_change(meeting.id, MEETING_CREATED)
+            enqueue(FETCH_PARTICIPANTS, {'mid': mid}, delay=drivers.participants_store.get_delay(date, end))
         logger.info('created a {} meeting which mid is {}.'.format(platform, mid))
         logger.info('meeting info: {},{}-{},{}'.format(date, start, end, topic))
-        # 4.发送email
-        m = {
-            'mid': mid,
-            'topic': topic,
-            'date': date,
-            'start': start,
-            'end': end,
-            'join_url': join_url,
-            'sig_name': group_name,
-            'emaillist': emaillist,
-            'platform': platform,
-            'etherpad': etherpad,
-            'agenda': summary
-        }
-        start_thread(sendmail, m, record)
-        meeting = Meeting.objects.get(mid=mid)
         t3 = time.time()
         print('total waste: {}'.format(t3 - t1))
         resp = ret_access_json(request.user, id=meeting.id)
         return resp
 
 
-class MyMeetingsView(GenericAPIView, ListModelMixin):
+class MyMeetingsView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """查询我创建的所有会议"""
     serializer_class = MeetingListSerializer
     queryset = Meeting.objects.all().filter(is_delete=0)
@@ -817,7 +823,7 @@ class MyMeetingsView(GenericAPIView, ListModelMixin):
         return queryset
 
 
-class AllMeetingsView(GenericAPIView, ListModelMixin):
+class AllMeetingsView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """列出所有会议"""
     serializer_class = AllMeetingsSerializer
     queryset = Meeting.objects.all().order_by('-date', 'start')
@@ -897,7 +903,7 @@ class CollectDelView(GenericAPIView, DestroyModelMixin):
         return queryset
 
 
-class MyCollectionsView(GenericAPIView, ListModelMixin):
+class MyCollectionsView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """我收藏的会议(列表)"""
     serializer_class = MeetingListSerializer
     queryset = Meeting.objects.all()
@@ -921,12 +927,14 @@ class ParticipantsView(GenericAPIView, RetrieveModelMixin):
 
     def get(self, request, *args, **kwargs):
         mid = kwargs.get('mid')
-        if mid not in Meeting.objects.filter(is_delete=0).values_list('mid', flat=True):
+        meeting = Meeting.objects.filter(mid=mid, is_delete=0).values('date', 'end').first()
+        if meeting is None:
             logger.error('Meeting {} does not exist'.format(mid))
             raise MyValidationError(RetCode.INFORMATION_CHANGE_ERROR)
-        status, res = drivers.getParticipants(mid)
+        # 已结束会议的参会者从缓存读取, cache_age为缓存的秒数
+        status, res, cached_at = drivers.participants_store.get(mid, meeting['date'], meeting['end'])
         if status == 200:
-            return JsonResponse(res)
+            return JsonResponse(dict(res, cache_age=get_cache_age(cached_at)))
         else:
             resp = JsonResponse(res)
             resp.status_code = 400
@@ -934,7 +942,7 @@ class ParticipantsView(GenericAPIView, RetrieveModelMixin):
 
 
 # ------------------------------activity view------------------------------
-class DraftsView(GenericAPIView, ListModelMixin):
+class DraftsView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """审核列表"""
     serializer_class = ActivitiesSerializer
     queryset = Activity.objects.filter(is_delete=0, status=2).order_by('-date', 'id')
@@ -1026,7 +1034,7 @@ class ActivityView(GenericAPIView, CreateModelMixin):
         return ret_access_json(request.user)
 
 
-class ActivitiesView(GenericAPIView, ListModelMixin):
+class ActivitiesView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """活动列表"""
     serializer_class = ActivitiesSerializer
     queryset = Activity.objects.filter(is_delete=0, status__gt=2).order_by('-date', 'id')
@@ -1066,19 +1074,20 @@ class ActivitiesView(GenericAPIView, ListModelMixin):
         return self.list(request, *args, **kwargs)
 
 
-class RecentActivitiesView(GenericAPIView, ListModelMixin):
+class RecentActivitiesView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """最近的活动列表"""
     serializer_class = ActivitiesSerializer
     queryset = Activity.objects.filter(is_delete=0)
     pagination_class = MyPagination
 
     def get(self, request, *args, **kwargs):
-        self.queryset = self.queryset.filter(status__gt=2, date__gt=datetime.datetime.now().strftime('%Y-%m-%d')). \
+        self.queryset = self.queryset.filter(status__gt=2,
+                                             activity_date__gt=datetime.datetime.now().strftime('%Y-%m-%d')). \
             order_by('-date', 'id')
         return self.list(request, *args, **kwargs)
 
 
-class SponsorActivitiesView(GenericAPIView, ListModelMixin):
+class SponsorActivitiesView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """活动发起人的活动列表"""
     serializer_class = ActivitiesSerializer
     queryset = Activity.objects.all()
@@ -1277,7 +1286,7 @@ class ActivityDraftView(GenericAPIView, CreateModelMixin):
         return ret_access_json(request.user)
 
 
-class ActivitiesDraftView(GenericAPIView, ListModelMixin):
+class ActivitiesDraftView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """活动草案列表"""
     serializer_class = ActivitiesSerializer
     queryset = Activity.objects.all()
@@ -1450,7 +1459,7 @@ class DraftPublishView(GenericAPIView, UpdateModelMixin):
         return ret_access_json(request.user)
 
 
-class SponsorActivitiesPublishingView(GenericAPIView, ListModelMixin):
+class SponsorActivitiesPublishingView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """发布中的活动"""
     serializer_class = ActivitiesSerializer
     queryset = Activity.objects.all()
@@ -1524,7 +1533,7 @@ class ActivityCollectDelView(GenericAPIView, DestroyModelMixin):
         return queryset
 
 
-class MyActivityCollectionsView(GenericAPIView, ListModelMixin):
+class MyActivityCollectionsView(ProjectionMixin, GenericAPIView, ListModelMixin):
     """我收藏的活动(列表)"""
     serializer_class = ActivitiesSerializer
     queryset = Activity.objects.all()
@@ -1582,15 +1591,15 @@ class MeetingActivityDateView(GenericAPIView, ListModelMixin):
 
     def get_meetings(self):
         date_list = self._meeting_queryset.filter(
-            date__gte=(datetime.datetime.now() - datetime.timedelta(days=180)).strftime('%Y-%m-%d'),
-            date__lte=(datetime.datetime.now() + datetime.timedelta(days=30)).strftime('%Y-%m-%d')). \
+            meeting_date__gte=(datetime.datetime.now() - datetime.timedelta(days=180)).strftime('%Y-%m-%d'),
+            meeting_date__lte=(datetime.datetime.now() + datetime.timedelta(days=30)).strftime('%Y-%m-%d')). \
             distinct().order_by('-date', 'id').values_list("date", flat=True)
         return date_list
 
     def get_activity(self):
         date_list = self._activity_queryset.filter(
-            date__gte=(datetime.datetime.now() - datetime.timedelta(days=180)).strftime('%Y-%m-%d'),
-            date__lte=(datetime.datetime.now() + datetime.timedelta(days=30)).strftime('%Y-%m-%d')). \
+            activity_date__gte=(datetime.datetime.now() - datetime.timedelta(days=180)).strftime('%Y-%m-%d'),
+            activity_date__lte=(datetime.datetime.now() + datetime.timedelta(days=30)).strftime('%Y-%m-%d')). \
             distinct().order_by('-date', 'id').values_list("date", flat=True)
         return date_list
 
@@ -1616,14 +1625,24 @@ class MeetingActivityDateView(GenericAPIView, ListModelMixin):
 class MeetingActivityDataView(GenericAPIView, ListModelMixin):
     _meeting_queryset = Meeting.objects.filter(is_delete=0)
     _activity_queryset = Activity.objects.filter(status__in=[3, 4, 5], is_delete=0)
+    meeting_fields = ('id', 'group_name', 'start', 'end', 'topic', 'sponsor', 'agenda', 'join_url', 'mid', 'etherpad',
+                      'mplatform')
+    activity_fields = ('id', 'title', 'date', 'activity_type', 'address', 'detail_address', 'longitude', 'latitude',
+                       'synopsis', 'sign_url', 'replay_url', 'register_url', 'poster', 'wx_code', 'schedules')
+
+    def get_meetings_queryset(self, query_date):
+        return self._meeting_queryset.filter(meeting_date=query_date).order_by('-date', 'id') \
+            .values(*self.meeting_fields)
+
+    def get_activity_queryset(self, query_date):
+        return self._activity_queryset.filter(activity_date=query_date).order_by('-date', 'id') \
+            .values(*self.activity_fields)
 
     def get_meetings(self, query_date):
-        queryset = self._meeting_queryset.filter(date=query_date).order_by('-date', 'id').values()
-        records = Record.objects.filter(platform="bilibili", url__isnull=False).values()
-        record_dict = dict()
-        for record in records:
-            if record['platform'] == 'bilibili' and record['url']:
-                record_dict[record['mid']] = record['url']
+        queryset = list(self.get_meetings_queryset(query_date))
+        records = Record.objects.filter(platform="bilibili", url__isnull=False,
+                                        mid__in=[meeting['mid'] for meeting in queryset]).values_list('mid', 'url')
+        record_dict = {mid: url for mid, url in records if url}
         list_data = [{
             'id': meeting['id'],
             'group_name': meeting['group_name'],
@@ -1642,7 +1661,7 @@ class MeetingActivityDataView(GenericAPIView, ListModelMixin):
         return list_data
 
     def get_activity(self, query_date):
-        queryset = self._activity_queryset.filter(date=query_date).order_by('-date', 'id').values()
+        queryset = self.get_activity_queryset(query_date)
         list_data = [{
             'id': activity["id"],
             'title': activity["title"],
@@ -5,6 +5,7 @@ For more information on this file, see
 For the full list of settings and their values, see
 """
 import ssl
+import tempfile
 import time
 import os
 import sys
@@ -119,6 +120,12 @@ SMTP_SERVER_HOST = DEFAULT_CONF.get('SMTP_SERVER_HOST')
 SMTP_SERVER_PASS = DEFAULT_CONF.get('SMTP_SERVER_PASS')
 SMTP_SERVER_PORT = DEFAULT_CONF.get('SMTP_SERVER_PORT')
 SMTP_SERVER_USER = DEFAULT_CONF.get('SMTP_SERVER_USER')
+# the authenticated smtp connections are pooled, the connection idle more than SMTP_NOOP_AFTER seconds is checked by NOOP
+SMTP_STARTTLS = DEFAULT_CONF.get('SMTP_STARTTLS', True)
+SMTP_TIMEOUT = DEFAULT_CONF.get('SMTP_TIMEOUT', 10)
+SMTP_POOL_SIZE = DEFAULT_CONF.get('SMTP_POOL_SIZE', 2)
+SMTP_NOOP_AFTER = DEFAULT_CONF.get('SMTP_NOOP_AFTER', 30)
+SMTP_MAX_IDLE = DEFAULT_CONF.get('SMTP_MAX_IDLE', 300)
 TENCENT_API_PREFIX = DEFAULT_CONF.get('TENCENT_API_PREFIX')
 WELINK_API_PREFIX = DEFAULT_CONF.get('WELINK_API_PREFIX')
 WX_API_PREFIX = DEFAULT_CONF.get('WX_API_PREFIX')
@@ -135,6 +142,8 @@ TEMPLATE_SUMMARY_NOT_RECORDING = DEFAULT_CONF.get("TEMPLATE_SUMMARY_NOT_RECORDIN
 TEMPLATE_NOT_SUMMARY_RECORDING = DEFAULT_CONF.get("TEMPLATE_NOT_SUMMARY_RECORDING")
 TEMPLATE_SUMMARY_RECORDING = DEFAULT_CONF.get("TEMPLATE_SUMMARY_RECORDING")
 TEMPLATE_CANCEL_EMAIL = DEFAULT_CONF.get("TEMPLATE_CANCEL_EMAIL")
+# the compiled email templates are checked for the modification every TEMPLATE_RELOAD_INTERVAL seconds
+TEMPLATE_RELOAD_INTERVAL = DEFAULT_CONF.get('TEMPLATE_RELOAD_INTERVAL', 5)
 SIGS_INFO_OBJECT = DEFAULT_CONF.get('SIGS_INFO_OBJECT')
 
 WELINK_HOSTS = {
@@ -147,6 +156,86 @@ WELINK_HOSTS = {
 AES_GCM_SECRET = DEFAULT_CONF.get('AES_GCM_SECRET')
 AES_GCM_IV = DEFAULT_CONF.get('AES_GCM_IV')
 SIGNATURE_SECRET = DEFAULT_CONF.get('SIGNATURE_SECRET')
+# the algorithm of signature: hmac_sha256, blake2b, pbkdf2_sha256
+SIGNATURE_BACKEND = DEFAULT_CONF.get('SIGNATURE_BACKEND', 'hmac_sha256')
+# accept the pbkdf2 signature which has not been rotated
+SIGNATURE_ACCEPT_LEGACY = DEFAULT_CONF.get('SIGNATURE_ACCEPT_LEGACY', True)
+
+# cache of the verified token, the shared tier is the alias of CACHES, empty means only the process-local tier
+if DEFAULT_CONF.get('CACHES'):
+    CACHES = DEFAULT_CONF.get('CACHES')
+TOKEN_CACHE_ALIAS = DEFAULT_CONF.get('TOKEN_CACHE_ALIAS')
+TOKEN_CACHE_TTL = DEFAULT_CONF.get('TOKEN_CACHE_TTL', 300)
+TOKEN_CACHE_LOCAL_TTL = DEFAULT_CONF.get('TOKEN_CACHE_LOCAL_TTL', 5)
+TOKEN_CACHE_MAXSIZE = DEFAULT_CONF.get('TOKEN_CACHE_MAXSIZE', 10000)
+# reissue the access token only when it will expire in TOKEN_REISSUE_WINDOW seconds
+TOKEN_REISSUE_WINDOW = DEFAULT_CONF.get('TOKEN_REISSUE_WINDOW', 120)
+TOKEN_REISSUE_COALESCE_TTL = DEFAULT_CONF.get('TOKEN_REISSUE_COALESCE_TTL', 10)
+# the max count of devices which keep the refresh session at the same time
+REFRESH_SESSION_MAX_DEVICES = DEFAULT_CONF.get('REFRESH_SESSION_MAX_DEVICES', 5)
+# the store of live access token: database(the signature column of meetings_user), memory, file, redis
+# memory and file are only allowed in DEBUG or single process, the others use redis
+# clear_token still clears the signature columns of meetings_user when the store is enabled
+TOKEN_SESSION_BACKEND = DEFAULT_CONF.get('TOKEN_SESSION_BACKEND', 'database')
+# the server runs in single process, e.g. the management command, memory and file are allowed then
+TOKEN_SESSION_SINGLE_PROCESS = DEFAULT_CONF.get('TOKEN_SESSION_SINGLE_PROCESS', False)
+TOKEN_SESSION_FILE = DEFAULT_CONF.get('TOKEN_SESSION_FILE', os.path.join(tempfile.gettempdir(), 'token_session.db'))
+TOKEN_SESSION_REDIS_URL = DEFAULT_CONF.get('TOKEN_SESSION_REDIS_URL', 'redis://127.0.0.1:6379/0')
+TOKEN_SESSION_BATCH_SIZE = DEFAULT_CONF.get('TOKEN_SESSION_BATCH_SIZE', 100)
+TOKEN_SESSION_FLUSH_INTERVAL = DEFAULT_CONF.get('TOKEN_SESSION_FLUSH_INTERVAL', 0.005)
+# the shared http client of the third-party platforms, the timeouts are in seconds
+HTTP_CONNECT_TIMEOUT = DEFAULT_CONF.get('HTTP_CONNECT_TIMEOUT', 3)
+HTTP_READ_TIMEOUT = DEFAULT_CONF.get('HTTP_READ_TIMEOUT', 10)
+HTTP_RETRIES = DEFAULT_CONF.get('HTTP_RETRIES', 2)
+HTTP_RETRY_BACKOFF = DEFAULT_CONF.get('HTTP_RETRY_BACKOFF', 0.2)
+HTTP_POOL_MAXSIZE = DEFAULT_CONF.get('HTTP_POOL_MAXSIZE', 10)
+# refresh the wx access_token WX_TOKEN_REFRESH_AHEAD seconds before it expires, shared by the alias of CACHES
+WX_TOKEN_REFRESH_AHEAD = DEFAULT_CONF.get('WX_TOKEN_REFRESH_AHEAD', 300)
+WX_TOKEN_CACHE_ALIAS = DEFAULT_CONF.get('WX_TOKEN_CACHE_ALIAS', TOKEN_CACHE_ALIAS)
+# the zoom token in the metadata of OBS is cached ZOOM_TOKEN_TTL seconds and checked every ZOOM_TOKEN_CHECK_INTERVAL
+ZOOM_TOKEN_TTL = DEFAULT_CONF.get('ZOOM_TOKEN_TTL', 300)
+ZOOM_TOKEN_CHECK_INTERVAL = DEFAULT_CONF.get('ZOOM_TOKEN_CHECK_INTERVAL', 60)
+ZOOM_TOKEN_OBS_TIMEOUT = DEFAULT_CONF.get('ZOOM_TOKEN_OBS_TIMEOUT', 2)
+# the proxy token of every welink host is cached, WELINK_TOKEN_VALID_PERIOD is used if the response has no validPeriod
+WELINK_TOKEN_VALID_PERIOD = DEFAULT_CONF.get('WELINK_TOKEN_VALID_PERIOD', 3600)
+WELINK_TOKEN_REFRESH_AHEAD = DEFAULT_CONF.get('WELINK_TOKEN_REFRESH_AHEAD', 300)
+WELINK_TOKEN_CACHE_ALIAS = DEFAULT_CONF.get('WELINK_TOKEN_CACHE_ALIAS', TOKEN_CACHE_ALIAS)
+# the history conferences of welink are indexed in process and refreshed incrementally, the attendees are fetched concurrently
+WELINK_HISTORY_LOOKBACK = DEFAULT_CONF.get('WELINK_HISTORY_LOOKBACK', 86400)
+WELINK_HISTORY_REFRESH_INTERVAL = DEFAULT_CONF.get('WELINK_HISTORY_REFRESH_INTERVAL', 60)
+WELINK_PAGE_SIZE = DEFAULT_CONF.get('WELINK_PAGE_SIZE', 500)
+WELINK_ATTENDEE_CONCURRENCY = DEFAULT_CONF.get('WELINK_ATTENDEE_CONCURRENCY', 4)
+# the background jobs consumed by manage.py run_worker, the retry backoff is JOB_RETRY_BACKOFF * 2^(attempts-1) seconds
+JOB_WORKER_CONCURRENCY = DEFAULT_CONF.get('JOB_WORKER_CONCURRENCY', 4)
+JOB_VISIBILITY_TIMEOUT = DEFAULT_CONF.get('JOB_VISIBILITY_TIMEOUT', 300)
+JOB_POLL_INTERVAL = DEFAULT_CONF.get('JOB_POLL_INTERVAL', 1)
+JOB_MAX_ATTEMPTS = DEFAULT_CONF.get('JOB_MAX_ATTEMPTS', 5)
+JOB_RETRY_BACKOFF = DEFAULT_CONF.get('JOB_RETRY_BACKOFF', 30)
+JOB_RETRY_BACKOFF_MAX = DEFAULT_CONF.get('JOB_RETRY_BACKOFF_MAX', 3600)
+JOB_RETENTION_DAYS = DEFAULT_CONF.get('JOB_RETENTION_DAYS', 7)
+# the count of receivers loaded and decrypted in one batch when sending the subscription messages
+SUBSCRIPTION_BATCH_SIZE = DEFAULT_CONF.get('SUBSCRIPTION_BATCH_SIZE', 200)
+# the concurrency and the rate limit(messages per second) of sending the subscription messages in sendmessages
+SUBSCRIPTION_CONCURRENCY = DEFAULT_CONF.get('SUBSCRIPTION_CONCURRENCY', 8)
+SUBSCRIPTION_RATE = DEFAULT_CONF.get('SUBSCRIPTION_RATE', 20)
+SUBSCRIPTION_BURST = DEFAULT_CONF.get('SUBSCRIPTION_BURST', 20)
+# the reminder_daemon sends the reminders at start time - REMINDER_OFFSETS(minutes), the tick of timer wheel is seconds
+REMINDER_OFFSETS = DEFAULT_CONF.get('REMINDER_OFFSETS', [10])
+REMINDER_TICK = DEFAULT_CONF.get('REMINDER_TICK', 1)
+REMINDER_WHEEL_SLOTS = DEFAULT_CONF.get('REMINDER_WHEEL_SLOTS', 3600)
+REMINDER_POLL_INTERVAL = DEFAULT_CONF.get('REMINDER_POLL_INTERVAL', 1)
+REMINDER_CHANGE_RETENTION_DAYS = DEFAULT_CONF.get('REMINDER_CHANGE_RETENTION_DAYS', 7)
+# the skipped change ids are read again until REMINDER_CHANGE_GAP_TIMEOUT(seconds), it exceeds the longest transaction
+REMINDER_CHANGE_GAP_TIMEOUT = DEFAULT_CONF.get('REMINDER_CHANGE_GAP_TIMEOUT', 60)
+# the reminder failed to send is retried after REMINDER_RETRY_DELAY(seconds) at most REMINDER_RETRY_TIMES
+REMINDER_RETRY_DELAY = DEFAULT_CONF.get('REMINDER_RETRY_DELAY', 30)
+REMINDER_RETRY_TIMES = DEFAULT_CONF.get('REMINDER_RETRY_TIMES', 3)
+# the participants are kept when the meeting has ended for PARTICIPANTS_SETTLE_MINUTES, and cached in process
+PARTICIPANTS_SETTLE_MINUTES = DEFAULT_CONF.get('PARTICIPANTS_SETTLE_MINUTES', 30)
+PARTICIPANTS_CACHE_MAXSIZE = DEFAULT_CONF.get('PARTICIPANTS_CACHE_MAXSIZE', 1024)
+PARTICIPANTS_CACHE_TTL = DEFAULT_CONF.get('PARTICIPANTS_CACHE_TTL', 3600)
+# the slots of hosts are reserved before creating meeting, the reservation not bound in the timeout is purged
+HOST_RESERVATION_TIMEOUT = DEFAULT_CONF.get('HOST_RESERVATION_TIMEOUT', 600)
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/17 10:05
+# @Author  : Tom_zc
+# @FileName: access_token.py
+# @Software: PyCharm
+import logging
+import threading
+import time
+
+from django.core.cache import caches
+
+logger = logging.getLogger('log')
+
+
+class AccessTokenManager:
+    """
+    cache the access token of the third-party platform.
+    1.fetch(key) returns (token, expires_in), the token is refreshed refresh_ahead seconds before it expires.
+    2.the refresh is single-flight: one thread in the process and one process in the shared cache fetch the token,
+      the others wait for the result or keep using the current token which has not expired.
+    3.the shared tier is a cache of django CACHES, it is disabled if alias is empty.
+    """
+
+    def __init__(self, name, fetch, refresh_ahead=300, alias=None, lock_timeout=10, wait_timeout=3):
+        self.name = name
+        self.fetch = fetch
+        self.refresh_ahead = refresh_ahead
+        self.alias = alias
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self._tokens = dict()
+        self._locks = dict()
+        self._locks_lock = threading.Lock()
+        self.hits = 0
+        self.fetches = 0
+        self.invalidations = 0
+
+    @property
+    def shared(self):
+        if not self.alias:
+            return None
+        return caches[self.alias]
+
+    def get_lock(self, key):
+        with self._locks_lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = threading.Lock()
+                self._locks[key] = lock
+            return lock
+
+    def get_value_key(self, key):
+        return '{}:value:{}'.format(self.name, key)
+
+    def get_lock_key(self, key):
+        return '{}:lock:{}'.format(self.name, key)
+
+    def is_fresh(self, item):
+        return item is not None and item[1] - self.refresh_ahead > time.time()
+
+    @staticmethod
+    def is_valid(item):
+        return item is not None and item[1] > time.time()
+
+    def get(self, key='default'):
+        item = self._tokens.get(key)
+        if self.is_fresh(item):
+            self.hits += 1
+            return item[0]
+        with self.get_lock(key):
+            item = self._tokens.get(key)
+            if self.is_fresh(item):
+                self.hits += 1
+                return item[0]
+            item = self.refresh(key, item)
+            if not self.is_valid(item):
+                return None
+            self._tokens[key] = item
+            return item[0]
+
+    def refresh(self, key, current):
+        shared = self.shared
+        if shared is None:
+            return self.do_fetch(key, current)
+        item = shared.get(self.get_value_key(key))
+        if self.is_fresh(item):
+            self.hits += 1
+            return item
+        lock_key = self.get_lock_key(key)
+        if shared.add(lock_key, 1, self.lock_timeout):
+            try:
+                return self.do_fetch(key, current or item)
+            finally:
+                shared.delete(lock_key)
+        # another process is fetching the token, wait for the result
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            item = shared.get(self.get_value_key(key))
+            if self.is_fresh(item):
+                return item
+        if self.is_valid(current or item):
+            logger.info('[{}] wait for the token timeout, use the current token'.format(self.name))
+            return current or item
+        return self.do_fetch(key, current)
+
+    def do_fetch(self, key, current):
+        self.fetches += 1
+        try:
+            token, expires_in = self.fetch(key)
+        except Exception as e:
+            logger.error('[{}] fetch token failed, e:{}'.format(self.name, e))
+            token, expires_in = None, 0
+        if not token:
+            # keep the current token until it expires
+            return current
+        item = (token, time.time() + int(expires_in))
+        shared = self.shared
+        if shared is not None:
+            shared.set(self.get_value_key(key), item, int(expires_in))
+        return item
+
+    def invalidate(self, key='default', token=None):
+        """drop the token which is rejected by the platform, the token refreshed by others is kept"""
+        self.invalidations += 1
+        with self.get_lock(key):
+            item = self._tokens.get(key)
+            if item is not None and (token is None or item[0] == token):
+                del self._tokens[key]
+        shared = self.shared
+        if shared is not None:
+            value_key = self.get_value_key(key)
+            item = shared.get(value_key)
+            if item is not None and (token is None or item[0] == token):
+                shared.delete(value_key)
+
+    def stats(self):
+        return {'name': self.name, 'hits': self.hits, 'fetches': self.fetches, 'invalidations': self.invalidations}
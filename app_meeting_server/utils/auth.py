@@ -3,15 +3,60 @@ from django.utils.translation import ugettext_lazy as _
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
 from rest_framework_simplejwt.settings import api_settings
-from app_meeting_server.utils.common import make_signature
+from app_meeting_server.utils.common import check_access
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from app_meeting_server.utils.ret_api import MyValidationError
+from app_meeting_server.utils.my_refresh import SESSION_CLAIM
 from app_meeting_server.utils.ret_code import RetCode
+from app_meeting_server.utils.session_store import token_session_store
+from app_meeting_server.utils.token_cache import token_cache
 
 logger = logging.getLogger('log')
 
 
+def get_verified_user(validated_token):
+    """
+    Find the user by the validated token, the verified user is cached by the jti of token.
+    """
+    try:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        logger.error("Token contained no recognizable user identification")
+        raise InvalidToken(_('Token contained no recognizable user identification'))
+
+    jti = validated_token.get(api_settings.JTI_CLAIM)
+    active = None
+    if token_session_store.enabled:
+        active = token_session_store.is_active(user_id, jti, validated_token.get(SESSION_CLAIM))
+        if active is False:
+            logger.error("User:{} token has been revoked".format(str(user_id)))
+            raise InvalidToken(_('Token has expired'))
+    user = token_cache.get(jti, user_id)
+    if user is not None:
+        user.access_token = validated_token
+        return user
+
+    generation = token_cache.get_generation(user_id)
+    user_model = get_user_model()
+    try:
+        user = user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+    except user_model.DoesNotExist:
+        logger.error("User:{} not found".format(str(user_id)))
+        raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+    if not user.is_delete == 0:
+        logger.error("User:{} is inactive".format(str(user_id)))
+        raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+    if not active and not check_access(validated_token, user):
+        logger.error("User:{} token has expired".format(str(user_id)))
+        raise InvalidToken(_('Token has expired'))
+    token_cache.set(jti, user, validated_token.get('exp'), generation)
+    user.access_token = validated_token
+    return user
+
+
 class CustomAuthentication(JWTAuthentication):
     """
     CustomAuthentication override get_user
@@ -21,32 +66,14 @@ class CustomAuthentication(JWTAuthentication):
         """
         Attempts to find and return a user using the given validated token.
         """
-        try:
-            user_id = validated_token[api_settings.USER_ID_CLAIM]
-        except KeyError:
-            logger.error("Token contained no recognizable user identification")
-            raise InvalidToken(_('Token contained no recognizable user identification'))
-
-        user_model = get_user_model()
-        try:
-            user = user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
-        except user_model.DoesNotExist:
-            logger.error("User:{} not found".format(str(user_id)))
-            raise AuthenticationFailed(_('User not found'), code='user_not_found')
-
-        if not user.is_delete == 0:
-            logger.error("User:{} is inactive".format(str(user_id)))
-            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
-
-        token = make_signature(validated_token)
-        if user.signature != str(token):
-            logger.error("User:{} token has expired".format(str(user_id)))
-            raise InvalidToken(_('Token has expired'))
+        user = get_verified_user(validated_token)
+        user_id = user.id
         if user.agree_privacy_policy != 1:
             logger.error("User:{} has no agreement about privacy policy".format(str(user_id)))
             raise MyValidationError(RetCode.STATUS_DISAGREE_PRIVACY)
         if user.agree_privacy_policy_version != settings.PRIVACY_POLICY_VERSION:
-            user_model.objects.filter(id=user_id).update(agree_privacy_policy=0)
+            get_user_model().objects.filter(id=user_id).update(agree_privacy_policy=0)
+            token_cache.invalidate_user(user_id)
             logger.error("User:{} has does not agree the latest privacy policy".format(str(user_id)))
             raise MyValidationError(RetCode.STATUS_OLD_PRIVACY)
         return user
@@ -61,25 +88,4 @@ class CustomAuthenticationWithoutPolicyAgreen(JWTAuthentication):
         """
         Attempts to find and return a user using the given validated token.
         """
-        try:
-            user_id = validated_token[api_settings.USER_ID_CLAIM]
-        except KeyError:
-            logger.error("Token contained no recognizable user identification")
-            raise InvalidToken(_('Token contained no recognizable user identification'))
-
-        user_model = get_user_model()
-        try:
-            user = user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
-        except user_model.DoesNotExist:
-            logger.error("User:{} not found".format(str(user_id)))
-            raise AuthenticationFailed(_('User not found'), code='user_not_found')
-
-        if not user.is_delete == 0:
-            logger.error("User:{} is inactive".format(str(user_id)))
-            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
-
-        token = make_signature(validated_token)
-        if user.signature != str(token):
-            logger.error("User:{} token has expired".format(str(user_id)))
-            raise InvalidToken(_('Token has expired'))
-        return user
+        return get_verified_user(validated_token)
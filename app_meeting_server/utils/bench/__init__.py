@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/29 10:00
+# @Author  : Tom_zc
+# @FileName: __init__.py
+# @Software: PyCharm
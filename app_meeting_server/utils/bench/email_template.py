@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/29 10:40
+# @Author  : Tom_zc
+# @FileName: email_template.py
+# @Software: PyCharm
+import os
+import time
+
+import icalendar
+from django.conf import settings
+
+from app_meeting_server.utils.email_template import TEMPLATE_SUMMARY_NOT_RECORDING, IcsTemplate, \
+    TemplateRegistry, get_utc_time
+
+
+def render_legacy(path, meeting):
+    """the rendering before the templates were compiled"""
+    with open(path, 'r', encoding='utf-8') as fp:
+        body = fp.read()
+    body_of_email = body.replace('{{sig_name}}', '{0}').replace('{{start_time}}', '{1}'). \
+        replace('{{join_url}}', '{2}').replace('{{topic}}', '{3}'). \
+        replace('{{summary}}', '{4}').replace('{{platform}}', '{5}'). \
+        replace('{{etherpad}}', '{6}').replace('{{portal_zh}}', '{7}'). \
+        replace('{{portal_en}}', '{8}'). \
+        format(meeting['sig_name'], meeting['start_time'], meeting['join_url'], meeting['topic'],
+               meeting['summary'], meeting['platform'], meeting['etherpad'], meeting['portal_zh'],
+               meeting['portal_en'])
+    cal = icalendar.Calendar()
+    cal.add('prodid', '-//openeuler conference calendar')
+    cal.add('version', '2.0')
+    cal.add('method', 'REQUEST')
+    event = icalendar.Event()
+    event.add('attendee', meeting['attendee'])
+    event.add('summary', meeting['topic'])
+    event.add('dtstart', meeting['dt_start'])
+    event.add('dtend', meeting['dt_end'])
+    event.add('dtstamp', meeting['dt_start'])
+    event.add('uid', meeting['uid'])
+    alarm = icalendar.Alarm()
+    alarm.add('action', 'DISPLAY')
+    alarm.add('description', 'Reminder')
+    alarm.add('TRIGGER;RELATED=START', '-PT15M')
+    event.add_component(alarm)
+    cal.add_component(event)
+    return body_of_email, cal.to_ical()
+
+
+def benchmark(times=10000):
+    """render the invitations with the legacy path and the compiled templates, the results must be the same"""
+    path = os.path.join(settings.BASE_DIR, 'templates', 'template_with_summary_without_recordings.txt')
+    meetings = list()
+    for i in range(times):
+        meetings.append({
+            'sig_name': 'sig-{}'.format(i % 100),
+            'start_time': '2024-01-{:02d} {:02d}:00'.format(i % 28 + 1, i % 12 + 8),
+            'join_url': 'https://meeting.example.com/j/{}'.format(i),
+            'topic': 'topic {}'.format(i),
+            'summary': 'summary of meeting {}'.format(i),
+            'platform': 'Zoom',
+            'etherpad': 'https://etherpad.example.com/p/{}'.format(i),
+            'portal_zh': 'https://www.example.com/zh/',
+            'portal_en': 'https://www.example.com/en/',
+            'attendee': 'a@example.com,b@example.com',
+            'dt_start': get_utc_time('2024-01-{:02d}'.format(i % 28 + 1), '{:02d}:00'.format(i % 12 + 8)),
+            'dt_end': get_utc_time('2024-01-{:02d}'.format(i % 28 + 1), '{:02d}:30'.format(i % 12 + 8)),
+            'uid': 'Zoom{}'.format(i),
+        })
+    ret = dict()
+    start = time.perf_counter()
+    legacy = [render_legacy(path, meeting) for meeting in meetings]
+    ret['legacy'] = (time.perf_counter() - start) * 1000 * 1000 / times
+
+    registry = TemplateRegistry(check_interval=settings.TEMPLATE_RELOAD_INTERVAL)
+    registry.register(TEMPLATE_SUMMARY_NOT_RECORDING, path)
+    ics = IcsTemplate('-//openeuler conference calendar', 'REQUEST', alarm=True)
+    start = time.perf_counter()
+    compiled = [(registry.render(TEMPLATE_SUMMARY_NOT_RECORDING, **meeting),
+                 ics.render(meeting['attendee'], meeting['topic'], meeting['dt_start'], meeting['dt_end'],
+                            meeting['uid'])) for meeting in meetings]
+    ret['compiled'] = (time.perf_counter() - start) * 1000 * 1000 / times
+    ret['same'] = legacy == compiled
+    return ret
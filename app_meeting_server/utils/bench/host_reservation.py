@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/29 10:50
+# @Author  : Tom_zc
+# @FileName: host_reservation.py
+# @Software: PyCharm
+import datetime
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from app_meeting_server.utils.host_reservation import HostReserver, get_slots
+
+
+class StubPlatform:
+    """the platform which creates meeting in delay seconds and records the meetings of every host"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.bookings = dict()
+        self._lock = threading.Lock()
+
+    def create_meeting(self, host_id, date, start, end):
+        time.sleep(self.delay * random.uniform(0.5, 1.5))
+        with self._lock:
+            self.bookings.setdefault(host_id, list()).append(get_slots(date, start, end))
+            return uuid.uuid4().hex[:10]
+
+    def double_bookings(self):
+        ret = 0
+        for bookings in self.bookings.values():
+            held = set()
+            for slots in bookings:
+                if held & set(slots):
+                    ret += 1
+                held.update(slots)
+        return ret
+
+
+def get_latency(costs):
+    costs = sorted(costs)
+    return {
+        'p50': round(costs[len(costs) // 2] * 1000, 2),
+        'p95': round(costs[int(len(costs) * 0.95) - 1] * 1000, 2),
+        'max': round(costs[-1] * 1000, 2),
+    }
+
+
+def benchmark(concurrency=50, hosts=3, delay=0.05):
+    """
+    drive concurrency creations of the same time against the stub platform,
+    compare checking the existing meetings before the platform call with reserving the slots.
+    """
+    platform = 'bench'
+    date = (datetime.datetime.now() + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+    host_ids = ['bench{}@example.com'.format(i) for i in range(hosts)]
+    barrier = threading.Barrier(concurrency)
+    ret = dict()
+
+    # 1.check then create, the meetings are kept in memory like the rows of the meeting table
+    stub = StubPlatform(delay)
+    meetings = list()
+    lock = threading.Lock()
+
+    def create_legacy():
+        barrier.wait()
+        start_time = time.perf_counter()
+        with lock:
+            unavailable = set(meeting[0] for meeting in meetings)
+        available = list(set(host_ids) - unavailable)
+        if not available:
+            return False, time.perf_counter() - start_time
+        host_id = random.SystemRandom().choice(available)
+        stub.create_meeting(host_id, date, '10:00', '11:00')
+        with lock:
+            meetings.append((host_id, date))
+        return True, time.perf_counter() - start_time
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = [f.result() for f in [executor.submit(create_legacy) for _ in range(concurrency)]]
+    ret['legacy'] = dict(created=len([r for r in results if r[0]]), double_bookings=stub.double_bookings(),
+                         **get_latency([r[1] for r in results]))
+
+    # 2.reserve the slots before the platform call
+    stub = StubPlatform(delay)
+    reserver = HostReserver(timeout=settings.HOST_RESERVATION_TIMEOUT)
+    reserver.model.objects.filter(platform=platform).delete()
+
+    def create_reserved():
+        close_old_connections()
+        barrier.wait()
+        start_time = time.perf_counter()
+        try:
+            reservation = reserver.reserve(platform, host_ids, date, '10:00', '11:00')
+            if reservation is None:
+                return False, time.perf_counter() - start_time
+            mid = stub.create_meeting(reservation.host_id, date, '10:00', '11:00')
+            reservation.bind(mid)
+            return True, time.perf_counter() - start_time
+        finally:
+            close_old_connections()
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = [f.result() for f in [executor.submit(create_reserved) for _ in range(concurrency)]]
+    finally:
+        reserver.model.objects.filter(platform=platform).delete()
+    ret['reserved'] = dict(created=len([r for r in results if r[0]]), double_bookings=stub.double_bookings(),
+                           **get_latency([r[1] for r in results]))
+    return ret
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/29 10:10
+# @Author  : Tom_zc
+# @FileName: http_client.py
+# @Software: PyCharm
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from app_meeting_server.utils.http_client import HttpClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """/ok returns at once, /slow sleeps longer than the read timeout, /flaky fails every other request"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.ports.add(self.client_address[1])
+            flaky_fail = server.requests % 2 == 1
+        status = 200
+        if self.path.startswith('/slow'):
+            time.sleep(server.slow_seconds)
+        elif self.path.startswith('/flaky') and flaky_fail:
+            status = 503
+        body = b'{"ok": true}'
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server(slow_seconds=1):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.ports = set()
+    server.slow_seconds = slow_seconds
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def benchmark(times=200):
+    """compare the bare requests with the pooled client against a local stub server"""
+    server = start_stub_server()
+    url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+    ret = dict()
+    try:
+        start = time.perf_counter()
+        for _ in range(times):
+            requests.get(url + '/ok')
+        ret['bare'] = {'ms': (time.perf_counter() - start) * 1000 / times, 'connections': len(server.ports)}
+
+        server.ports.clear()
+        client = HttpClient('bench', connect_timeout=1, read_timeout=0.2, retries=2, backoff=0.01)
+        start = time.perf_counter()
+        for _ in range(times):
+            client.get(url + '/ok')
+        ret['pooled'] = {'ms': (time.perf_counter() - start) * 1000 / times, 'connections': len(server.ports)}
+
+        start = time.perf_counter()
+        try:
+            client.get(url + '/slow', retries=0)
+        except requests.exceptions.ReadTimeout:
+            pass
+        ret['timeout'] = {'ms': (time.perf_counter() - start) * 1000, 'connections': len(server.ports)}
+
+        server.requests = 0
+        response = client.get(url + '/flaky')
+        ret['flaky'] = {'status_code': response.status_code, 'requests': server.requests}
+        ret['stats'] = client.stats()
+    finally:
+        server.shutdown()
+        server.server_close()
+    return ret
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/29 10:30
+# @Author  : Tom_zc
+# @FileName: mail_transport.py
+# @Software: PyCharm
+import smtplib
+import socketserver
+import threading
+import time
+
+from app_meeting_server.utils.mail_transport import SmtpConnectionPool
+
+
+class StubSmtpHandler(socketserver.StreamRequestHandler):
+    """the minimal smtp server, the handshake sleeps handshake_seconds like the tls and the auth"""
+    disable_nagle_algorithm = True
+
+    def reply(self, line):
+        self.wfile.write((line + '\r\n').encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        time.sleep(server.handshake_seconds)
+        self.reply('220 stub ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='ignore').strip().split(' ', 1)[0].upper()
+            if command == 'EHLO':
+                self.reply('250-stub')
+                self.reply('250 AUTH PLAIN LOGIN')
+            elif command == 'AUTH':
+                time.sleep(server.handshake_seconds)
+                self.reply('235 2.7.0 Authentication successful')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                with server.lock:
+                    server.messages += 1
+                    drop = server.drop_after and server.messages % server.drop_after == 0
+                self.reply('250 OK')
+                if drop:
+                    return
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+def start_stub_server(handshake_seconds=0.01, drop_after=0):
+    """drop_after: the server drops the connection after every drop_after messages"""
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), StubSmtpHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.messages = 0
+    server.handshake_seconds = handshake_seconds
+    server.drop_after = drop_after
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def benchmark(times=100):
+    """compare a new connection per message with the pool against a local stub server"""
+    server = start_stub_server()
+    host, port = server.server_address
+    msg = 'Subject: bench\r\n\r\nbench'
+    ret = dict()
+    try:
+        start = time.perf_counter()
+        for _ in range(times):
+            smtp = smtplib.SMTP(host, port, timeout=5)
+            smtp.ehlo()
+            smtp.login('user', 'pass')
+            smtp.sendmail('a@example.com', ['b@example.com'], msg)
+            smtp.quit()
+        ret['bare'] = {'ms': (time.perf_counter() - start) * 1000 / times, 'connections': server.connections}
+
+        server.connections = 0
+        pool = SmtpConnectionPool(host, port, user='user', password='pass', starttls=False, timeout=5)
+        start = time.perf_counter()
+        for _ in range(times):
+            pool.send('a@example.com', ['b@example.com'], msg)
+        ret['pooled'] = {'ms': (time.perf_counter() - start) * 1000 / times, 'connections': server.connections}
+        pool.close()
+
+        server.connections = 0
+        server.messages = 0
+        server.drop_after = 10
+        pool = SmtpConnectionPool(host, port, user='user', password='pass', starttls=False, timeout=5)
+        failed = 0
+        for _ in range(times):
+            try:
+                pool.send('a@example.com', ['b@example.com'], msg)
+            except (smtplib.SMTPException, OSError):
+                failed += 1
+        ret['dropped'] = {'failed': failed, 'connections': server.connections}
+        ret['stats'] = pool.stats()
+        pool.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+    return ret
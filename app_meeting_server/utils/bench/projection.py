@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/29 11:00
+# @Author  : Tom_zc
+# @FileName: projection.py
+# @Software: PyCharm
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def count_list_queries(serializer_class, queryset, sizes, context=None):
+    """the queries of serializing the first size rows of the queryset, for every size"""
+    counts = list()
+    for size in sizes:
+        with CaptureQueriesContext(connection) as context_queries:
+            serializer_class(queryset[:size], many=True, context=context).data
+        counts.append(len(context_queries))
+    return counts
+
+
+def get_bytes_sent():
+    """the bytes sent to the client by the mysql server in this session, None for the other databases"""
+    if connection.vendor != 'mysql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW SESSION STATUS LIKE 'Bytes_sent'")
+        return int(cursor.fetchone()[1])
+
+
+def get_row_bytes(row):
+    """the length of the loaded values of the instance or the dict"""
+    if isinstance(row, dict):
+        values = row.values()
+    else:
+        values = [row.__dict__[field.attname] for field in row._meta.concrete_fields if field.attname in row.__dict__]
+    return sum(len(str(value).encode()) for value in values if value is not None)
+
+
+def measure_bytes(queryset):
+    """
+    the bytes read by the queryset, it is the counter of the mysql server with the constant overhead of the
+    status query, or the length of the loaded values for the other databases.
+    """
+    start = get_bytes_sent()
+    rows = list(queryset)
+    if start is not None:
+        return get_bytes_sent() - start
+    return sum(get_row_bytes(row) for row in rows)
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/29 10:20
+# @Author  : Tom_zc
+# @FileName: signature.py
+# @Software: PyCharm
+import time
+
+from app_meeting_server.utils.signature import SIGNATURE_BACKENDS, LEGACY_ALGORITHMS
+
+
+def benchmark(token, secret, times=100):
+    """return the average cost(ms) of verifying once for every backend"""
+    ret = dict()
+    for algorithm, backend_class in SIGNATURE_BACKENDS.items():
+        backend = backend_class()
+        signature = backend.encode(token, secret)
+        count = times if algorithm not in LEGACY_ALGORITHMS else max(times // 100, 1)
+        start = time.perf_counter()
+        for _ in range(count):
+            backend.verify(token, secret, signature)
+        ret[algorithm] = (time.perf_counter() - start) * 1000 / count
+    return ret
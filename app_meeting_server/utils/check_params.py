@@ -10,8 +10,10 @@ import logging
 from django.db import models
 from django.conf import settings
 from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
 from django.utils.translation import ugettext_lazy as _
-from app_meeting_server.utils.common import make_refresh_signature, get_cur_date, format_strptime
+from app_meeting_server.utils.common import check_refresh_signature, get_cur_date, format_strptime, \
+    get_refresh_session_model, revoke_sessions
 from app_meeting_server.utils.my_refresh import MyRefreshToken
 from app_meeting_server.utils.regular_match import match_email, match_url, match_crlf
 from app_meeting_server.utils.ret_api import MyValidationError, capture_myvalidation_exception
@@ -78,16 +80,35 @@ def check_refresh_token(refresh):
         logger.error("receive empty refresh")
         raise AuthenticationFailed(_('lack of refresh'))
     try:
-        MyRefreshToken(refresh, verify=True)
+        refresh_token = MyRefreshToken(refresh, verify=True)
+        user_id = refresh_token[api_settings.USER_ID_CLAIM]
+        jti = refresh_token[api_settings.JTI_CLAIM]
     except Exception as e:
         logger.error("invalid refresh_token:{}".format(e))
         raise AuthenticationFailed(_("Token is invalid or expired"))
-    refresh_signature = make_refresh_signature(refresh)
+    refresh_session_model = get_refresh_session_model()
+    refresh_session = refresh_session_model.objects.select_related('user').filter(jti=jti, user_id=user_id).first()
+    if refresh_session is not None:
+        if refresh_session.expires_at < get_cur_date() or \
+                not check_refresh_signature(refresh, refresh_session.digest):
+            logger.error("refresh doesnt match")
+            raise AuthenticationFailed(_('invalid refresh'))
+        # the refresh token can be used only once, the concurrent refresh which deletes nothing is rejected
+        if refresh_session_model.objects.filter(pk=refresh_session.pk).delete()[0] == 0:
+            logger.error("refresh has been used")
+            raise AuthenticationFailed(_('invalid refresh'))
+        revoke_sessions(user_id, [jti])
+        return refresh_session.user
+    # the refresh token saved in meetings_user before has not been rotated
     user_model = get_user_model()
-    cur_user = user_model.objects.filter(refresh_signature=refresh_signature).first()
-    if cur_user is None:
+    cur_user = user_model.objects.filter(id=user_id).first()
+    if cur_user is None or not check_refresh_signature(refresh, cur_user.refresh_signature):
         logger.error("refresh doesnt match")
         raise AuthenticationFailed(_('invalid refresh'))
+    if user_model.objects.filter(id=user_id, refresh_signature=cur_user.refresh_signature) \
+            .update(refresh_signature="") == 0:
+        logger.error("refresh has been used")
+        raise AuthenticationFailed(_('invalid refresh'))
     return cur_user
 
 
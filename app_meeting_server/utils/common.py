@@ -6,7 +6,6 @@
 import secrets
 import string
 import subprocess
-import threading
 import time
 import uuid
 import tempfile
@@ -15,22 +14,21 @@ import logging
 import traceback
 from contextlib import suppress
 from datetime import datetime, timedelta
+from django.apps import apps
 from django.contrib.auth import get_user_model
-from django.contrib.auth.hashers import PBKDF2PasswordHasher
 from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings
 
 from app_meeting_server.utils import crypto_gcm
 from app_meeting_server.utils.file_stream import write_content
-from app_meeting_server.utils.my_refresh import MyTokenObtainPairSerializer
+from app_meeting_server.utils.my_refresh import MyTokenObtainPairSerializer, SESSION_CLAIM
+from app_meeting_server.utils.signature import encode_signature, verify_signature
+from app_meeting_server.utils.session_store import token_session_store
+from app_meeting_server.utils.token_cache import token_cache
 
 logger = logging.getLogger('log')
 
 
-def start_thread(func, m, record):
-    th = threading.Thread(target=func, args=(m, record))
-    th.start()
-
-
 def get_cur_date():
     cur_date = datetime.now()
     return cur_date
@@ -57,42 +55,123 @@ def get_uuid():
 
 
 def make_signature(access_token):
-    pbkdf2_password_hasher = PBKDF2PasswordHasher()
-    return pbkdf2_password_hasher.encode(access_token, settings.SIGNATURE_SECRET, iterations=260000)
+    return encode_signature(access_token, settings.SIGNATURE_SECRET)
 
 
 def make_refresh_signature(refresh_token):
-    pbkdf2_password_hasher = PBKDF2PasswordHasher()
-    return pbkdf2_password_hasher.encode(refresh_token, settings.REFRESH_SIGNATURE_SECRET, iterations=260000)
+    return encode_signature(refresh_token, settings.REFRESH_SIGNATURE_SECRET)
+
+
+def check_signature(access_token, signature):
+    return verify_signature(access_token, settings.SIGNATURE_SECRET, signature)
+
+
+def check_refresh_signature(refresh_token, signature):
+    return verify_signature(refresh_token, settings.REFRESH_SIGNATURE_SECRET, signature)
+
+
+def get_refresh_session_model():
+    return apps.get_model(get_user_model()._meta.app_label, 'RefreshSession')
+
+
+def save_access(access, user):
+    """
+    save the access token as the only live token of its refresh session, so every device keeps its own token,
+    the access token without session which is signed before is the only live token of user.
+    """
+    jti = access[api_settings.JTI_CLAIM]
+    sid = access.get(SESSION_CLAIM)
+    if sid:
+        get_refresh_session_model().objects.filter(jti=sid, user_id=user.id).update(access_jti=jti)
+    elif not token_session_store.enabled:
+        user_model = get_user_model()
+        user_model.objects.filter(id=user.id).update(signature=make_signature(str(access)))
+    if token_session_store.enabled:
+        token_session_store.activate(user.id, jti, access['exp'], sid)
+    token_cache.invalidate_user(user.id)
 
 
-def refresh_access(user):
+def check_access(access, user):
+    """the access token is the live token of its refresh session, or the signature of user"""
+    sid = access.get(SESSION_CLAIM)
+    if not sid:
+        return check_signature(access, user.signature)
+    return get_refresh_session_model().objects.filter(jti=sid, user_id=user.id, expires_at__gt=get_cur_date(),
+                                                      access_jti=access[api_settings.JTI_CLAIM]).exists()
+
+
+def revoke_sessions(user_id, sids):
+    """revoke the access tokens of the deleted refresh sessions"""
+    if token_session_store.enabled and sids:
+        token_session_store.revoke(user_id, sids)
+    token_cache.invalidate_user(user_id)
+
+
+def refresh_access(user, sid=None):
+    """reissue the access token of the refresh session sid"""
     refresh = MyTokenObtainPairSerializer.get_token(user)
-    access_token = str(refresh.access_token)
-    access_signature = make_signature(access_token)
-    user_model = get_user_model()
-    user_model.objects.filter(id=user.id).update(signature=access_signature)
-    return access_token
+    access = refresh.access_token
+    if sid:
+        access[SESSION_CLAIM] = sid
+    else:
+        del access[SESSION_CLAIM]
+    save_access(access, user)
+    return str(access)
+
+
+def save_refresh_session(refresh, user):
+    """save the refresh token as a session of the device, keep the latest REFRESH_SESSION_MAX_DEVICES sessions"""
+    refresh_session_model = get_refresh_session_model()
+    refresh_session_model.objects.create(user_id=user.id,
+                                         jti=refresh[api_settings.JTI_CLAIM],
+                                         digest=make_refresh_signature(str(refresh)),
+                                         expires_at=datetime.fromtimestamp(refresh['exp']))
+    expired = refresh_session_model.objects.filter(user_id=user.id).order_by('-id'). \
+        values_list('id', 'jti')[settings.REFRESH_SESSION_MAX_DEVICES:]
+    expired = list(expired)
+    if expired:
+        refresh_session_model.objects.filter(id__in=[item[0] for item in expired]).delete()
+        revoke_sessions(user.id, [item[1] for item in expired])
+
+
+def clean_refresh_session(batch_size=1000):
+    """delete the expired refresh sessions in batches"""
+    refresh_session_model = get_refresh_session_model()
+    cur_date = get_cur_date()
+    count = 0
+    while True:
+        ids = list(refresh_session_model.objects.filter(expires_at__lt=cur_date).
+                   values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return count
+        count += refresh_session_model.objects.filter(id__in=ids).delete()[0]
 
 
-def save_token(access_token, refresh_token, user):
-    access_signature = make_signature(access_token)
-    refresh_signature = make_refresh_signature(refresh_token)
-    user_model = get_user_model()
-    user_model.objects.filter(id=user.id).update(signature=access_signature, refresh_signature=refresh_signature)
+def save_token(access, refresh, user):
+    save_refresh_session(refresh, user)
+    save_access(access, user)
 
 
 def refresh_token_and_refresh_token(user):
     refresh = MyTokenObtainPairSerializer.get_token(user)
-    access_token = str(refresh.access_token)
-    refresh_token = str(refresh)
-    save_token(access_token, refresh_token, user)
-    return access_token, refresh_token
+    access = refresh.access_token
+    save_token(access, refresh, user)
+    return str(access), str(refresh)
 
 
 def clear_token(user):
+    """
+    revoke all the sessions of user, the signature and refresh_signature of meetings_user are cleared
+    even if the token session store is enabled, so the token signed before the store is revoked too.
+    """
+    refresh_session_model = get_refresh_session_model()
+    sids = list(refresh_session_model.objects.filter(user_id=user.id).values_list('jti', flat=True))
+    if token_session_store.enabled:
+        token_session_store.revoke(user.id, sids)
     user_model = get_user_model()
     user_model.objects.filter(id=user.id).update(signature="", refresh_signature="")
+    refresh_session_model.objects.filter(user_id=user.id).delete()
+    token_cache.invalidate_user(user.id)
 
 
 def encrypt_openid(encrypt_openid):
@@ -103,6 +182,10 @@ def decrypt_openid(decrypt_openid):
     return crypto_gcm.aes_gcm_decrypt(decrypt_openid, settings.AES_GCM_SECRET)
 
 
+def decrypt_openids(encrypt_openids):
+    return crypto_gcm.aes_gcm_decrypt_batch(encrypt_openids, settings.AES_GCM_SECRET)
+
+
 def gen_new_temp_dir():
     tmpdir = tempfile.gettempdir()
     while True:
@@ -13,10 +13,19 @@ def aes_gcm_encrypt(plaintext, secret, iv_str):
     return base64.b64encode(result).decode(encoding_utf8)
 
 
-def aes_gcm_decrypt(encrypted, secret_key):
+def _decrypt(encrypted, key):
     res_bytes = base64.b64decode(encrypted.encode(encoding_utf8))
     nonce = res_bytes[:12]
     ciphertext = res_bytes[12:-16]
     auth_tag = res_bytes[-16:]
-    aes_cipher = AES.new(base64.b64decode(secret_key), AES.MODE_GCM, nonce)
+    aes_cipher = AES.new(key, AES.MODE_GCM, nonce)
     return aes_cipher.decrypt_and_verify(ciphertext, auth_tag).decode(encoding_utf8)
+
+
+def aes_gcm_decrypt(encrypted, secret_key):
+    return _decrypt(encrypted, base64.b64decode(secret_key))
+
+
+def aes_gcm_decrypt_batch(encrypted_list, secret_key):
+    key = base64.b64decode(secret_key)
+    return [_decrypt(encrypted, key) for encrypted in encrypted_list]
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/22 15:20
+# @Author  : Tom_zc
+# @FileName: email_template.py
+# @Software: PyCharm
+import datetime
+import logging
+import os
+import re
+import threading
+import time
+
+import icalendar
+import pytz
+from django.conf import settings
+from icalendar.cal import types_factory
+from icalendar.parser import Contentline
+
+logger = logging.getLogger('log')
+
+PLACEHOLDER = re.compile(r'\{\{(\w+)\}\}')
+
+TEMPLATE_NOT_SUMMARY_NOT_RECORDING = 'not_summary_not_recording'
+TEMPLATE_SUMMARY_NOT_RECORDING = 'summary_not_recording'
+TEMPLATE_NOT_SUMMARY_RECORDING = 'not_summary_recording'
+TEMPLATE_SUMMARY_RECORDING = 'summary_recording'
+TEMPLATE_CANCEL_EMAIL = 'cancel_email'
+
+
+class CompiledTemplate:
+    """the template is split into the literals and the names of placeholder, so it is rendered in one pass"""
+
+    def __init__(self, content):
+        self.parts = PLACEHOLDER.split(content)
+
+    def render(self, context):
+        parts = self.parts[:]
+        for i in range(1, len(parts), 2):
+            name = parts[i]
+            parts[i] = str(context[name]) if name in context else '{{%s}}' % name
+        return ''.join(parts)
+
+
+class TemplateRegistry:
+    """the templates are compiled once, and compiled again when the mtime of the file changed"""
+
+    def __init__(self, check_interval=5):
+        self.check_interval = check_interval
+        self._paths = dict()
+        self._templates = dict()
+        self._lock = threading.Lock()
+
+    def register(self, name, path):
+        self._paths[name] = path
+        if path and os.path.exists(path):
+            self.load(name)
+
+    def load(self, name):
+        path = self._paths[name]
+        mtime = os.stat(path).st_mtime
+        with open(path, 'r', encoding='utf-8') as fp:
+            template = CompiledTemplate(fp.read())
+        with self._lock:
+            self._templates[name] = (template, mtime, time.monotonic())
+        logger.info('load the email template {}: {}'.format(name, path))
+        return template
+
+    def get(self, name):
+        item = self._templates.get(name)
+        if item is None:
+            return self.load(name)
+        template, mtime, checked_at = item
+        if time.monotonic() - checked_at < self.check_interval:
+            return template
+        path = self._paths[name]
+        if os.stat(path).st_mtime != mtime:
+            return self.load(name)
+        with self._lock:
+            self._templates[name] = (template, mtime, time.monotonic())
+        return template
+
+    def render(self, template_name, **context):
+        return self.get(template_name).render(context)
+
+
+def get_create_template_name(summary, record):
+    if summary and record:
+        return TEMPLATE_SUMMARY_RECORDING
+    if summary:
+        return TEMPLATE_SUMMARY_NOT_RECORDING
+    if record:
+        return TEMPLATE_NOT_SUMMARY_RECORDING
+    return TEMPLATE_NOT_SUMMARY_NOT_RECORDING
+
+
+template_registry = TemplateRegistry(check_interval=settings.TEMPLATE_RELOAD_INTERVAL)
+template_registry.register(TEMPLATE_NOT_SUMMARY_NOT_RECORDING, settings.TEMPLATE_NOT_SUMMARY_NOT_RECORDING)
+template_registry.register(TEMPLATE_SUMMARY_NOT_RECORDING, settings.TEMPLATE_SUMMARY_NOT_RECORDING)
+template_registry.register(TEMPLATE_NOT_SUMMARY_RECORDING, settings.TEMPLATE_NOT_SUMMARY_RECORDING)
+template_registry.register(TEMPLATE_SUMMARY_RECORDING, settings.TEMPLATE_SUMMARY_RECORDING)
+template_registry.register(TEMPLATE_CANCEL_EMAIL, settings.TEMPLATE_CANCEL_EMAIL)
+
+
+def get_utc_time(date, time_str):
+    """the time of meeting is Asia/Shanghai"""
+    return (datetime.datetime.strptime(date + ' ' + time_str, '%Y-%m-%d %H:%M') -
+            datetime.timedelta(hours=8)).replace(tzinfo=pytz.utc)
+
+
+class IcsTemplate:
+    """
+    the invariant part of the calendar(prodid, version, method and the alarm) is serialized once,
+    only the properties of the meeting are encoded in the order of icalendar and put into the skeleton.
+    """
+    MARKER = 'X-MEETING-PROPERTIES'
+
+    def __init__(self, prodid, method, alarm=False, sequence=None):
+        self.sequence = sequence
+        cal = icalendar.Calendar()
+        cal.add('prodid', prodid)
+        cal.add('version', '2.0')
+        cal.add('method', method)
+        event = icalendar.Event()
+        event.add(self.MARKER, '1')
+        if alarm:
+            reminder = icalendar.Alarm()
+            reminder.add('action', 'DISPLAY')
+            reminder.add('description', 'Reminder')
+            reminder.add('TRIGGER;RELATED=START', '-PT15M')
+            event.add_component(reminder)
+        cal.add_component(event)
+        self.head, self.tail = cal.to_ical().split('{}:1\r\n'.format(self.MARKER).encode())
+        names = ['ATTENDEE', 'SUMMARY', 'DTSTART', 'DTEND', 'DTSTAMP', 'UID']
+        if sequence is not None:
+            names.append('SEQUENCE')
+        self.names = sorted(names, key=self.sort_key)
+        self.types = {name: types_factory.for_property(name) for name in names}
+
+    @staticmethod
+    def sort_key(name):
+        order = icalendar.Event.canonical_order
+        return (0, order.index(name)) if name in order else (1, name)
+
+    def render(self, attendee, summary, dt_start, dt_end, uid):
+        """the datetimes must be utc"""
+        values = {'ATTENDEE': attendee, 'SUMMARY': summary, 'DTSTART': dt_start, 'DTEND': dt_end,
+                  'DTSTAMP': dt_start, 'UID': uid, 'SEQUENCE': self.sequence}
+        lines = list()
+        for name in self.names:
+            prop = self.types[name](values[name])
+            lines.append(Contentline.from_parts(name, prop.params, prop, sorted=True).to_ical())
+        return self.head + b'\r\n'.join(lines) + b'\r\n' + self.tail
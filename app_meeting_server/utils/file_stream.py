@@ -5,7 +5,8 @@
 # @Software: PyCharm
 import stat
 import os
-import requests
+
+from app_meeting_server.utils.http_client import get_client
 
 
 def write_content(path, content, model="wb"):
@@ -22,10 +23,8 @@ def read_content(path):
 
 
 def download_big_file(url, path, headers=None, model="wb"):
-    if headers:
-        r = requests.get(url, headers=headers, stream=True)
-    else:
-        r = requests.get(url, stream=True)
+    # the read timeout is the max interval between two chunks
+    r = get_client('download').get(url, headers=headers, stream=True, timeout=60)
     flags = os.O_CREAT | os.O_WRONLY
     modes = stat.S_IWUSR | stat.S_IRUSR
     with os.fdopen(os.open(path, flags, modes), model) as f:
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/24 10:40
+# @Author  : Tom_zc
+# @FileName: host_reservation.py
+# @Software: PyCharm
+import datetime
+import logging
+import random
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+logger = logging.getLogger('log')
+
+# the start and the end of meetings are in [0, 15, 30, 45]
+SLOT_MINUTES = 15
+# the meetings of the same host are at least 30 minutes apart, every meeting holds half of the gap on both sides
+GAP_MINUTES = 30
+
+
+def get_reservation_model():
+    return apps.get_model(get_user_model()._meta.app_label, 'HostReservation')
+
+
+def get_slots(date, start, end):
+    """the (date, slot) which the meeting holds, the slot is the index of SLOT_MINUTES in the day"""
+    half_gap = datetime.timedelta(minutes=GAP_MINUTES // 2)
+    start_time = datetime.datetime.strptime('{} {}'.format(date, start), '%Y-%m-%d %H:%M') - half_gap
+    end_time = datetime.datetime.strptime('{} {}'.format(date, end), '%Y-%m-%d %H:%M') + half_gap
+    step = datetime.timedelta(minutes=SLOT_MINUTES)
+    cur = start_time.replace(minute=start_time.minute - start_time.minute % SLOT_MINUTES)
+    slots = list()
+    while cur < end_time:
+        slots.append((cur.strftime('%Y-%m-%d'), (cur.hour * 60 + cur.minute) // SLOT_MINUTES))
+        cur += step
+    return slots
+
+
+class Reservation:
+    def __init__(self, reserver, host_id, token):
+        self.reserver = reserver
+        self.host_id = host_id
+        self.token = token
+
+    def bind(self, mid):
+        """bind the reservation to the created meeting, call it in the transaction of the meeting"""
+        self.reserver.model.objects.filter(token=self.token).update(mid=mid)
+
+    def release(self):
+        ret = self.reserver.model.objects.filter(token=self.token).delete()
+        logger.info('release the reservation of host {} and result is:{}'.format(self.host_id, str(ret)))
+
+
+class HostReserver:
+    """
+    reserve the slots of the host in the table with unique (platform, host_id, date, slot) before creating meeting.
+    1.the slots of one host are inserted in a short transaction, the concurrent request which gets the
+      IntegrityError tries the next host, so two meetings never get the same host at the same time.
+    2.the reservation is released when the platform fails, and it is bound to the meeting when created.
+    3.the reservation which is not bound in timeout seconds is left by the dead request, it is purged.
+    """
+
+    def __init__(self, timeout=600):
+        self.timeout = timeout
+
+    @property
+    def model(self):
+        return get_reservation_model()
+
+    def purge(self, platform):
+        expired = datetime.datetime.now() - datetime.timedelta(seconds=self.timeout)
+        today = datetime.datetime.now().strftime('%Y-%m-%d')
+        self.model.objects.filter(platform=platform).filter(
+            Q(mid__isnull=True, create_time__lt=expired) | Q(date__lt=today)).delete()
+
+    def reserve(self, platform, host_ids, date, start, end):
+        """return the Reservation of one host in host_ids, None if all hosts are reserved"""
+        self.purge(platform)
+        slots = get_slots(date, start, end)
+        candidates = list(host_ids)
+        random.SystemRandom().shuffle(candidates)
+        for host_id in candidates:
+            token = uuid.uuid4().hex
+            rows = [self.model(platform=platform, host_id=host_id, date=slot_date, slot=slot, token=token)
+                    for slot_date, slot in slots]
+            try:
+                with transaction.atomic():
+                    self.model.objects.bulk_create(rows)
+            except IntegrityError:
+                continue
+            return Reservation(self, host_id, token)
+        return None
+
+    def release_meeting(self, mid):
+        """release the slots of the canceled meeting, call it in the transaction of canceling"""
+        self.model.objects.filter(mid=mid).delete()
+
+
+host_reserver = HostReserver(timeout=settings.HOST_RESERVATION_TIMEOUT)
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/16 14:22
+# @Author  : Tom_zc
+# @FileName: http_client.py
+# @Software: PyCharm
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger('log')
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+RETRY_STATUS = (429, 502, 503, 504)
+
+
+class HttpClient:
+    """
+    the shared http client of a third-party platform.
+    1.the connections are kept alive in the pool of requests.Session, the session is rebuilt in the forked worker.
+    2.every request has the connect and read timeout, the default can be overridden by the endpoint.
+    3.only the idempotent request is retried with jittered backoff, the others are retried only when connect timeout.
+    """
+
+    def __init__(self, platform, connect_timeout=3, read_timeout=10, retries=2, backoff=0.2, pool_maxsize=10):
+        self.platform = platform
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_maxsize = pool_maxsize
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.retried = 0
+        self.timeouts = 0
+        self.latency = 0.0
+        self.max_latency = 0.0
+
+    @property
+    def session(self):
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=0)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+                    self._pid = os.getpid()
+        return self._session
+
+    def get_timeout(self, timeout):
+        if timeout is None:
+            return self.timeout
+        if isinstance(timeout, (int, float)):
+            return self.timeout[0], timeout
+        return timeout
+
+    def get_backoff(self, attempt):
+        # full jitter, avoid the retries of all workers hitting the upstream at the same time
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    def record(self, cost, error=False, timeout=False, retried=False):
+        with self._lock:
+            self.calls += 1
+            self.latency += cost
+            self.max_latency = max(self.max_latency, cost)
+            if error:
+                self.errors += 1
+            if timeout:
+                self.timeouts += 1
+            if retried:
+                self.retried += 1
+
+    def request(self, method, url, timeout=None, retries=None, **kwargs):
+        """timeout: read timeout or (connect timeout, read timeout), retries: the max retries of the request"""
+        method = method.upper()
+        timeout = self.get_timeout(timeout)
+        retries = self.retries if retries is None else retries
+        idempotent = method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except requests.exceptions.ConnectTimeout as e:
+                can_retry = attempt < retries
+                self.record(time.monotonic() - start, error=True, timeout=True, retried=can_retry)
+                if not can_retry:
+                    raise
+                logger.warning('[{}] {} {} connect timeout, retry and e:{}'.format(self.platform, method, url, e))
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                can_retry = idempotent and attempt < retries
+                is_timeout = isinstance(e, requests.exceptions.Timeout)
+                self.record(time.monotonic() - start, error=True, timeout=is_timeout, retried=can_retry)
+                if not can_retry:
+                    raise
+                logger.warning('[{}] {} {} failed, retry and e:{}'.format(self.platform, method, url, e))
+            else:
+                can_retry = idempotent and attempt < retries and response.status_code in RETRY_STATUS
+                self.record(time.monotonic() - start, error=response.status_code >= 500, retried=can_retry)
+                if not can_retry:
+                    return response
+                logger.warning('[{}] {} {} status_code: {}, retry'.format(self.platform, method, url,
+                                                                          response.status_code))
+                response.close()
+            time.sleep(self.get_backoff(attempt))
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request('PATCH', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'platform': self.platform,
+                'calls': self.calls,
+                'errors': self.errors,
+                'retried': self.retried,
+                'timeouts': self.timeouts,
+                'avg_latency': self.latency / self.calls if self.calls else 0.0,
+                'max_latency': self.max_latency,
+            }
+
+
+_clients = dict()
+_clients_lock = threading.Lock()
+
+
+def get_client(platform):
+    """get the shared client of platform: wx, zoom, tencent, welink, download"""
+    client = _clients.get(platform)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(platform)
+            if client is None:
+                client = HttpClient(platform,
+                                    connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+                                    read_timeout=settings.HTTP_READ_TIMEOUT,
+                                    retries=settings.HTTP_RETRIES,
+                                    backoff=settings.HTTP_RETRY_BACKOFF,
+                                    pool_maxsize=settings.HTTP_POOL_MAXSIZE)
+                _clients[platform] = client
+    return client
+
+
+def get_stats():
+    with _clients_lock:
+        return [client.stats() for client in _clients.values()]
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/18 10:20
+# @Author  : Tom_zc
+# @FileName: job_queue.py
+# @Software: PyCharm
+import json
+import logging
+import os
+import random
+import secrets
+import signal
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger('log')
+
+STATUS_PENDING = 0
+STATUS_RUNNING = 1
+STATUS_DONE = 2
+STATUS_DEAD = 3
+
+_handlers = dict()
+
+
+class JobLostError(Exception):
+    """the claim of the job has expired and the job has been claimed by another worker"""
+    pass
+
+
+def register(name, bind=False):
+    """register the handler of job, handler(payload) raise exception to retry, handler(payload, job) if bind"""
+
+    def decorator(func):
+        _handlers[name] = (func, bind)
+        return func
+
+    return decorator
+
+
+def get_handler(name):
+    return _handlers.get(name, (None, False))
+
+
+def get_job_model():
+    return apps.get_model(get_user_model()._meta.app_label, 'Job')
+
+
+def enqueue(name, payload, max_attempts=None, delay=0, stages=None):
+    """
+    insert the job into the outbox, call it in the transaction of the business data,
+    so the job is visible to the worker only when the transaction is committed.
+    """
+    job_model = get_job_model()
+    progress = None
+    if stages:
+        progress = json.dumps({stage: {'status': 'pending'} for stage in stages})
+    return job_model.objects.create(name=name,
+                                    payload=json.dumps(payload),
+                                    progress=progress,
+                                    max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+                                    available_at=timezone.now() + timedelta(seconds=delay))
+
+
+class JobProgress:
+    """
+    record the status of every stage of the job, the done stages are skipped when the job is retried.
+    every save extends the claim of the worker, so the job which saves its progress is never claimed twice.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.stages = json.loads(job.progress or '{}')
+
+    def save(self):
+        """raise JobLostError if the job has been claimed by another worker, the handler stops then"""
+        job = self.job
+        values = {'progress': json.dumps(self.stages)}
+        visibility_timeout = getattr(job, 'visibility_timeout', None)
+        if not visibility_timeout:
+            type(job).objects.filter(id=job.id).update(**values)
+            return
+        values['available_at'] = timezone.now() + timedelta(seconds=visibility_timeout)
+        if type(job).objects.filter(id=job.id, locked_by=job.locked_by).update(**values) == 0:
+            raise JobLostError('job {} has been claimed by another worker'.format(job.id))
+
+    def get_checkpoint(self, name):
+        return (self.stages.get(name) or dict()).get('checkpoint')
+
+    def checkpoint(self, name, value):
+        """save the position of the running stage, the retried stage resumes from it"""
+        self.stages[name]['checkpoint'] = value
+        self.save()
+
+    def run(self, name, func, *args, **kwargs):
+        """the return value of func is saved as the result of stage, it should be serializable"""
+        stage = self.stages.get(name) or dict()
+        if stage.get('status') == 'done':
+            return stage.get('result')
+        self.stages[name] = {'status': 'running', 'checkpoint': stage.get('checkpoint')}
+        self.save()
+        start = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.stages[name] = {'status': 'failed', 'cost': time.monotonic() - start, 'error': str(e),
+                                 'checkpoint': self.stages[name].get('checkpoint')}
+            self.save()
+            raise
+        self.stages[name] = {'status': 'done', 'cost': time.monotonic() - start, 'result': result}
+        self.save()
+        return result
+
+
+def get_backoff(attempts):
+    backoff = min(settings.JOB_RETRY_BACKOFF * (2 ** (attempts - 1)), settings.JOB_RETRY_BACKOFF_MAX)
+    return backoff * random.uniform(0.5, 1.5)
+
+
+class JobWorker:
+    """
+    consume the jobs with a bounded thread pool.
+    1.the job is claimed by setting available_at to now + visibility_timeout and locked_by to the token of the claim,
+      the claim is extended by JobProgress.save, if the worker died, the job will be claimed again when it expired.
+    2.the failed job is retried with exponential backoff, it is dead-lettered when it reaches max_attempts,
+      the expired job which has reached max_attempts is dead-lettered instead of claimed.
+    """
+
+    def __init__(self, concurrency=4, visibility_timeout=300, poll_interval=1, retention_days=7):
+        self.concurrency = concurrency
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.retention_days = retention_days
+        self.worker_id = '{}:{}'.format(socket.gethostname(), os.getpid())[:55]
+        self.job_model = get_job_model()
+        self._running = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self.done = 0
+        self.failed = 0
+
+    def claim(self, limit):
+        now = timezone.now()
+        locked_by = '{}:{}'.format(self.worker_id, secrets.token_hex(4))
+        with transaction.atomic():
+            rows = list(self.job_model.objects.select_for_update(skip_locked=True).filter(
+                Q(status=STATUS_PENDING) | Q(status=STATUS_RUNNING), available_at__lte=now
+            ).order_by('available_at').values_list('id', 'attempts', 'max_attempts')[:limit])
+            if not rows:
+                return list()
+            dead_ids = [job_id for job_id, attempts, max_attempts in rows if attempts >= max_attempts]
+            if dead_ids:
+                # the worker was lost in the last attempt
+                self.job_model.objects.filter(id__in=dead_ids).update(
+                    status=STATUS_DEAD, last_error='the claim expired in the last attempt')
+                logger.error('jobs {} are dead, the claims expired in the last attempts'.format(dead_ids))
+            ids = [job_id for job_id, attempts, max_attempts in rows if attempts < max_attempts]
+            if not ids:
+                return list()
+            self.job_model.objects.filter(id__in=ids).update(
+                status=STATUS_RUNNING, locked_by=locked_by, attempts=F('attempts') + 1,
+                available_at=now + timedelta(seconds=self.visibility_timeout))
+        jobs = list(self.job_model.objects.filter(id__in=ids, locked_by=locked_by))
+        for job in jobs:
+            job.visibility_timeout = self.visibility_timeout
+        return jobs
+
+    def execute(self, job):
+        close_old_connections()
+        start = time.monotonic()
+        try:
+            handler, bind = get_handler(job.name)
+            if handler is None:
+                raise ValueError('Unknown job: {}'.format(job.name))
+            if bind:
+                handler(json.loads(job.payload), job)
+            else:
+                handler(json.loads(job.payload))
+        except Exception as e:
+            cost = time.monotonic() - start
+            self.on_failure(job, e, cost)
+        else:
+            cost = time.monotonic() - start
+            if self.job_model.objects.filter(id=job.id, locked_by=job.locked_by).update(
+                    status=STATUS_DONE, cost=cost, last_error=None) == 0:
+                logger.error('job {}({}) is done after it has been claimed by another worker'.format(job.id, job.name))
+                return
+            with self._lock:
+                self.done += 1
+            logger.info('job {}({}) done, attempts: {}, cost: {:.3f}s'.format(job.id, job.name, job.attempts, cost))
+        finally:
+            with self._lock:
+                self._running -= 1
+            close_old_connections()
+
+    def on_failure(self, job, e, cost):
+        error = '{}\n{}'.format(e, traceback.format_exc())
+        with self._lock:
+            self.failed += 1
+        if isinstance(e, JobLostError):
+            logger.error('job {}({}) stopped, e:{}'.format(job.id, job.name, e))
+            return
+        if job.attempts >= job.max_attempts:
+            self.job_model.objects.filter(id=job.id, locked_by=job.locked_by).update(
+                status=STATUS_DEAD, cost=cost, last_error=error)
+            logger.error('job {}({}) is dead after {} attempts, e:{}'.format(job.id, job.name, job.attempts, e))
+            return
+        backoff = get_backoff(job.attempts)
+        self.job_model.objects.filter(id=job.id, locked_by=job.locked_by).update(
+            status=STATUS_PENDING, cost=cost, last_error=error,
+            available_at=timezone.now() + timedelta(seconds=backoff))
+        logger.warning('job {}({}) failed, retry in {:.1f}s, e:{}'.format(job.id, job.name, backoff, e))
+
+    def purge(self):
+        before = timezone.now() - timedelta(days=self.retention_days)
+        ret = self.job_model.objects.filter(status=STATUS_DONE, update_time__lt=before).delete()
+        logger.info('purge the done jobs and result is:{}'.format(str(ret)))
+
+    def stop(self, *args):
+        logger.info('job worker {} is stopping'.format(self.worker_id))
+        self._stopped.set()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        last_purge = None
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job-worker') as executor:
+            while not self._stopped.is_set():
+                if last_purge is None or time.monotonic() - last_purge > 3600:
+                    last_purge = time.monotonic()
+                    self.purge()
+                with self._lock:
+                    free = self.concurrency - self._running
+                jobs = self.claim(free) if free > 0 else list()
+                for job in jobs:
+                    with self._lock:
+                        self._running += 1
+                    executor.submit(self.execute, job)
+                if len(jobs) < free or free <= 0:
+                    self._stopped.wait(self.poll_interval)
+        logger.info('job worker {} stopped, done: {}, failed: {}'.format(self.worker_id, self.done, self.failed))
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/25 15:30
+# @Author  : Tom_zc
+# @FileName: list_prefetch.py
+# @Software: PyCharm
+from django.db import models
+from rest_framework import serializers
+
+
+def get_request_user_id(context):
+    """the id of the user of the request, None for the anonymous request"""
+    request = context.get('request')
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None
+    return user.id
+
+
+def get_collection_map(collect_model, field, user_id, ids):
+    """{object id: collection id} of the user in one query, the first collection of the object is kept"""
+    if user_id is None or not ids:
+        return dict()
+    ret = dict()
+    collections = collect_model.objects.filter(user_id=user_id, **{'{}__in'.format(field): ids}).order_by('id') \
+        .values_list('id', field)
+    for collection_id, obj_id in collections:
+        ret.setdefault(obj_id, collection_id)
+    return ret
+
+
+class PrefetchListSerializer(serializers.ListSerializer):
+    """
+    the page is passed to child.prefetch before serializing, so the child resolves the related data of
+    all rows with set-based queries and serializes every row from the lookup maps.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        items = list(iterable)
+        self.child.prefetch(items)
+        return [self.child.to_representation(item) for item in items]
+
+
+class PrefetchSerializerMixin:
+    """the maps are filled by prefetch, the single object is prefetched by itself"""
+    prefetched = None
+
+    def prefetch(self, items):
+        self.prefetched = self.get_prefetched(items)
+
+    def get_prefetched(self, items):
+        return dict()
+
+    def get_prefetched_value(self, name, obj, key, default=None):
+        prefetched = self.prefetched if self.prefetched is not None else self.get_prefetched([obj])
+        return prefetched[name].get(key, default)
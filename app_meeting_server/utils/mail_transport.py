@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/22 10:15
+# @Author  : Tom_zc
+# @FileName: mail_transport.py
+# @Software: PyCharm
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger('log')
+
+# the connection is broken, the message can be sent again with a new connection
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+def is_broken(e):
+    """the connection is broken, or the server replies 421 and smtplib has closed the connection"""
+    if isinstance(e, RECONNECT_ERRORS):
+        return True
+    if isinstance(e, smtplib.SMTPRecipientsRefused):
+        return any(code == 421 for code, _ in e.recipients.values())
+    return isinstance(e, smtplib.SMTPResponseException) and e.smtp_code == 421
+
+
+class SmtpConnection:
+    def __init__(self, server):
+        self.server = server
+        self.created_at = time.monotonic()
+        self.used_at = self.created_at
+        self.sent = 0
+
+    def close(self):
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+
+
+class SmtpConnectionPool:
+    """
+    the pool of the authenticated smtp connections.
+    1.the connection is reused by the following messages, it is rebuilt in the forked worker.
+    2.the connection which is idle more than noop_after seconds is checked by NOOP before it is reused,
+      the connection which is idle more than max_idle seconds is closed, the server may have dropped it.
+    3.the message is sent again with a new connection once when the connection is broken,
+      including the 421 reply, smtplib closes the connection after it.
+    """
+
+    def __init__(self, host, port, user=None, password=None, starttls=True, timeout=10, pool_size=2,
+                 noop_after=30, max_idle=300):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.noop_after = noop_after
+        self.max_idle = max_idle
+        self._idle = queue.LifoQueue()
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.reuses = 0
+        self.noops = 0
+        self.reconnects = 0
+        self.sent = 0
+
+    def connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.ehlo()
+            if self.starttls:
+                server.starttls()
+                server.ehlo()
+            if self.user:
+                server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        with self._lock:
+            self.connects += 1
+        return SmtpConnection(server)
+
+    def is_alive(self, conn):
+        idle = time.monotonic() - conn.used_at
+        if idle > self.max_idle:
+            return False
+        if idle <= self.noop_after:
+            return True
+        with self._lock:
+            self.noops += 1
+        try:
+            return conn.server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def acquire(self):
+        if self._pid != os.getpid():
+            # the connections of the parent process can not be shared
+            self._idle = queue.LifoQueue()
+            self._pid = os.getpid()
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self.connect()
+            if self.is_alive(conn):
+                with self._lock:
+                    self.reuses += 1
+                return conn
+            conn.close()
+
+    def release(self, conn, broken=False):
+        if broken or self._idle.qsize() >= self.pool_size:
+            conn.close()
+            return
+        conn.used_at = time.monotonic()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        broken = True
+        try:
+            yield conn
+            broken = False
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as e:
+            # the message is refused, the connection is still usable unless the server closes it by 421
+            broken = is_broken(e)
+            raise
+        finally:
+            self.release(conn, broken)
+
+    def _send(self, conn, sender, to_addrs, msg):
+        ret = conn.server.sendmail(sender, to_addrs, msg)
+        conn.sent += 1
+        with self._lock:
+            self.sent += 1
+        return ret
+
+    def send(self, sender, to_addrs, msg):
+        """send one message, return the refused recipients like smtplib.SMTP.sendmail"""
+        try:
+            with self.connection() as conn:
+                return self._send(conn, sender, to_addrs, msg)
+        except RECONNECT_ERRORS + (smtplib.SMTPException,) as e:
+            if not is_broken(e):
+                raise
+            logger.warning('the smtp connection is broken, reconnect and e:{}'.format(e))
+            with self._lock:
+                self.reconnects += 1
+        with self.connection() as conn:
+            return self._send(conn, sender, to_addrs, msg)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def stats(self):
+        with self._lock:
+            return {
+                'connects': self.connects,
+                'reuses': self.reuses,
+                'noops': self.noops,
+                'reconnects': self.reconnects,
+                'sent': self.sent,
+                'idle': self._idle.qsize(),
+            }
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_mail_transport():
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = SmtpConnectionPool(settings.SMTP_SERVER_HOST, settings.SMTP_SERVER_PORT,
+                                                user=settings.SMTP_SERVER_USER,
+                                                password=settings.SMTP_SERVER_PASS,
+                                                starttls=settings.SMTP_STARTTLS,
+                                                timeout=settings.SMTP_TIMEOUT,
+                                                pool_size=settings.SMTP_POOL_SIZE,
+                                                noop_after=settings.SMTP_NOOP_AFTER,
+                                                max_idle=settings.SMTP_MAX_IDLE)
+    return _transport
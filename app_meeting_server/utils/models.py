@@ -3,6 +3,7 @@
 # @Author  : Tom_zc
 # @FileName: models.py
 # @Software: PyCharm
+import datetime
 import unicodedata
 from django.db import models
 
@@ -85,7 +86,158 @@ class BaseUser(MyAbstractBaseUser):
         abstract = True
 
 
-class BaseMeeting(models.Model):
+class BaseRefreshSession(models.Model):
+    jti = models.CharField(verbose_name='刷新令牌id', max_length=64, unique=True)
+    digest = models.CharField(verbose_name='刷新签名', max_length=255)
+    access_jti = models.CharField(verbose_name='访问令牌id', max_length=64, null=True, blank=True)
+    expires_at = models.DateTimeField(verbose_name='过期时间', db_index=True)
+    create_time = models.DateTimeField(verbose_name='创建时间', auto_now_add=True)
+
+    class Meta:
+        abstract = True
+
+
+class BaseJob(models.Model):
+    name = models.CharField(verbose_name='任务名称', max_length=64, db_index=True)
+    payload = models.TextField(verbose_name='任务参数', default='{}')
+    status = models.SmallIntegerField(verbose_name='状态',
+                                      choices=((0, '待执行'), (1, '执行中'), (2, '已完成'), (3, '死信')), default=0)
+    attempts = models.SmallIntegerField(verbose_name='执行次数', default=0)
+    max_attempts = models.SmallIntegerField(verbose_name='最大执行次数', default=5)
+    available_at = models.DateTimeField(verbose_name='可执行时间')
+    locked_by = models.CharField(verbose_name='执行者', max_length=64, null=True, blank=True)
+    last_error = models.TextField(verbose_name='错误信息', null=True, blank=True)
+    progress = models.TextField(verbose_name='阶段进度', null=True, blank=True)
+    cost = models.FloatField(verbose_name='耗时', null=True, blank=True)
+    create_time = models.DateTimeField(verbose_name='创建时间', auto_now_add=True)
+    update_time = models.DateTimeField(verbose_name='更新时间', auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class BaseMeetingChange(models.Model):
+    meeting_id = models.IntegerField(verbose_name='会议id')
+    action = models.CharField(verbose_name='变更类型', max_length=16)
+    create_time = models.DateTimeField(verbose_name='创建时间', auto_now_add=True)
+
+    class Meta:
+        abstract = True
+
+
+class BaseReminderLedger(models.Model):
+    meeting_id = models.IntegerField(verbose_name='会议id')
+    offset = models.IntegerField(verbose_name='提前提醒分钟数')
+    fire_at = models.DateTimeField(verbose_name='提醒时间')
+    create_time = models.DateTimeField(verbose_name='创建时间', auto_now_add=True)
+
+    class Meta:
+        abstract = True
+
+
+class BaseParticipants(models.Model):
+    mid = models.CharField(verbose_name='会议id', max_length=20, unique=True)
+    content = models.TextField(verbose_name='参会者信息')
+    create_time = models.DateTimeField(verbose_name='创建时间', auto_now_add=True)
+    update_time = models.DateTimeField(verbose_name='更新时间', auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class BaseHostReservation(models.Model):
+    platform = models.CharField(verbose_name='会议平台', max_length=20)
+    host_id = models.CharField(verbose_name='host_id', max_length=254)
+    date = models.CharField(verbose_name='会议日期', max_length=30)
+    slot = models.SmallIntegerField(verbose_name='时间片')
+    token = models.CharField(verbose_name='预定标识', max_length=32, db_index=True)
+    mid = models.CharField(verbose_name='会议id', max_length=20, null=True, blank=True, db_index=True)
+    create_time = models.DateTimeField(verbose_name='创建时间', auto_now_add=True)
+
+    class Meta:
+        abstract = True
+
+
+def parse_date(value):
+    try:
+        return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_time(value):
+    try:
+        return datetime.datetime.strptime(value, '%H:%M').time()
+    except (TypeError, ValueError):
+        return None
+
+
+class ScheduleQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # bulk_update passes the typed fields with the CharFields
+        values = {field: kwargs[field] for field, (typed_field, _) in self.model.SCHEDULE_FIELDS.items()
+                  if field in kwargs and typed_field not in kwargs}
+        kwargs.update(self.model.get_schedule_values(values))
+        return super(ScheduleQuerySet, self).update(**kwargs)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.set_schedule_values()
+        return super(ScheduleQuerySet, self).bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.set_schedule_values()
+        fields = set(fields) | self.model.get_typed_fields(fields)
+        return super(ScheduleQuerySet, self).bulk_update(objs, fields, *args, **kwargs)
+
+
+class ScheduleModel(models.Model):
+    """
+    the date and the time of the schedule are kept in CharField, the typed shadow fields are written with them,
+    so the range queries use the typed fields and the indexes on them.
+    the shadow fields are parsed from the values in python, so the CharFields can not be written by expressions.
+    """
+    # {the CharField: (the typed shadow field, the parser)}
+    SCHEDULE_FIELDS = dict()
+
+    objects = ScheduleQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def get_schedule_values(cls, values):
+        ret = dict()
+        for field, (typed_field, parser) in cls.SCHEDULE_FIELDS.items():
+            if field not in values:
+                continue
+            if hasattr(values[field], 'resolve_expression'):
+                raise ValueError('{} can not be written by the expression, {} is parsed from the value'.format(
+                    field, typed_field))
+            ret[typed_field] = parser(values[field])
+        return ret
+
+    @classmethod
+    def get_typed_fields(cls, fields):
+        return set(typed_field for field, (typed_field, _) in cls.SCHEDULE_FIELDS.items() if field in fields)
+
+    def set_schedule_values(self):
+        values = self.get_schedule_values({field: getattr(self, field) for field in self.SCHEDULE_FIELDS})
+        for typed_field, value in values.items():
+            setattr(self, typed_field, value)
+
+    def save(self, *args, **kwargs):
+        self.set_schedule_values()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | self.get_typed_fields(update_fields)
+        super(ScheduleModel, self).save(*args, **kwargs)
+
+
+class BaseMeeting(ScheduleModel):
     topic = models.CharField(verbose_name='会议主题', max_length=128)
     community = models.CharField(verbose_name='社区', max_length=40, null=True, blank=True)
     group_name = models.CharField(verbose_name='SIG组', max_length=40, default='')
@@ -98,17 +250,26 @@ class BaseMeeting(models.Model):
     etherpad = models.CharField(verbose_name='etherpad', max_length=255, null=True, blank=True)
     emaillist = models.TextField(verbose_name='邮件列表', null=True, blank=True)
     host_id = models.EmailField(verbose_name='host_id', null=True, blank=True)
-    mid = models.CharField(verbose_name='会议id', max_length=20)
+    mid = models.CharField(verbose_name='会议id', max_length=20, db_index=True)
     mmid = models.CharField(verbose_name='腾讯会议id', max_length=20, null=True, blank=True)
     join_url = models.CharField(verbose_name='进入会议url', max_length=128, null=True, blank=True)
     create_time = models.DateTimeField(verbose_name='创建时间', auto_now_add=True, null=True, blank=True)
     is_delete = models.SmallIntegerField(verbose_name='是否删除', choices=((0, '否'), (1, '是')), default=0)
+    meeting_date = models.DateField(verbose_name='会议日期', null=True, blank=True, editable=False)
+    start_time = models.TimeField(verbose_name='会议开始时间', null=True, blank=True, editable=False)
+    end_time = models.TimeField(verbose_name='会议结束时间', null=True, blank=True, editable=False)
+
+    SCHEDULE_FIELDS = {
+        'date': ('meeting_date', parse_date),
+        'start': ('start_time', parse_time),
+        'end': ('end_time', parse_time),
+    }
 
     class Meta:
         abstract = True
 
 
-class BaseActivity(models.Model):
+class BaseActivity(ScheduleModel):
     title = models.CharField(verbose_name='活动标题', max_length=50)
     activity_type = models.SmallIntegerField(verbose_name='活动类型', choices=((1, '线下'), (2, '线上'), (3, '线上与线下')))
     address = models.CharField(verbose_name='地理位置', max_length=100, null=True, blank=True)
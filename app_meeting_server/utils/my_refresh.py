@@ -9,6 +9,9 @@ from rest_framework_simplejwt.serializers import TokenObtainSerializer
 from rest_framework_simplejwt.tokens import Token
 from rest_framework_simplejwt.settings import api_settings
 
+# the claim of access token which is the jti of its refresh session, the access token is valid with the session
+SESSION_CLAIM = 'sid'
+
 
 class MyToken(Token):
     def set_jti(self):
@@ -55,6 +58,7 @@ class MyRefreshToken(MyToken):
             if claim in no_copy:
                 continue
             access[claim] = value
+        access[SESSION_CLAIM] = self[api_settings.JTI_CLAIM]
 
         return access
 
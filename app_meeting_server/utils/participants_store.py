@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/23 10:30
+# @Author  : Tom_zc
+# @FileName: participants_store.py
+# @Software: PyCharm
+import datetime
+import json
+import logging
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+
+from app_meeting_server.utils.local_cache import LocalCache
+
+logger = logging.getLogger('log')
+
+
+def get_participants_model():
+    return apps.get_model(get_user_model()._meta.app_label, 'Participants')
+
+
+def get_cache_age(cached_at):
+    """the seconds since the participants were fetched from the platform, 0 if they are fetched just now"""
+    if cached_at is None:
+        return 0
+    return max(int((datetime.datetime.now() - cached_at).total_seconds()), 0)
+
+
+def is_empty(res):
+    """the platform may return no participants before the report of the meeting is indexed"""
+    return not isinstance(res, dict) or not res.get('participants')
+
+
+class ParticipantsStore:
+    """
+    the participants of the finished meeting never change, they are kept in the table and the process-local lru.
+    1.the meeting is finished when it has ended for settle_minutes, the report of the platform is complete then.
+    2.the participants of the meeting which is not finished are fetched from the platform every time.
+    3.the empty participants are not kept, they are fetched from the platform again.
+    """
+
+    def __init__(self, fetch, settle_minutes=30, maxsize=1024, ttl=3600):
+        self.fetch = fetch
+        self.settle = datetime.timedelta(minutes=settle_minutes)
+        self.cache = LocalCache(maxsize=maxsize, ttl=ttl)
+        self.fetches = 0
+
+    def get_finished_time(self, date, end):
+        try:
+            return datetime.datetime.strptime('{} {}'.format(date, end), '%Y-%m-%d %H:%M') + self.settle
+        except (TypeError, ValueError):
+            return None
+
+    def get_delay(self, date, end):
+        """the seconds from now to the time when the meeting is finished"""
+        finished_time = self.get_finished_time(date, end)
+        if finished_time is None:
+            return 0
+        return max((finished_time - datetime.datetime.now()).total_seconds(), 0)
+
+    def is_finished(self, date, end):
+        finished_time = self.get_finished_time(date, end)
+        return finished_time is not None and finished_time <= datetime.datetime.now()
+
+    def save(self, mid, res):
+        model = get_participants_model()
+        obj, _ = model.objects.update_or_create(mid=mid, defaults={'content': json.dumps(res)})
+        self.cache.set(mid, (res, obj.update_time))
+
+    def get(self, mid, date, end):
+        """return (status, res, cached_at), cached_at is None if res is fetched from the platform"""
+        item = self.cache.get(mid)
+        if item is not None:
+            return 200, item[0], item[1]
+        finished = self.is_finished(date, end)
+        if finished:
+            row = get_participants_model().objects.filter(mid=mid).values('content', 'update_time').first()
+            if row is not None:
+                res = json.loads(row['content'])
+                self.cache.set(mid, (res, row['update_time']))
+                return 200, res, row['update_time']
+        self.fetches += 1
+        status, res = self.fetch(mid)
+        if status == 200 and finished and not is_empty(res):
+            self.save(mid, res)
+        return status, res, None
+
+    def fill(self, mid, date, end):
+        """fetch and save the participants of the finished meeting, raise exception to retry"""
+        if get_participants_model().objects.filter(mid=mid).exists():
+            return
+        if not self.is_finished(date, end):
+            raise RuntimeError('meeting {} is not finished'.format(mid))
+        self.fetches += 1
+        status, res = self.fetch(mid)
+        if status is None:
+            logger.info('the platform of meeting {} does not support participants'.format(mid))
+            return
+        if status != 200:
+            raise RuntimeError('fail to get participants of meeting {}, status: {}'.format(mid, status))
+        if is_empty(res):
+            raise RuntimeError('the participants of meeting {} are empty'.format(mid))
+        self.save(mid, res)
+
+    def stats(self):
+        ret = self.cache.stats()
+        ret['fetches'] = self.fetches
+        return ret
@@ -1,130 +1,157 @@
 import logging
 from django.conf import settings
 from rest_framework import permissions
-from django.contrib.auth import get_user_model
-
-User = get_user_model()
 
 logger = logging.getLogger('log')
 
 
-class MaintainerPermission(permissions.IsAuthenticated):
-    """Maintainer权限"""
-    message = '需要Maintainer权限！！！'
-    level = 2
+class Role:
+    """the role of user, it can be composed like: Level(2) | Level(3)"""
+
+    def check(self, user):
+        raise NotImplementedError
+
+    def __or__(self, other):
+        return AnyRole(self, other)
+
+    def __and__(self, other):
+        return AllRole(self, other)
+
+    def __eq__(self, other):
+        return type(self) == type(other) and self.__dict__ == other.__dict__
+
+    def __hash__(self):
+        return hash(repr(self))
+
+
+class Level(Role):
+    """会议权限"""
+
+    def __init__(self, level):
+        self.level = level
+
+    def check(self, user):
+        return user.level == self.level
+
+    def __repr__(self):
+        return 'Level({})'.format(self.level)
+
+
+class ActivityLevel(Role):
+    """活动权限"""
+
+    def __init__(self, activity_level):
+        self.activity_level = activity_level
+
+    def check(self, user):
+        return user.activity_level == self.activity_level
+
+    def __repr__(self):
+        return 'ActivityLevel({})'.format(self.activity_level)
+
+
+class AnyRole(Role):
+    def __init__(self, *roles):
+        self.roles = roles
+
+    def check(self, user):
+        return any(role.check(user) for role in self.roles)
+
+    def __repr__(self):
+        return '({})'.format(' | '.join(repr(role) for role in self.roles))
+
+
+class AllRole(Role):
+    def __init__(self, *roles):
+        self.roles = roles
+
+    def check(self, user):
+        return all(role.check(user) for role in self.roles)
+
+    def __repr__(self):
+        return '({})'.format(' & '.join(repr(role) for role in self.roles))
+
+
+class PermissionContext:
+    """the permission context of a request, every role is evaluated once by the authenticated user"""
+
+    def __init__(self, user):
+        self.user = user
+        self.decisions = dict()
+
+    def check(self, role):
+        decision = self.decisions.get(role)
+        if decision is None:
+            decision = role.check(self.user)
+            self.decisions[role] = decision
+        return decision
+
+
+def get_permission_context(request):
+    context = getattr(request, '_permission_context', None)
+    if context is None or context.user is not request.user:
+        context = PermissionContext(request.user)
+        request._permission_context = context
+    return context
+
+
+class RolePermission(permissions.IsAuthenticated):
+    """根据角色校验权限, 不查询数据库"""
+    role = None
 
     def has_permission(self, request, view):  # 对于列表的访问权限
-        if request.user.is_anonymous:
+        if not request.user or request.user.is_anonymous:
             logger.error("user:{} is anonymous".format(str(request.user.id)))
             return False
-        if not request.user.level:
-            logger.error("user:{} has no permission".format(str(request.user.id)))
-            return False
-        if request.user.level == self.level:
-            if User.objects.get(id=request.user.id, level=request.user.level):
-                return True
-            else:
-                logger.error("user:{} has no permission".format(str(request.user.id)))
-                return False
-        else:
+        if not get_permission_context(request).check(self.role):
             logger.error("user:{} has no permission".format(str(request.user.id)))
             return False
+        return True
 
     def has_object_permission(self, request, view, obj):  # 对于对象的访问权限
         return self.has_permission(request, view)
 
 
-class SponsorPermission(permissions.IsAuthenticated):
+class MaintainerPermission(RolePermission):
+    """Maintainer权限"""
+    message = '需要Maintainer权限！！！'
+    level = 2
+    role = Level(2)
+
+
+class SponsorPermission(RolePermission):
     """活动发起人权限"""
     message = '需要活动发起人权限'
     activity_level = 2
-
-    def has_permission(self, request, view):  # 对于列表的访问权限
-        if request.user.is_anonymous:
-            logger.error("user:{} is anonymous".format(str(request.user.id)))
-            return False
-        if not request.user.activity_level:
-            logger.error("user:{} has no permission".format(str(request.user.id)))
-            return False
-        if request.user.activity_level == self.activity_level:
-            if User.objects.get(id=request.user.id, activity_level=request.user.activity_level):
-                return True
-            else:
-                logger.error("user:{} has no permission".format(str(request.user.id)))
-                return False
-        else:
-            logger.error("user:{} has no permission".format(str(request.user.id)))
-            return False
-
-    def has_object_permission(self, request, view, obj):  # 对于对象的访问权限
-        return self.has_permission(request, view)
+    role = ActivityLevel(2)
 
 
 class MeetigsAdminPermission(MaintainerPermission):
     """会议管理员权限"""
     message = '需要会议管理员权限！！！'
     level = 3
+    role = Level(3)
 
 
 class ActivityAdminPermission(SponsorPermission):
     """活动管理员权限"""
     message = '需要活动管理员权限！！！'
     activity_level = 3
+    role = ActivityLevel(3)
 
 
-class MaintainerAndAdminPermission(permissions.IsAuthenticated):
+class MaintainerAndAdminPermission(RolePermission):
     message = '需要Maintainer或者会议管理员权限！！！'
     level = 2
+    role = Level(2) | Level(3)
 
-    def has_permission(self, request, view):
-        if request.user.is_anonymous:
-            logger.error("user:{} is anonymous".format(str(request.user.id)))
-            return False
-        if not request.user.level:
-            logger.error("user:{} has no permission".format(str(request.user.id)))
-            return False
-        if request.user.level >= self.level:
-            if User.objects.get(id=request.user.id, level=request.user.level):
-                return True
-            else:
-                logger.error("user:{} has no permission".format(str(request.user.id)))
-                return False
-        else:
-            logger.error("user:{} has no permission".format(str(request.user.id)))
-            return False
-
-    def has_object_permission(self, request, view, obj):
-        return self.has_permission(request, view)
 
-
-class AdminPermission(permissions.IsAuthenticated):
+class AdminPermission(RolePermission):
     """需要会议管理员权限或者活动管理者权限！！！"""
     message = "需要会议管理员权限或者活动管理者权限！！！"
     level = 3
     activity_level = 3
-
-    def has_permission(self, request, view):  # 对于列表的访问权限
-        if request.user.is_anonymous:
-            logger.error("user:{} is anonymous".format(str(request.user.id)))
-            return False
-        elif request.user.level == self.level:
-            if User.objects.get(id=request.user.id, level=request.user.level):
-                return True
-            else:
-                logger.error("user:{} has no permission".format(str(request.user.id)))
-                return False
-        elif request.user.activity_level == self.activity_level:
-            if User.objects.get(id=request.user.id, activity_level=request.user.activity_level):
-                return True
-            else:
-                logger.error("user:{} has no permission".format(str(request.user.id)))
-                return False
-        else:
-            logger.error("user:{} has no permission".format(str(request.user.id)))
-            return False
-
-    def has_object_permission(self, request, view, obj):
-        return self.has_permission(request, view)
+    role = Level(3) | ActivityLevel(3)
 
 
 class QueryPermission(permissions.BasePermission):
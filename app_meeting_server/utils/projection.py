@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/26 14:20
+# @Author  : Tom_zc
+# @FileName: projection.py
+# @Software: PyCharm
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.query import ModelIterable
+from rest_framework import serializers
+
+
+class Projection:
+    """the relations and the columns which the serializer reads, only is None if some source can not be resolved"""
+
+    def __init__(self, model):
+        self.model = model
+        self.select_related = set()
+        self.prefetch_related = set()
+        self.only = {model._meta.pk.name}
+
+    def add_source(self, source_attrs):
+        """add the dotted source of the field, return False if it is not a model field"""
+        model = self.model
+        path = list()
+        for i, attr in enumerate(source_attrs):
+            try:
+                field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                return False
+            if field.many_to_many or field.one_to_many:
+                self.prefetch_related.add('__'.join(path + [field.name]))
+                return True
+            path.append(field.name)
+            if field.is_relation and i < len(source_attrs) - 1:
+                self.select_related.add('__'.join(path))
+                model = field.related_model
+                continue
+            self.only.add('__'.join(path))
+            return True
+        return True
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*sorted(self.prefetch_related))
+        if self.only is not None:
+            queryset = queryset.only(*sorted(self.only | self.select_related))
+        return queryset
+
+
+_projections = dict()
+
+
+def get_projection(serializer_class):
+    """
+    derive the projection from the sources of the serializer fields, it is cached by the serializer class.
+    the SerializerMethodField declares its sources in Meta.method_sources: {field name: [dotted source]},
+    the columns are not deferred if any field can not be resolved.
+    """
+    projection = _projections.get(serializer_class)
+    if projection is not None:
+        return projection
+    projection = Projection(serializer_class.Meta.model)
+    method_sources = getattr(serializer_class.Meta, 'method_sources', dict())
+    resolved = True
+    for name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField):
+            if name not in method_sources:
+                resolved = False
+                continue
+            sources = [source.split('.') for source in method_sources[name]]
+        elif isinstance(field, serializers.BaseSerializer) or field.source == '*':
+            resolved = False
+            continue
+        else:
+            sources = [field.source_attrs]
+        for source_attrs in sources:
+            resolved = projection.add_source(source_attrs) and resolved
+    if not resolved:
+        projection.only = None
+    _projections[serializer_class] = projection
+    return projection
+
+
+def apply_projection(queryset, serializer_class):
+    if queryset is None or queryset._iterable_class is not ModelIterable:
+        return queryset
+    return get_projection(serializer_class).apply(queryset)
+
+
+class ProjectionMixin:
+    """the queryset of the list view is projected to the sources of its serializer"""
+
+    def filter_queryset(self, queryset):
+        queryset = super(ProjectionMixin, self).filter_queryset(queryset)
+        return apply_projection(queryset, self.get_serializer_class())
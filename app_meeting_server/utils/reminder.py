@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/19 16:10
+# @Author  : Tom_zc
+# @FileName: reminder.py
+# @Software: PyCharm
+import datetime
+import logging
+import math
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections
+from django.db.models import Max, Q
+
+from app_meeting_server.utils.subscription_dispatcher import claim_reminder, dispatch_start_messages, \
+    release_reminder
+
+logger = logging.getLogger('log')
+
+MEETING_CREATED = 'create'
+MEETING_CANCELED = 'cancel'
+
+
+def get_app_model(name):
+    return apps.get_model(get_user_model()._meta.app_label, name)
+
+
+def record_meeting_change(meeting_id, action):
+    """record the change of meeting for reminder_daemon, call it in the transaction of the meeting"""
+    get_app_model('MeetingChange').objects.create(meeting_id=meeting_id, action=action)
+
+
+def get_start_time(date, start):
+    try:
+        return datetime.datetime.strptime('{} {}'.format(date, start), '%Y-%m-%d %H:%M')
+    except (TypeError, ValueError):
+        return None
+
+
+class TimerWheel:
+    """
+    the hashed timer wheel, the timer is put into the slot of (fire tick % slots) with its fire tick,
+    so advancing the wheel only visits the timers in the passed slots instead of all timers.
+    """
+
+    def __init__(self, tick=1, slots=3600, now=None):
+        self.tick = tick
+        self.slots = [dict() for _ in range(slots)]
+        self.current = int((time.time() if now is None else now) // tick)
+        self._timers = dict()
+
+    def __len__(self):
+        return len(self._timers)
+
+    def __contains__(self, key):
+        return key in self._timers
+
+    def add(self, key, fire_at):
+        """fire_at is the timestamp, the expired timer is fired at the next advance"""
+        self.cancel(key)
+        fire_tick = max(int(math.ceil(fire_at / self.tick)), self.current + 1)
+        self.slots[fire_tick % len(self.slots)][key] = fire_tick
+        self._timers[key] = fire_tick
+
+    def cancel(self, key):
+        fire_tick = self._timers.pop(key, None)
+        if fire_tick is not None:
+            self.slots[fire_tick % len(self.slots)].pop(key, None)
+
+    def advance(self, now=None):
+        """return the keys of the timers which are due"""
+        target = int((time.time() if now is None else now) // self.tick)
+        due = list()
+        for tick in range(self.current + 1, min(target, self.current + len(self.slots)) + 1):
+            slot = self.slots[tick % len(self.slots)]
+            for key, fire_tick in list(slot.items()):
+                if fire_tick <= target:
+                    del slot[key]
+                    del self._timers[key]
+                    due.append(key)
+        self.current = max(self.current, target)
+        return due
+
+
+class ReminderDaemon:
+    """
+    send the reminders of meetings at start time - offsets.
+    1.the upcoming meetings are loaded into the timer wheel at startup,
+      then the created and canceled meetings are applied from the change feed table incrementally.
+    2.the reminder is recorded in the ledger before it is sent, so it is never resent after restart,
+      it is deleted from the ledger and fired again after retry_delay at most retry_times if sending fails.
+    3.the reminder which is missed while the daemon is down is sent at startup if the meeting has not started.
+    4.the change whose id is skipped by the poll may be committed later by a slow transaction,
+      the skipped ids are read again by every poll until gap_timeout.
+    """
+
+    def __init__(self, offsets=(10,), tick=1, slots=3600, poll_interval=1, retention_days=7, gap_timeout=60,
+                 retry_delay=30, retry_times=3):
+        self.offsets = offsets
+        self.poll_interval = poll_interval
+        self.retention_days = retention_days
+        self.gap_timeout = gap_timeout
+        self.retry_delay = retry_delay
+        self.retry_times = retry_times
+        self.wheel = TimerWheel(tick=tick, slots=slots)
+        self.meeting_model = get_app_model('Meeting')
+        self.collect_model = get_app_model('Collect')
+        self.change_model = get_app_model('MeetingChange')
+        self.ledger_model = get_app_model('ReminderLedger')
+        self.last_change_id = 0
+        self.gaps = dict()
+        self.attempts = dict()
+        self._retries = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='reminder')
+        self._stopped = threading.Event()
+        self.fired = 0
+        self.skipped = 0
+
+    def schedule(self, meeting_id, date, start, notified=()):
+        start_time = get_start_time(date, start)
+        if start_time is None or start_time <= datetime.datetime.now():
+            return
+        for offset in self.offsets:
+            if (meeting_id, offset) in notified:
+                continue
+            fire_at = start_time - datetime.timedelta(minutes=offset)
+            self.wheel.add((meeting_id, offset), fire_at.timestamp())
+
+    def unschedule(self, meeting_id):
+        for offset in self.offsets:
+            self.wheel.cancel((meeting_id, offset))
+
+    def track_gaps(self, change_ids, now):
+        """move last_change_id to the highest id, the skipped ids below it are kept as gaps"""
+        for change_id in sorted(change_ids):
+            if change_id in self.gaps:
+                del self.gaps[change_id]
+            elif change_id > self.last_change_id:
+                for gap in range(self.last_change_id + 1, change_id):
+                    self.gaps[gap] = now
+                self.last_change_id = change_id
+
+    def load(self):
+        # read the position of change feed first, the changes during loading are applied again
+        max_id = self.change_model.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        self.last_change_id = max(max_id - 500, 0)
+        self.track_gaps(self.change_model.objects.filter(id__gt=self.last_change_id).values_list('id', flat=True),
+                        time.monotonic())
+        today = datetime.datetime.now().strftime('%Y-%m-%d')
+        meetings = list(self.meeting_model.objects.filter(is_delete=0, meeting_date__gte=today).values_list(
+            'id', 'date', 'start'))
+        notified = set(self.ledger_model.objects.filter(meeting_id__in=[meeting[0] for meeting in meetings])
+                       .values_list('meeting_id', 'offset'))
+        for meeting_id, date, start in meetings:
+            self.schedule(meeting_id, date, start, notified)
+        logger.info('reminder daemon loaded {} meetings, {} reminders scheduled'.format(len(meetings), len(self.wheel)))
+
+    def poll_changes(self):
+        now = time.monotonic()
+        self.gaps = {gap: found_at for gap, found_at in self.gaps.items() if now - found_at < self.gap_timeout}
+        query = Q(id__gt=self.last_change_id)
+        if self.gaps:
+            query |= Q(id__in=list(self.gaps))
+        changes = list(self.change_model.objects.filter(query).order_by('id')
+                       .values_list('id', 'meeting_id', 'action')[:500])
+        if not changes:
+            return
+        self.track_gaps([change[0] for change in changes], now)
+        created = [meeting_id for _, meeting_id, action in changes if action == MEETING_CREATED]
+        meetings = self.meeting_model.objects.filter(id__in=created, is_delete=0).values_list('id', 'date', 'start')
+        for meeting_id, date, start in meetings:
+            self.schedule(meeting_id, date, start)
+        for _, meeting_id, action in changes:
+            if action == MEETING_CANCELED:
+                self.unschedule(meeting_id)
+        logger.info('reminder daemon applied {} changes, {} reminders scheduled'.format(len(changes), len(self.wheel)))
+
+    def fire(self, due):
+        close_old_connections()
+        claimed = list()
+        try:
+            now = datetime.datetime.now()
+            for meeting_id, offset in due:
+                if claim_reminder(self.ledger_model, meeting_id, offset, now):
+                    claimed.append((meeting_id, offset))
+                else:
+                    self.skipped += 1
+            if not claimed:
+                return
+            meetings = self.meeting_model.objects.filter(id__in=[key[0] for key in claimed], is_delete=0)
+            dispatch_start_messages(meetings, self.collect_model)
+            self.fired += len(claimed)
+        except Exception as e:
+            logger.error('reminder daemon fail to send reminders {}, e:{}'.format(due, e))
+            self.release(claimed)
+        finally:
+            close_old_connections()
+
+    def release(self, keys):
+        """delete the claimed reminders from the ledger, they are added to the wheel again by run_once"""
+        for meeting_id, offset in keys:
+            try:
+                release_reminder(self.ledger_model, meeting_id, offset)
+            except Exception as e:
+                logger.error('reminder daemon fail to release reminder {}, e:{}'.format((meeting_id, offset), e))
+                continue
+            self._retries.put((meeting_id, offset))
+
+    def schedule_retries(self, now=None):
+        now = time.time() if now is None else now
+        while True:
+            try:
+                key = self._retries.get_nowait()
+            except queue.Empty:
+                return
+            attempts = self.attempts.get(key, 0) + 1
+            if attempts > self.retry_times:
+                self.attempts.pop(key, None)
+                logger.error('reminder daemon give up reminder {} after {} retries'.format(key, self.retry_times))
+                continue
+            self.attempts[key] = attempts
+            self.wheel.add(key, now + self.retry_delay)
+
+    def purge(self):
+        before = datetime.datetime.now() - datetime.timedelta(days=self.retention_days)
+        ret = self.change_model.objects.filter(create_time__lt=before).delete()
+        self.attempts = {key: attempts for key, attempts in self.attempts.items() if key in self.wheel}
+        logger.info('purge the meeting changes and result is:{}'.format(str(ret)))
+
+    def stop(self, *args):
+        logger.info('reminder daemon is stopping')
+        self._stopped.set()
+
+    def run_once(self, now=None):
+        self.poll_changes()
+        self.schedule_retries(now)
+        due = self.wheel.advance(now)
+        if due:
+            self._executor.submit(self.fire, due)
+        return due
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.load()
+        last_purge = None
+        while not self._stopped.is_set():
+            if last_purge is None or time.monotonic() - last_purge > 3600:
+                last_purge = time.monotonic()
+                self.purge()
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error('reminder daemon fail to poll, e:{}'.format(e))
+                close_old_connections()
+            self._stopped.wait(self.poll_interval)
+        self._executor.shutdown(wait=True)
+        logger.info('reminder daemon stopped, fired: {}, skipped: {}'.format(self.fired, self.skipped))
@@ -11,7 +11,7 @@ from rest_framework import status
 from rest_framework.exceptions import ErrorDetail, APIException
 from django.utils.translation import gettext_lazy as _
 
-from app_meeting_server.utils.common import refresh_access
+from app_meeting_server.utils.token_policy import token_reissue_policy
 from app_meeting_server.utils.ret_code import RetCode
 
 logger = logging.getLogger('log')
@@ -42,7 +42,7 @@ def ret_json(code=200, msg="success", data=None, access=None, **kwargs):
 
 
 def ret_access_json(user, code=200, msg="success", data=None, **kwargs):
-    access = refresh_access(user)
+    access = token_reissue_policy.get_access(user)
     ret_dict = {'code': code, 'msg': msg, "data": data, "access": access}
     ret_dict.update(kwargs)
     return JsonResponse(ret_dict)
@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/15 10:08
+# @Author  : Tom_zc
+# @FileName: session_store.py
+# @Software: PyCharm
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework_simplejwt.settings import api_settings
+
+logger = logging.getLogger('log')
+
+
+class MemoryBackend:
+    """in-process backend, only used for tests or single process"""
+
+    def __init__(self):
+        self._data = dict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+        if item is None or item[1] <= time.time():
+            return None
+        return item[0]
+
+    def set_many(self, mapping):
+        """mapping: {key: (value, expire_at)}"""
+        with self._lock:
+            self._data.update(mapping)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def sweep(self):
+        now = time.time()
+        with self._lock:
+            keys = [key for key, (_, expire_at) in self._data.items() if expire_at <= now]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+
+class FileBackend:
+    """sqlite file backend, shared by the processes in single host"""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self):
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS token_session '
+                         '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expire_at REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS token_session_expire_at ON token_session (expire_at)')
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key):
+        with self._lock:
+            row = self.conn.execute('SELECT value FROM token_session WHERE key = ? AND expire_at > ?',
+                                    (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set_many(self, mapping):
+        rows = [(key, value, expire_at) for key, (value, expire_at) in mapping.items()]
+        with self._lock:
+            conn = self.conn
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany('INSERT OR REPLACE INTO token_session (key, value, expire_at) VALUES (?, ?, ?)', rows)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def delete_many(self, keys):
+        with self._lock:
+            conn = self.conn
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany('DELETE FROM token_session WHERE key = ?', [(key,) for key in keys])
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def sweep(self):
+        with self._lock:
+            cursor = self.conn.execute('DELETE FROM token_session WHERE expire_at <= ?', (time.time(),))
+        return cursor.rowcount
+
+
+class TokenSessionError(Exception):
+    pass
+
+
+class RedisError(TokenSessionError):
+    pass
+
+
+class RedisBackend:
+    """backend of redis protocol(RESP), the expired keys are removed by the server"""
+
+    def __init__(self, url, timeout=1):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.strip('/') or 0)
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def encode(*args):
+        ret = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            arg = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+            ret.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        return b''.join(ret)
+
+    def read_reply(self):
+        line = self._file.readline()
+        if not line:
+            raise RedisError('connection closed')
+        flag, body = line[:1], line[1:-2]
+        if flag == b'+':
+            return body.decode('utf-8')
+        if flag == b'-':
+            raise RedisError(body.decode('utf-8'))
+        if flag == b':':
+            return int(body)
+        if flag == b'$':
+            length = int(body)
+            if length == -1:
+                return None
+            return self._file.read(length + 2)[:-2].decode('utf-8')
+        if flag == b'*':
+            length = int(body)
+            if length == -1:
+                return None
+            return [self.read_reply() for _ in range(length)]
+        raise RedisError('unknown reply: {}'.format(line))
+
+    def connect(self):
+        self.close()
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._file = self._sock.makefile('rb')
+        self._pid = os.getpid()
+        commands = list()
+        if self.password:
+            commands.append(('AUTH', self.password))
+        if self.db:
+            commands.append(('SELECT', self.db))
+        if commands:
+            self._pipeline(commands)
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._file.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._file = None
+
+    def _pipeline(self, commands):
+        self._sock.sendall(b''.join(self.encode(*command) for command in commands))
+        return [self.read_reply() for _ in commands]
+
+    def pipeline(self, commands):
+        """send the commands in one round trip, reconnect and retry once when the connection is broken"""
+        with self._lock:
+            for retry in range(2):
+                try:
+                    if self._sock is None or self._pid != os.getpid():
+                        self.connect()
+                    return self._pipeline(commands)
+                except (OSError, RedisError) as e:
+                    self.close()
+                    if retry:
+                        raise
+                    logger.warning('redis pipeline failed, retry and e:{}'.format(e))
+
+    def get(self, key):
+        return self.pipeline([('GET', key)])[0]
+
+    def set_many(self, mapping):
+        now = time.time()
+        commands = [('SET', key, value, 'PX', max(int((expire_at - now) * 1000), 1))
+                    for key, (value, expire_at) in mapping.items()]
+        self.pipeline(commands)
+
+    def delete_many(self, keys):
+        self.pipeline([('DEL',) + tuple(keys)])
+
+    def sweep(self):
+        return 0
+
+
+class BatchWriter:
+    """
+    group commit: the writes of concurrent requests are flushed to the backend in one batch,
+    and every writer waits until its write has been flushed, so the token is visible to other processes.
+    """
+
+    def __init__(self, backend, batch_size=100, flush_interval=0.005, sweep_interval=60, wait_timeout=2):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sweep_interval = sweep_interval
+        self.wait_timeout = wait_timeout
+        self._pending = list()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self.flushed_batches = 0
+        self.flushed_writes = 0
+
+    def ensure_started(self):
+        # the thread is not inherited by the forked uwsgi worker
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._pending = list()
+            self._thread = threading.Thread(target=self.run, name='token-session-writer', daemon=True)
+            self._thread.start()
+
+    def write(self, op, payload):
+        """op is set or delete, block until flushed"""
+        event = threading.Event()
+        item = {'op': op, 'payload': payload, 'event': event, 'error': None}
+        with self._cond:
+            self.ensure_started()
+            self._pending.append(item)
+            self._cond.notify()
+        if not event.wait(self.wait_timeout):
+            raise TokenSessionError('wait for flushing token session timeout')
+        if item['error'] is not None:
+            raise item['error']
+
+    def flush(self, batch):
+        to_set = dict()
+        to_delete = list()
+        # the later write of the same key wins
+        for item in batch:
+            if item['op'] == 'set':
+                for key, value in item['payload'].items():
+                    to_set[key] = value
+                    if key in to_delete:
+                        to_delete.remove(key)
+            else:
+                for key in item['payload']:
+                    to_set.pop(key, None)
+                    to_delete.append(key)
+        error = None
+        try:
+            if to_delete:
+                self.backend.delete_many(to_delete)
+            if to_set:
+                self.backend.set_many(to_set)
+            self.flushed_batches += 1
+            self.flushed_writes += len(batch)
+        except Exception as e:
+            logger.error('flush token session failed, e:{}'.format(e))
+            error = e
+        for item in batch:
+            item['error'] = error
+            item['event'].set()
+
+    def run(self):
+        last_sweep = time.monotonic()
+        while True:
+            with self._cond:
+                if not self._pending:
+                    self._cond.wait(self.sweep_interval)
+                # wait a moment to collect the writes of concurrent requests
+                deadline = time.monotonic() + self.flush_interval
+                while self._pending and len(self._pending) < self.batch_size and time.monotonic() < deadline:
+                    self._cond.wait(deadline - time.monotonic())
+                batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            if batch:
+                self.flush(batch)
+            if time.monotonic() - last_sweep >= self.sweep_interval:
+                last_sweep = time.monotonic()
+                try:
+                    self.backend.sweep()
+                except Exception as e:
+                    logger.error('sweep token session failed, e:{}'.format(e))
+
+
+class TokenSessionStore:
+    """
+    the only live access token of every refresh session, replace the access_jti column of meetings_refreshsession,
+    the access token without session which is signed before is the only live token of user.
+    the memory backend is per process and the file backend is per host, the token activated in one process
+    is unknown to the others, so they are only allowed in DEBUG or single process, use redis in production.
+    """
+    key_prefix = 'token_session'
+    local_backends = ('memory', 'file')
+
+    def __init__(self, backend_name, single_process=False, **kwargs):
+        self.backend_name = backend_name
+        self.single_process = single_process
+        self.kwargs = kwargs
+        self._writer = None
+        self._lock = threading.Lock()
+        self.check_backend()
+
+    @property
+    def enabled(self):
+        return self.backend_name not in (None, '', 'database')
+
+    def check_backend(self):
+        if self.backend_name in self.local_backends and not (settings.DEBUG or self.single_process):
+            raise ImproperlyConfigured('The token session backend {} is local to the process or host, '
+                                       'use redis or set TOKEN_SESSION_SINGLE_PROCESS'.format(self.backend_name))
+
+    def create_backend(self):
+        self.check_backend()
+        if self.backend_name == 'memory':
+            return MemoryBackend()
+        if self.backend_name == 'file':
+            return FileBackend(self.kwargs['path'])
+        if self.backend_name == 'redis':
+            return RedisBackend(self.kwargs['url'])
+        raise ValueError('Unknown token session backend: {}'.format(self.backend_name))
+
+    @property
+    def writer(self):
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = BatchWriter(self.create_backend(),
+                                               batch_size=self.kwargs.get('batch_size', 100),
+                                               flush_interval=self.kwargs.get('flush_interval', 0.005))
+        return self._writer
+
+    @property
+    def backend(self):
+        return self.writer.backend
+
+    def get_key(self, user_id, sid=None):
+        if sid:
+            return '{}:{}:{}'.format(self.key_prefix, user_id, sid)
+        return '{}:{}'.format(self.key_prefix, user_id)
+
+    def activate(self, user_id, jti, exp, sid=None):
+        self.writer.write('set', {self.get_key(user_id, sid): (jti, exp)})
+
+    def revoke(self, user_id, sids=()):
+        """revoke the token of user signed before and the tokens of the sessions"""
+        # keep a tombstone until the last access token expired
+        exp = time.time() + api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+        keys = [self.get_key(user_id)] + [self.get_key(user_id, sid) for sid in sids]
+        self.writer.write('set', {key: ('', exp) for key in keys})
+
+    def is_active(self, user_id, jti, sid=None):
+        """return None if the store knows nothing about the session, e.g. the token was signed before"""
+        try:
+            value = self.backend.get(self.get_key(user_id, sid))
+        except Exception as e:
+            logger.error('get token session failed, e:{}'.format(e))
+            return None
+        if value is None:
+            return None
+        return bool(jti) and value == jti
+
+    def sweep(self):
+        return self.backend.sweep()
+
+
+token_session_store = TokenSessionStore(settings.TOKEN_SESSION_BACKEND,
+                                        single_process=settings.TOKEN_SESSION_SINGLE_PROCESS,
+                                        path=settings.TOKEN_SESSION_FILE,
+                                        url=settings.TOKEN_SESSION_REDIS_URL,
+                                        batch_size=settings.TOKEN_SESSION_BATCH_SIZE,
+                                        flush_interval=settings.TOKEN_SESSION_FLUSH_INTERVAL)
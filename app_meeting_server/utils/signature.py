@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/8 10:21
+# @Author  : Tom_zc
+# @FileName: signature.py
+# @Software: PyCharm
+import hashlib
+import hmac
+import logging
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.utils.crypto import constant_time_compare
+from django.utils.encoding import force_bytes
+
+logger = logging.getLogger('log')
+
+
+class BaseSignatureBackend:
+    """signature backend, the result looks like: algorithm$digest"""
+    algorithm = None
+
+    def digest(self, token, secret):
+        raise NotImplementedError
+
+    def encode(self, token, secret):
+        return '{}${}'.format(self.algorithm, self.digest(str(token), secret))
+
+    def verify(self, token, secret, signature):
+        return constant_time_compare(self.encode(token, secret), signature)
+
+
+class HmacSha256SignatureBackend(BaseSignatureBackend):
+    algorithm = 'hmac_sha256'
+
+    def digest(self, token, secret):
+        return hmac.new(force_bytes(secret), force_bytes(token), hashlib.sha256).hexdigest()
+
+
+class Blake2bSignatureBackend(BaseSignatureBackend):
+    algorithm = 'blake2b'
+
+    def digest(self, token, secret):
+        # the key of blake2b can not be longer than 64 bytes
+        key = force_bytes(secret)
+        if len(key) > hashlib.blake2b.MAX_KEY_SIZE:
+            key = hashlib.sha512(key).digest()
+        return hashlib.blake2b(force_bytes(token), key=key, digest_size=32).hexdigest()
+
+
+class Pbkdf2SignatureBackend(BaseSignatureBackend):
+    """the legacy signature, only used to verify the signature which has not been rotated"""
+    algorithm = PBKDF2PasswordHasher.algorithm
+    iterations = 260000
+
+    def encode(self, token, secret):
+        return PBKDF2PasswordHasher().encode(str(token), secret, iterations=self.iterations)
+
+
+SIGNATURE_BACKENDS = {backend.algorithm: backend for backend in
+                      (HmacSha256SignatureBackend, Blake2bSignatureBackend, Pbkdf2SignatureBackend)}
+
+LEGACY_ALGORITHMS = (Pbkdf2SignatureBackend.algorithm,)
+
+
+def get_signature_backend(algorithm=None):
+    if algorithm is None:
+        algorithm = settings.SIGNATURE_BACKEND
+    backend = SIGNATURE_BACKENDS.get(algorithm)
+    if backend is None:
+        raise ValueError('Unknown signature backend: {}'.format(algorithm))
+    return backend()
+
+
+def encode_signature(token, secret):
+    return get_signature_backend().encode(token, secret)
+
+
+def verify_signature(token, secret, signature):
+    """verify the token by the algorithm which the signature was made with"""
+    if not signature:
+        return False
+    algorithm = signature.split('$', 1)[0]
+    if algorithm in LEGACY_ALGORITHMS and not settings.SIGNATURE_ACCEPT_LEGACY:
+        logger.error('The legacy signature:{} is not accepted'.format(algorithm))
+        return False
+    try:
+        backend = get_signature_backend(algorithm)
+    except ValueError as e:
+        logger.error('verify signature failed, e:{}'.format(e))
+        return False
+    return backend.verify(token, secret, signature)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/19 9:40
+# @Author  : Tom_zc
+# @FileName: subscription_dispatcher.py
+# @Software: PyCharm
+import datetime
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from app_meeting_server.utils import wx_apis
+from app_meeting_server.utils.common import decrypt_openids
+
+logger = logging.getLogger('log')
+
+
+class TokenBucket:
+    """the token bucket, rate tokens are added per second and at most capacity tokens are kept"""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class SubscriptionDispatcher:
+    """
+    send the subscription messages concurrently.
+    1.at most concurrency messages are in flight, they share the pooled session of wx_apis.
+    2.the messages are sent no faster than rate per second, which matches the quota of wechat.
+    """
+
+    def __init__(self, concurrency=8, rate=20, burst=20):
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.errors = dict()
+
+    def on_failure(self, reason):
+        with self._lock:
+            self.failed += 1
+            self.errors[reason] = self.errors.get(reason, 0) + 1
+
+    def send(self, mid, nickname, content):
+        self.bucket.acquire()
+        try:
+            r = wx_apis.send_subscription(content)
+        except Exception as e:
+            logger.error('meeting {} fail to send subscription message to {}, e:{}'.format(mid, nickname, e))
+            self.on_failure(type(e).__name__)
+            return
+        if r.status_code != 200:
+            logger.error('status code: {}'.format(r.status_code))
+            logger.error('content: {}'.format(r.text))
+            self.on_failure('http_{}'.format(r.status_code))
+        elif r.json()['errcode'] != 0:
+            logger.warning('Error Code: {}'.format(r.json()['errcode']))
+            logger.warning('Error Msg: {}'.format(r.json()['errmsg']))
+            logger.warning('receiver: {}'.format(nickname))
+            self.on_failure('errcode_{}'.format(r.json()['errcode']))
+        else:
+            logger.info('meeting {} subscription message sent to {}.'.format(mid, nickname))
+            with self._lock:
+                self.sent += 1
+
+    def dispatch(self, messages):
+        """messages: [(mid, nickname, content)], return the report of the run"""
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='subscription') as executor:
+            for mid, nickname, content in messages:
+                executor.submit(self.send, mid, nickname, content)
+        cost = time.monotonic() - start
+        total = self.sent + self.failed
+        return {
+            'total': total,
+            'sent': self.sent,
+            'failed': self.failed,
+            'errors': self.errors,
+            'cost': round(cost, 3),
+            'throughput': round(total / cost, 2) if cost else 0.0,
+        }
+
+
+def get_due_meetings(meeting_model, minutes=10):
+    """the meetings which start in the next minutes"""
+    now = datetime.datetime.now()
+    date = now.strftime('%Y-%m-%d')
+    t1 = now.strftime('%H:%M')
+    t2 = (now + datetime.timedelta(minutes=minutes)).strftime('%H:%M')
+    return meeting_model.objects.filter(is_delete=0, meeting_date=date, start_time__gt=t1, start_time__lte=t2)
+
+
+def get_start_messages(meetings, collect_model):
+    """prefetch the creators and the collectors of all meetings, and build the messages of meeting start"""
+    meetings = list(meetings.values('id', 'mid', 'topic', 'date', 'start',
+                                    'user__openid', 'user__nickname', 'user__is_delete'))
+    meeting_map = {meeting['id']: meeting for meeting in meetings}
+    receivers = dict()
+    for meeting in meetings:
+        if meeting['user__openid'] and meeting['user__is_delete'] == 0:
+            receivers[(meeting['id'], meeting['user__openid'])] = meeting['user__nickname']
+    collections = collect_model.objects.filter(meeting_id__in=meeting_map.keys(), user__is_delete=0,
+                                               user__openid__isnull=False) \
+        .values_list('meeting_id', 'user__openid', 'user__nickname')
+    for meeting_id, encrypt_openid, nickname in collections:
+        receivers[(meeting_id, encrypt_openid)] = nickname
+    notified = set(meeting_id for meeting_id, _ in receivers)
+    for meeting in meetings:
+        if meeting['id'] not in notified:
+            logger.info('the meeting {} had not been added to Favorites'.format(meeting['mid']))
+    keys = list(receivers.keys())
+    openids = decrypt_openids([encrypt_openid for _, encrypt_openid in keys])
+    messages = list()
+    for key, openid in zip(keys, openids):
+        meeting = meeting_map[key[0]]
+        time_str = meeting['date'] + ' ' + meeting['start']
+        content = wx_apis.get_start_template(openid, meeting['id'], meeting['topic'], time_str)
+        messages.append((meeting['mid'], receivers[key], content))
+    return messages
+
+
+def claim_reminder(ledger_model, meeting_id, offset, fire_at):
+    """record the reminder in the ledger before sending, return False if it has been sent"""
+    try:
+        with transaction.atomic():
+            ledger_model.objects.create(meeting_id=meeting_id, offset=offset, fire_at=fire_at)
+    except IntegrityError:
+        return False
+    return True
+
+
+def release_reminder(ledger_model, meeting_id, offset):
+    """delete the reminder from the ledger if sending fails, so it can be claimed and sent again"""
+    ledger_model.objects.filter(meeting_id=meeting_id, offset=offset).delete()
+
+
+def dispatch_start_messages(meetings, collect_model):
+    messages = get_start_messages(meetings, collect_model)
+    dispatcher = SubscriptionDispatcher(concurrency=settings.SUBSCRIPTION_CONCURRENCY,
+                                        rate=settings.SUBSCRIPTION_RATE,
+                                        burst=settings.SUBSCRIPTION_BURST)
+    report = dispatcher.dispatch(messages)
+    logger.info('send subscription messages, report: {}'.format(report))
+    return report
+
+
+def send_start_messages(meeting_model, collect_model, ledger_model, offset=10):
+    """send the reminders of the meetings which start in the next offset minutes, skip the meetings notified"""
+    meetings = get_due_meetings(meeting_model, offset)
+    if not meetings.exists():
+        logger.info('no meeting found, skip meeting notify.')
+        return None
+    now = datetime.datetime.now()
+    meeting_ids = [meeting_id for meeting_id in meetings.values_list('id', flat=True)
+                   if claim_reminder(ledger_model, meeting_id, offset, now)]
+    if not meeting_ids:
+        logger.info('the meetings have been notified, skip meeting notify.')
+        return None
+    try:
+        return dispatch_start_messages(meetings.filter(id__in=meeting_ids), collect_model)
+    except Exception:
+        for meeting_id in meeting_ids:
+            release_reminder(ledger_model, meeting_id, offset)
+        raise
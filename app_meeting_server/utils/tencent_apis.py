@@ -3,13 +3,14 @@ import hashlib
 import hmac
 import json
 import logging
-import requests
 import time
 from django.conf import settings
 
 from app_meeting_server.utils.common import make_nonce
+from app_meeting_server.utils.http_client import get_client
 
 logger = logging.getLogger('log')
+client = get_client('tencent')
 
 
 def get_signature(method, uri, body):
@@ -47,7 +48,7 @@ def get_records():
     while True:
         uri = '/v1/corp/records?start_time={}&end_time={}&page_size=20&page={}'.format(start_time, end_time, page)
         signature, headers = get_signature('GET', uri, "")
-        r = requests.get(get_url(uri), headers=headers)
+        r = client.get(get_url(uri), headers=headers, timeout=15)
         if r.status_code != 200:
             logger.error(r.json())
             return []
@@ -63,7 +64,7 @@ def get_video_download(record_file_id, userid):
     """获取录像下载地址"""
     uri = '/v1/addresses/{}?userid={}'.format(record_file_id, userid)
     signature, headers = get_signature('GET', uri, "")
-    r = requests.get(get_url(uri), headers=headers)
+    r = client.get(get_url(uri), headers=headers)
     if r.status_code == 200:
         return r.json()['download_address']
     else:
@@ -97,7 +98,7 @@ def createMeeting(date, start, end, topic, host_id, record):
     url = get_url(uri)
     payload = json.dumps(payload)
     signature, headers = get_signature('POST', uri, payload)
-    r = requests.post(url, headers=headers, data=payload)
+    r = client.post(url, headers=headers, data=payload)
     resp_dict = {
         'host_id': host_id
     }
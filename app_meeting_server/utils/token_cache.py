@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/9 10:15
+# @Author  : Tom_zc
+# @FileName: token_cache.py
+# @Software: PyCharm
+import copy
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.settings import api_settings
+
+from app_meeting_server.utils.local_cache import LocalCache
+
+logger = logging.getLogger('log')
+
+
+class TokenCache:
+    """
+    cache the user which has been verified by the access token, the key is the jti of token.
+    1.the local tier lives in every process, keep it short-lived because it can't be invalidated by other process.
+    2.the shared tier is a cache of django CACHES, e.g. redis, it is disabled if TOKEN_CACHE_ALIAS is empty.
+    3.the shared keys are namespaced by a version, clear bumps the version instead of flushing the backend which is
+      shared with the other caches, the version is kept in the process for local_ttl seconds.
+    4.every user has a generation which is bumped by invalidate_user, the user is cached with the generation read
+      before verifying, so the user verified before a concurrent revoking is never served after it.
+    """
+    key_prefix = 'token_cache'
+
+    def __init__(self, alias=None, ttl=300, local_ttl=5, maxsize=10000):
+        max_ttl = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+        self.ttl = min(ttl, max_ttl)
+        self.alias = alias
+        self.local = LocalCache(maxsize=maxsize, ttl=min(local_ttl, self.ttl))
+        self.shared_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_expire_at = 0
+        self._local_generations = dict()
+
+    @property
+    def shared(self):
+        if not self.alias:
+            return None
+        return caches[self.alias]
+
+    def get_version_key(self):
+        return '{}:version'.format(self.key_prefix)
+
+    def get_version(self):
+        now = time.monotonic()
+        if self._version is not None and now < self._version_expire_at:
+            return self._version
+        shared = self.shared
+        version_key = self.get_version_key()
+        version = shared.get(version_key)
+        if version is None:
+            shared.add(version_key, 1, None)
+            version = shared.get(version_key, 1)
+        self._version = version
+        self._version_expire_at = now + self.local.ttl
+        return version
+
+    def get_jti_key(self, jti):
+        return '{}:{}:jti:{}'.format(self.key_prefix, self.get_version(), jti)
+
+    def get_generation_key(self, user_id):
+        return '{}:{}:generation:{}'.format(self.key_prefix, self.get_version(), user_id)
+
+    def get_generation(self, user_id):
+        """read it before verifying the user and pass it to set"""
+        shared = self.shared
+        shared_generation = None
+        if shared is not None:
+            shared_generation = shared.get(self.get_generation_key(user_id), 0)
+        return self._local_generations.get(user_id, 0), shared_generation
+
+    def get_timeout(self, exp):
+        timeout = self.ttl
+        if exp:
+            timeout = min(timeout, int(exp - time.time()))
+        return timeout
+
+    def get(self, jti, user_id):
+        if not jti:
+            return None
+        local_generation = self._local_generations.get(user_id, 0)
+        item = self.local.get(jti)
+        if item is not None and item[0] == user_id and item[2] == local_generation:
+            return copy.copy(item[1])
+        shared = self.shared
+        if shared is not None:
+            jti_key = self.get_jti_key(jti)
+            generation_key = self.get_generation_key(user_id)
+            values = shared.get_many([jti_key, generation_key])
+            item = values.get(jti_key)
+            if item is not None and item[0].id == user_id and item[1] == values.get(generation_key, 0):
+                with self._lock:
+                    self.shared_hits += 1
+                self.local.set(jti, (user_id, item[0], local_generation))
+                return copy.copy(item[0])
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, jti, user, exp=None, generation=(0, 0)):
+        """generation is the result of get_generation before verifying the user"""
+        if not jti:
+            return
+        timeout = self.get_timeout(exp)
+        if timeout <= 0:
+            return
+        local_generation, shared_generation = generation
+        self.local.set(jti, (user.id, copy.copy(user), local_generation), timeout)
+        shared = self.shared
+        if shared is not None:
+            shared.set(self.get_jti_key(jti), (user, shared_generation or 0), timeout)
+
+    def invalidate_user(self, user_id):
+        """bump the generation of user, the cached tokens of user are not served any more"""
+        with self._lock:
+            self._local_generations[user_id] = self._local_generations.get(user_id, 0) + 1
+        self.local.delete_many(lambda key, value: value[0] == user_id)
+        shared = self.shared
+        if shared is not None:
+            # the generation outlives the users cached with the generation before it
+            generation_key = self.get_generation_key(user_id)
+            try:
+                shared.incr(generation_key)
+            except ValueError:
+                if not shared.add(generation_key, 1, self.ttl):
+                    shared.incr(generation_key)
+
+    def invalidate_users(self, user_ids):
+        for user_id in user_ids:
+            self.invalidate_user(int(user_id))
+
+    def clear(self):
+        """drop the cached users of all processes, the keys of the old version expire by their timeout"""
+        self.local.clear()
+        shared = self.shared
+        if shared is not None:
+            version_key = self.get_version_key()
+            try:
+                shared.incr(version_key)
+            except ValueError:
+                shared.add(version_key, 2, None)
+            self._version = None
+
+    def stats(self):
+        local_stats = self.local.stats()
+        return {
+            'local_size': local_stats['size'],
+            'local_hits': local_stats['hits'],
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+        }
+
+
+token_cache = TokenCache(alias=settings.TOKEN_CACHE_ALIAS,
+                         ttl=settings.TOKEN_CACHE_TTL,
+                         local_ttl=settings.TOKEN_CACHE_LOCAL_TTL,
+                         maxsize=settings.TOKEN_CACHE_MAXSIZE)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/10 15:26
+# @Author  : Tom_zc
+# @FileName: token_policy.py
+# @Software: PyCharm
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from app_meeting_server.utils.common import refresh_access
+from app_meeting_server.utils.my_refresh import SESSION_CLAIM
+from app_meeting_server.utils.local_cache import LocalCache
+
+logger = logging.getLogger('log')
+
+
+class TokenReissuePolicy:
+    """
+    decide whether to reissue the access token in the response.
+    1.the token is reissued only when it will expire in reissue_window seconds, otherwise return the current token.
+    2.the concurrent reissues of the same session are coalesced, they share the token reissued in coalesce_ttl seconds.
+    """
+    key_prefix = 'token_reissue'
+
+    def __init__(self, reissue_window=120, coalesce_ttl=10, alias=None, wait_timeout=1):
+        self.reissue_window = reissue_window
+        self.coalesce_ttl = coalesce_ttl
+        self.alias = alias
+        self.wait_timeout = wait_timeout
+        self.recent = LocalCache(maxsize=10000, ttl=coalesce_ttl)
+        self._locks = dict()
+        self._locks_lock = threading.Lock()
+        self.reissued = 0
+        self.reused = 0
+
+    @property
+    def shared(self):
+        if not self.alias:
+            return None
+        return caches[self.alias]
+
+    def get_lock(self, key):
+        with self._locks_lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = threading.Lock()
+                self._locks[key] = lock
+            return lock
+
+    @staticmethod
+    def get_session(token):
+        return token.get(SESSION_CLAIM) if token is not None else None
+
+    def get_session_key(self, user, token):
+        """every device reissues the token of its own refresh session"""
+        sid = self.get_session(token)
+        return '{}:{}'.format(user.id, sid) if sid else str(user.id)
+
+    def need_reissue(self, token):
+        if token is None:
+            return True
+        exp = token.get('exp')
+        if not exp:
+            return True
+        return exp - time.time() <= self.reissue_window
+
+    def get_access(self, user):
+        token = getattr(user, 'access_token', None)
+        if not self.need_reissue(token):
+            self.reused += 1
+            return str(token)
+        key = self.get_session_key(user, token)
+        with self.get_lock(key):
+            access = self.recent.get(key)
+            if access is None:
+                access = self.reissue(user, token)
+                self.recent.set(key, access)
+            return access
+
+    def reissue(self, user, token):
+        sid = self.get_session(token)
+        shared = self.shared
+        if shared is None:
+            self.reissued += 1
+            return refresh_access(user, sid)
+        session_key = self.get_session_key(user, token)
+        value_key = '{}:value:{}'.format(self.key_prefix, session_key)
+        lock_key = '{}:lock:{}'.format(self.key_prefix, session_key)
+        access = shared.get(value_key)
+        if access:
+            return access
+        if shared.add(lock_key, 1, self.coalesce_ttl):
+            try:
+                self.reissued += 1
+                access = refresh_access(user, sid)
+                shared.set(value_key, access, self.coalesce_ttl)
+                return access
+            finally:
+                shared.delete(lock_key)
+        # another process is reissuing the token, wait for the result
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            access = shared.get(value_key)
+            if access:
+                return access
+        if token is not None and token.get('exp', 0) > time.time():
+            logger.info('User:{} wait reissued token timeout, use the current token'.format(user.id))
+            return str(token)
+        self.reissued += 1
+        return refresh_access(user, sid)
+
+    def stats(self):
+        return {'reissued': self.reissued, 'reused': self.reused}
+
+
+token_reissue_policy = TokenReissuePolicy(reissue_window=settings.TOKEN_REISSUE_WINDOW,
+                                          coalesce_ttl=settings.TOKEN_REISSUE_COALESCE_TTL,
+                                          alias=settings.TOKEN_CACHE_ALIAS)
@@ -2,21 +2,25 @@ import datetime
 import logging
 import json
 import os
-import requests
 import stat
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
 from app_meeting_server.utils.file_stream import write_content, download_big_file
+from app_meeting_server.utils.access_token import AccessTokenManager
+from app_meeting_server.utils.http_client import get_client
 
 logger = logging.getLogger('log')
+client = get_client('welink')
 
 
-def createProxyToken(host_id):
+def fetch_proxy_token(host_id):
     """获取代理鉴权token"""
     host_dict = settings.WELINK_HOSTS
     if host_id not in host_dict.keys():
         logger.error('host_id {} is invalid'.format(host_id))
-        return None
+        return None, 0
     account = host_dict[host_id]['account']
     pwd = host_dict[host_id]['pwd']
     uri = '/v1/usg/acs/auth/proxy'
@@ -30,23 +34,45 @@ def createProxyToken(host_id):
         'account': account,
         'pwd': pwd
     }
-    response = requests.post(get_url(uri), headers=headers, data=json.dumps(payload))
+    response = client.post(get_url(uri), headers=headers, data=json.dumps(payload))
     if response.status_code != 200:
         logger.error('Fail to get proxy token, status_code: {}'.format(response.status_code))
-        return None
-    return response.json()['accessToken']
+        return None, 0
+    return response.json()['accessToken'], response.json().get('validPeriod', settings.WELINK_TOKEN_VALID_PERIOD)
+
+
+token_manager = AccessTokenManager('welink_proxy_token', fetch_proxy_token,
+                                   refresh_ahead=settings.WELINK_TOKEN_REFRESH_AHEAD,
+                                   alias=settings.WELINK_TOKEN_CACHE_ALIAS)
+
+
+def createProxyToken(host_id):
+    """获取缓存的代理鉴权token"""
+    return token_manager.get(host_id)
+
+
+def request_with_token(method, host_id, uri, headers=None, **kwargs):
+    """携带代理鉴权token发送请求, token失效时重新获取token并重试一次"""
+    headers = dict(headers or {})
+    access_token = createProxyToken(host_id)
+    headers['X-Access-Token'] = access_token
+    response = client.request(method, get_url(uri), headers=headers, **kwargs)
+    if response.status_code != 401:
+        return response
+    logger.warning('proxy token of host {} is invalid, retry'.format(host_id))
+    token_manager.invalidate(host_id, access_token)
+    headers['X-Access-Token'] = createProxyToken(host_id)
+    return client.request(method, get_url(uri), headers=headers, **kwargs)
 
 
 def createMeeting(date, start, end, topic, host, record):
     """预定会议"""
-    access_token = createProxyToken(host)
     startTime = (datetime.datetime.strptime(date + start, '%Y-%m-%d%H:%M') - datetime.timedelta(hours=8)).strftime(
         '%Y-%m-%d %H:%M')
     length = int((datetime.datetime.strptime(end, '%H:%M') - datetime.datetime.strptime(start, '%H:%M')).seconds / 60)
     uri = '/v1/mmc/management/conferences'
     headers = {
-        'Content-Type': 'application/json',
-        'X-Access-Token': access_token
+        'Content-Type': 'application/json'
     }
     data = {
         'startTime': startTime,
@@ -63,7 +89,7 @@ def createMeeting(date, start, end, topic, host, record):
     if record == 'cloud':
         data['isAutoRecord'] = 1
         data['recordType'] = 2
-    response = requests.post(get_url(uri), headers=headers, data=json.dumps(data))
+    response = request_with_token('POST', host, uri, headers=headers, data=json.dumps(data))
     resp_dict = {}
     if response.status_code != 200:
         logger.error('Fail to create meeting, status_code is {}'.format(response.status_code))
@@ -77,16 +103,12 @@ def createMeeting(date, start, end, topic, host, record):
 
 def cancelMeeting(mid, host_id):
     """取消会议"""
-    access_token = createProxyToken(host_id)
     uri = '/v1/mmc/management/conferences'
-    headers = {
-        'X-Access-Token': access_token
-    }
     params = {
         'conferenceID': mid,
         'type': 1
     }
-    response = requests.delete(get_url(uri), headers=headers, params=params)
+    response = request_with_token('DELETE', host_id, uri, params=params)
     if response.status_code != 200:
         logger.error('Fail to cancel meeting {}'.format(mid))
         logger.error(response.json())
@@ -97,20 +119,16 @@ def cancelMeeting(mid, host_id):
 
 def listHisMeetings(host_id):
     """获取历史会议列表"""
-    access_token = createProxyToken(host_id)
     tn = int(time.time())
     endDate = tn * 1000
     startDate = (tn - 3600 * 24) * 1000
     uri = '/v1/mmc/management/conferences/history'
-    headers = {
-        'X-Access-Token': access_token
-    }
     params = {
         'startDate': startDate,
         'endDate': endDate,
         'limit': 500
     }
-    response = requests.get(get_url(uri), headers=headers, params=params)
+    response = request_with_token('GET', host_id, uri, params=params, timeout=20)
     if response.status_code != 200:
         logger.error('Fail to get history meetings list')
         logger.error(response.json())
@@ -118,36 +136,159 @@ def listHisMeetings(host_id):
     return response.json()
 
 
+def list_pages(host_id, uri, params, page_size):
+    """获取分页数据的全部记录, 返回(status_code, data或错误信息)"""
+    data = list()
+    offset = 0
+    while True:
+        response = request_with_token('GET', host_id, uri, params=dict(params, offset=offset, limit=page_size),
+                                      timeout=20)
+        if response.status_code != 200:
+            return response.status_code, response.json()
+        page = response.json()
+        data.extend(page.get('data') or [])
+        offset += page_size
+        if len(page.get('data') or []) < page_size or offset >= page.get('count', 0):
+            return response.status_code, data
+
+
+class WelinkHistoryIndex:
+    """
+    the index of history conferences of every host: conferenceID -> [confUUID].
+    1.the recurring or multi-session conference has more than one confUUID.
+    2.only the conferences ended after the last sync(with overlap) are listed when refreshing,
+      the conferences older than lookback are dropped.
+    3.the conference which started before the window is missed by the incremental refresh,
+      all the conferences in lookback are listed again when the conference is not found, at most once per refresh_interval.
+    """
+
+    def __init__(self, lookback=86400, refresh_interval=60, overlap=600, page_size=500):
+        self.lookback = lookback
+        self.refresh_interval = refresh_interval
+        self.overlap = overlap
+        self.page_size = page_size
+        self._hosts = dict()
+        self._locks = dict()
+        self._locks_lock = threading.Lock()
+
+    def get_lock(self, host_id):
+        with self._locks_lock:
+            lock = self._locks.get(host_id)
+            if lock is None:
+                lock = threading.Lock()
+                self._locks[host_id] = lock
+            return lock
+
+    def refresh(self, host_id, full=False):
+        now = int(time.time())
+        with self.get_lock(host_id):
+            host = self._hosts.get(host_id) or {'synced_at': 0, 'full_synced_at': 0, 'conferences': dict()}
+            start = now - self.lookback if full else max(host['synced_at'] - self.overlap, now - self.lookback)
+            params = {'startDate': start * 1000, 'endDate': now * 1000}
+            status, data = list_pages(host_id, '/v1/mmc/management/conferences/history', params, self.page_size)
+            if status != 200:
+                logger.error('Fail to get history meetings list, status: {}, e: {}'.format(status, data))
+                return False
+            conferences = host['conferences']
+            for item in data:
+                conferences.setdefault(item['conferenceID'], dict())[item['confUUID']] = now
+            expired = now - self.lookback
+            for conference_id in list(conferences.keys()):
+                uuids = {uuid: seen for uuid, seen in conferences[conference_id].items() if seen > expired}
+                if uuids:
+                    conferences[conference_id] = uuids
+                else:
+                    del conferences[conference_id]
+            host['synced_at'] = now
+            if full or start == now - self.lookback:
+                host['full_synced_at'] = now
+            self._hosts[host_id] = host
+            logger.info('refresh welink history index of {}: {} conferences'.format(host_id, len(conferences)))
+            return True
+
+    def get_conf_uuids(self, host_id, mid):
+        host = self._hosts.get(host_id)
+        stale = host is None or time.time() - host['synced_at'] >= self.refresh_interval
+        if stale or str(mid) not in host['conferences']:
+            self.refresh(host_id)
+            host = self._hosts.get(host_id)
+        if host is not None and str(mid) not in host['conferences'] and \
+                time.time() - host['full_synced_at'] >= self.refresh_interval:
+            self.refresh(host_id, full=True)
+            host = self._hosts.get(host_id)
+        if host is None:
+            return list()
+        return list(host['conferences'].get(str(mid), dict()).keys())
+
+
+history_index = WelinkHistoryIndex(lookback=settings.WELINK_HISTORY_LOOKBACK,
+                                   refresh_interval=settings.WELINK_HISTORY_REFRESH_INTERVAL,
+                                   page_size=settings.WELINK_PAGE_SIZE)
+
+
+def get_attendee_page(host_id, conf_uuid, offset):
+    uri = '/v1/mmc/management/conferences/history/confAttendeeRecord'
+    params = {
+        'confUUID': conf_uuid,
+        'offset': offset,
+        'limit': settings.WELINK_PAGE_SIZE
+    }
+    response = request_with_token('GET', host_id, uri, params=params)
+    return response.status_code, response.json()
+
+
+def get_participants(host_id, mid):
+    """并发获取会议全部场次的参会者, 首页确定总数后并发获取剩余页"""
+    conf_uuids = history_index.get_conf_uuids(host_id, mid)
+    participants = {
+        'total_records': 0,
+        'participants': []
+    }
+    if not conf_uuids:
+        return 200, participants
+    page_size = settings.WELINK_PAGE_SIZE
+    with ThreadPoolExecutor(max_workers=settings.WELINK_ATTENDEE_CONCURRENCY,
+                            thread_name_prefix='welink-attendee') as executor:
+        first_pages = [executor.submit(get_attendee_page, host_id, conf_uuid, 0) for conf_uuid in conf_uuids]
+        pages = list()
+        for conf_uuid, future in zip(conf_uuids, first_pages):
+            status, content = future.result()
+            if status != 200:
+                return status, content
+            participants['total_records'] += content['count']
+            pages.append(future)
+            for offset in range(page_size, content['count'], page_size):
+                pages.append(executor.submit(get_attendee_page, host_id, conf_uuid, offset))
+        for future in pages:
+            status, content = future.result()
+            if status != 200:
+                return status, content
+            participants['participants'].extend(content['data'])
+    return 200, participants
+
+
 def listRecordings(host_id):
     """获取录像列表"""
-    access_token = createProxyToken(host_id)
     tn = int(time.time())
     endDate = tn * 1000
     startDate = (tn - 3600 * 24) * 1000
     uri = '/v1/mmc/management/record/files'
-    headers = {
-        'X-Access-Token': access_token
-    }
     params = {
         'startDate': startDate,
         'endDate': endDate,
         'limit': 100
     }
-    response = requests.get(get_url(uri), headers=headers, params=params)
+    response = request_with_token('GET', host_id, uri, params=params)
     return response.status_code, response.json()
 
 
 def getDetailDownloadUrl(confUUID, host_id):
     """获取录像下载地址"""
-    access_token = createProxyToken(host_id)
     uri = '/v1/mmc/management/record/downloadurls'
-    headers = {
-        'X-Access-Token': access_token
-    }
     params = {
         'confUUID': confUUID
     }
-    response = requests.get(get_url(uri), headers=headers, params=params)
+    response = request_with_token('GET', host_id, uri, params=params)
     return response.status_code, response.json()
 
 
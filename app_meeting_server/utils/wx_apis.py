@@ -1,13 +1,17 @@
 import json
 import logging
-import requests
 import sys
 from django.conf import settings
+from app_meeting_server.utils.access_token import AccessTokenManager
+from app_meeting_server.utils.http_client import get_client
 
 logger = logging.getLogger('log')
+client = get_client('wx')
+# access_token is invalid or expired
+INVALID_TOKEN_ERRCODES = (40001, 42001)
 
 
-def get_token():
+def fetch_token(key):
     """获取微信小程序token"""
     appid = settings.APP_CONF['appid']
     secret = settings.APP_CONF['secret']
@@ -17,14 +21,44 @@ def get_token():
         'secret': secret,
         'grant_type': 'client_credential'
     }
-    r = requests.get(get_url(uri), params=params)
-    if r.status_code != 200:
+    r = client.get(get_url(uri), params=params)
+    if r.status_code != 200 or not r.json().get('access_token'):
         logger.error('fail to get wx access_token')
         logger.error('status_code: {}'.format(r.status_code))
         logger.error('content: {}'.format(r.json()))
-        return ''
-    access_token = r.json().get('access_token')
-    return access_token
+        return None, 0
+    return r.json().get('access_token'), r.json().get('expires_in', 7200)
+
+
+token_manager = AccessTokenManager('wx_access_token', fetch_token,
+                                   refresh_ahead=settings.WX_TOKEN_REFRESH_AHEAD,
+                                   alias=settings.WX_TOKEN_CACHE_ALIAS)
+
+
+def get_token():
+    """获取缓存的微信小程序token"""
+    return token_manager.get() or ''
+
+
+def is_invalid_token(response):
+    if response.status_code != 200 or response.headers.get('Content-Type', '').startswith('image'):
+        return False
+    try:
+        return response.json().get('errcode') in INVALID_TOKEN_ERRCODES
+    except (ValueError, AttributeError):
+        return False
+
+
+def post_with_token(uri, data, access_token=None, timeout=None):
+    """携带token发送请求, token失效时重新获取token并重试一次"""
+    access_token = access_token or get_token()
+    response = client.post(get_url(uri), params={'access_token': access_token}, data=json.dumps(data),
+                           timeout=timeout)
+    if not is_invalid_token(response):
+        return response
+    logger.warning('wx access_token is invalid, errcode: {}'.format(response.json().get('errcode')))
+    token_manager.invalidate(token=access_token)
+    return client.post(get_url(uri), params={'access_token': get_token()}, data=json.dumps(data), timeout=timeout)
 
 
 def get_openid(code):
@@ -36,32 +70,25 @@ def get_openid(code):
         'js_code': code,
         'grant_type': 'authorization_code'
     }
-    r = requests.get(get_url(uri), params=params)
+    r = client.get(get_url(uri), params=params)
     return r.json()
 
 
-def send_subscription(content, access_token):
+def send_subscription(content, access_token=None):
     """发送订阅消息"""
     uri = '/cgi-bin/message/subscribe/send'
-    params = {
-        'access_token': access_token
-    }
-    response = requests.post(get_url(uri), params=params, data=json.dumps(content))
+    response = post_with_token(uri, content, access_token)
     return response
 
 
 def gene_code_img(activity_id):
     """生成二维码"""
-    access_token = get_token()
     uri = '/wxa/getwxacodeunlimit'
-    params = {
-        'access_token': access_token
-    }
     data = {
         'scene': activity_id,
         'page': 'package-events/events/event-detail'
     }
-    res = requests.post(get_url(uri), params=params, data=json.dumps(data))
+    res = post_with_token(uri, data, timeout=15)
     if res.status_code != 200:
         logger.error('{}, fail to get QR code'.format(res.status_code))
         sys.exit(1)
@@ -1,12 +1,13 @@
 import datetime
 import logging
 import json
-import requests
 import secrets
 from django.conf import settings
-from obs import ObsClient
+from app_meeting_server.utils.http_client import get_client
+from app_meeting_server.utils.zoom_credential import zoom_credential_provider
 
 logger = logging.getLogger('log')
+client = get_client('zoom')
 
 
 def createMeeting(date, start, end, topic, host, record):
@@ -35,7 +36,7 @@ def createMeeting(date, start, end, topic, host, record):
         }
     }
     uri = "/v2/users/{}/meetings".format(host)
-    response = requests.post(get_url(uri), data=json.dumps(payload), headers=headers)
+    response = client.post(get_url(uri), data=json.dumps(payload), headers=headers)
     resp_dict = {}
     if response.status_code != 201:
         return response.status_code, resp_dict
@@ -69,7 +70,7 @@ def updateMeeting(mid, date, start, end, topic, record):
     }
     uri = "/v2/meetings/{}".format(mid)
     # 发送patch请求，修改会议
-    response = requests.patch(get_url(uri), data=json.dumps(new_data), headers=headers)
+    response = client.patch(get_url(uri), data=json.dumps(new_data), headers=headers)
     return response.status_code
 
 
@@ -79,7 +80,7 @@ def cancelMeeting(mid):
     headers = {
         "authorization": "Bearer {}".format(token)
     }
-    response = requests.request("DELETE", get_url(uri), headers=headers)
+    response = client.delete(get_url(uri), headers=headers)
     return response.status_code
 
 
@@ -88,7 +89,7 @@ def getParticipants(mid):
     token = getOauthToken()
     headers = {
         "authorization": "Bearer {}".format(token)}
-    r = requests.get(get_url(uri), headers=headers)
+    r = client.get(get_url(uri), headers=headers, timeout=15)
     if r.status_code == 200:
         total_records = r.json()['total_records']
         participants = r.json()['participants']
@@ -99,22 +100,7 @@ def getParticipants(mid):
 
 
 def getOauthToken():
-    bucketName = settings.OBS_BUCKETNAME_2
-    object_key = settings.ZOOM_TOKEN_OBJECT
-    obs_client = ObsClient(access_key_id=settings.ACCESS_KEY_ID_2,
-                           secret_access_key=settings.SECRET_ACCESS_KEY_2,
-                           server=settings.OBS_ENDPOINT_2)
-    res = obs_client.getObjectMetadata(bucketName, object_key)
-    token = ''
-    if res.get('status') != 200:
-        logger.error('Fail to get zoom token')
-        return token
-    for k, v in res.get('header'):
-        if k == 'access_token':
-            token = v
-            break
-    logger.info('Get zoom token successfully')
-    return token
+    return zoom_credential_provider.get_token()
 
 
 def get_url(uri):
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# @Time    : 2024/1/17 15:30
+# @Author  : Tom_zc
+# @FileName: zoom_credential.py
+# @Software: PyCharm
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from obs import ObsClient
+
+logger = logging.getLogger('log')
+
+
+class ZoomCredentialProvider:
+    """
+    provide the zoom oauth token which is kept in the metadata of ZOOM_TOKEN_OBJECT by another job.
+    1.the token is held in memory for ttl seconds, and one ObsClient with long connection is reused.
+    2.when the token has been checked more than check_interval seconds ago, the metadata is re-read in the background,
+      so the token rotated by the job(the last-modified of the object changed) is picked up without blocking requests.
+    3.when OBS is slow or failed, the cached token is used until it is older than max_stale.
+    """
+
+    def __init__(self, ttl=300, check_interval=60, obs_timeout=2, max_stale=1800):
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.obs_timeout = obs_timeout
+        self.max_stale = max_stale
+        self._client = None
+        self._pid = None
+        self._token = ''
+        self._last_modified = None
+        self._fetched_at = 0
+        self._checked_at = 0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self.obs_calls = 0
+        self.obs_latency = 0.0
+        self.calls_saved = 0
+        self.fallbacks = 0
+
+    @property
+    def client(self):
+        if self._client is None or self._pid != os.getpid():
+            self._client = ObsClient(access_key_id=settings.ACCESS_KEY_ID_2,
+                                     secret_access_key=settings.SECRET_ACCESS_KEY_2,
+                                     server=settings.OBS_ENDPOINT_2,
+                                     timeout=self.obs_timeout,
+                                     max_retry_count=1,
+                                     long_conn_mode=True)
+            self._pid = os.getpid()
+        return self._client
+
+    def fetch(self):
+        """return (token, last_modified), token is None if failed"""
+        start = time.monotonic()
+        try:
+            res = self.client.getObjectMetadata(settings.OBS_BUCKETNAME_2, settings.ZOOM_TOKEN_OBJECT)
+        except Exception as e:
+            logger.error('Fail to get zoom token, e:{}'.format(e))
+            return None, None
+        finally:
+            with self._lock:
+                self.obs_calls += 1
+                self.obs_latency += time.monotonic() - start
+        if res.get('status') != 200:
+            logger.error('Fail to get zoom token, status: {}'.format(res.get('status')))
+            return None, None
+        token = None
+        for k, v in res.get('header'):
+            if k == 'access_token':
+                token = v
+                break
+        last_modified = res.get('body').get('lastModified') if res.get('body') else None
+        return token, last_modified
+
+    def update(self, token, last_modified):
+        now = time.time()
+        with self._lock:
+            self._checked_at = now
+            if not token:
+                return
+            if token != self._token or last_modified != self._last_modified:
+                logger.info('Get zoom token successfully')
+            self._token = token
+            self._last_modified = last_modified
+            self._fetched_at = now
+
+    def refresh_in_background(self):
+        try:
+            token, last_modified = self.fetch()
+            self.update(token, last_modified)
+        finally:
+            with self._lock:
+                self._refreshing = False
+            logger.info('zoom credential stats: {}'.format(self.stats()))
+
+    def get_token(self):
+        now = time.time()
+        age = now - self._fetched_at
+        if self._token and age < self.ttl:
+            with self._lock:
+                self.calls_saved += 1
+                start_refresh = now - self._checked_at >= self.check_interval and not self._refreshing
+                if start_refresh:
+                    self._refreshing = True
+            if start_refresh:
+                threading.Thread(target=self.refresh_in_background, name='zoom-credential', daemon=True).start()
+            return self._token
+        token, last_modified = self.fetch()
+        if token:
+            self.update(token, last_modified)
+            return token
+        if self._token and age < self.max_stale:
+            with self._lock:
+                self.fallbacks += 1
+            logger.warning('OBS is unavailable, use the cached zoom token')
+            return self._token
+        return ''
+
+    def stats(self):
+        with self._lock:
+            avg_latency = self.obs_latency / self.obs_calls if self.obs_calls else 0.0
+            return {
+                'obs_calls': self.obs_calls,
+                'calls_saved': self.calls_saved,
+                'fallbacks': self.fallbacks,
+                'avg_obs_latency': avg_latency,
+                'latency_saved': avg_latency * self.calls_saved,
+            }
+
+
+zoom_credential_provider = ZoomCredentialProvider(ttl=settings.ZOOM_TOKEN_TTL,
+                                                  check_interval=settings.ZOOM_TOKEN_CHECK_INTERVAL,
+                                                  obs_timeout=settings.ZOOM_TOKEN_OBS_TIMEOUT)